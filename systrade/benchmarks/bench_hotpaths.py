@@ -0,0 +1,223 @@
+"""Throughput of the backtest hot paths on synthetic data.
+
+Covers feed construction and replay, broker matching with many open orders,
+portfolio updates over a wide universe and a full engine run. Results are
+written as JSON so runs from different commits can be compared. Run with
+``python benchmarks/bench_hotpaths.py --symbols 100 --years 10 -o run.json``
+and compare two runs with ``--compare before.json``.
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, override
+
+import numpy as np
+
+from synthetic import symbol_names, write_bars
+from systrade.broker import BacktestBroker
+from systrade.data import BarData, ExecutionReport, Order, OrderType
+from systrade.engine import Engine
+from systrade.feed import FileFeed
+from systrade.portfolio import Portfolio
+from systrade.strategy import Strategy
+
+
+class Rebalance(Strategy):
+    """Holds an equal number of shares of every symbol, topping positions up
+    every period bars"""
+
+    def __init__(self, symbols: list[str], period: int = 20) -> None:
+        super().__init__()
+        self.symbols = symbols
+        self.period = period
+        self.bar = 0
+
+    @override
+    def on_start(self) -> None:
+        for symbol in self.symbols:
+            self.subscribe(symbol)
+
+    @override
+    def on_data(self, data: BarData) -> None:
+        if self.bar % self.period == 0:
+            for symbol in self.symbols:
+                if data.get(symbol) is not None:
+                    self.post_market_order(symbol, 1)
+        self.bar += 1
+
+    @override
+    def on_execution(self, report: ExecutionReport) -> None:
+        pass
+
+
+def timed(run: Callable[[], object], repeat: int) -> float:
+    """Best wall time of repeat runs"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def replay(path: Path, symbols: list[str]) -> list[BarData]:
+    feed = FileFeed(path)
+    feed.start()
+    for symbol in symbols:
+        feed.subscribe(symbol)
+    bars = list[BarData]()
+    while feed.is_running():
+        bars.append(feed.next_data())
+    return bars
+
+
+def bench_feed(path: Path, symbols: list[str], repeat: int) -> dict[str, dict]:
+    construct = timed(lambda: FileFeed(path), repeat)
+    # Only the replay is timed, the feed is built beforehand each time
+    next_data = float("inf")
+    for _ in range(repeat):
+        feed = FileFeed(path)
+        for symbol in symbols:
+            feed.subscribe(symbol)
+        feed.start()
+        count = 0
+        start = time.perf_counter()
+        while feed.is_running():
+            feed.next_data()
+            count += 1
+        next_data = min(next_data, time.perf_counter() - start)
+    return {
+        "feed_construct": {"seconds": construct, "ops": 1},
+        "feed_next_data": {"seconds": next_data, "ops": count},
+    }
+
+
+def bench_broker(bars: list[BarData], symbols: list[str], orders: int, repeat: int):
+    """Resting limits far from the market that never fill"""
+    now = datetime(2000, 1, 1)
+
+    def run() -> None:
+        broker = BacktestBroker()
+        for i in range(orders):
+            symbol = symbols[i % len(symbols)]
+            broker.post_order(Order(str(i), symbol, 1, OrderType.LIMIT, now, 1e-6))
+        for data in bars:
+            broker.on_data(data)
+            broker.pop_latest()
+
+    return {"broker_on_data": {"seconds": timed(run, repeat), "ops": len(bars)}}
+
+
+def bench_portfolio(bars: list[BarData], symbols: list[str], repeat: int):
+    def run_data() -> None:
+        portfolio = Portfolio(1e9)
+        for symbol in symbols:
+            portfolio.on_fill(symbol, 1.0, 10)
+        for data in bars:
+            portfolio.on_data(data)
+
+    def run_fill() -> None:
+        portfolio = Portfolio(1e9)
+        portfolio.on_data(bars[0])
+        # Alternate passes over the universe opening and closing positions
+        for i in range(fills):
+            qty = -1 if (i // len(symbols)) % 2 else 1
+            portfolio.on_fill(symbols[i % len(symbols)], 1.0, qty)
+
+    fills = 100_000
+    return {
+        "portfolio_on_data": {"seconds": timed(run_data, repeat), "ops": len(bars)},
+        "portfolio_on_fill": {"seconds": timed(run_fill, repeat), "ops": fills},
+    }
+
+
+def bench_engine(path: Path, symbols: list[str], bars: int, repeat: int):
+    def run() -> None:
+        engine = Engine(FileFeed(path), BacktestBroker(), Rebalance(symbols), 1e9)
+        engine.run()
+
+    return {"engine_run": {"seconds": timed(run, repeat), "ops": bars}}
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(before: dict, after: dict) -> None:
+    print(f"{'benchmark':<20}{'before':>14}{'after':>14}{'change':>10}")
+    for name, result in after["results"].items():
+        old = before["results"].get(name)
+        if old is None:
+            continue
+        change = result["ops_per_sec"] / old["ops_per_sec"] - 1
+        print(
+            f"{name:<20}{old['ops_per_sec']:>14,.0f}"
+            f"{result['ops_per_sec']:>14,.0f}{change:>10.1%}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--years", type=float, default=5)
+    parser.add_argument("--orders", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("-o", "--output", type=Path, help="Write results here")
+    parser.add_argument("--compare", type=Path, help="Results of an earlier run")
+    args = parser.parse_args()
+
+    symbols = symbol_names(args.symbols)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bars.csv"
+        rows = len(write_bars(path, args.symbols, args.years, args.seed))
+        results = bench_feed(path, symbols, args.repeat)
+        bars = replay(path, symbols)
+        results |= bench_broker(bars, symbols, args.orders, args.repeat)
+        results |= bench_portfolio(bars, symbols, args.repeat)
+        results |= bench_engine(path, symbols, len(bars), args.repeat)
+
+    for result in results.values():
+        result["ops_per_sec"] = result["ops"] / result["seconds"]
+    run = {
+        "commit": commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "config": {
+            "symbols": args.symbols,
+            "years": args.years,
+            "orders": args.orders,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "rows": rows,
+        },
+        "results": results,
+    }
+    text = json.dumps(run, indent=2)
+    if args.output:
+        args.output.write_text(text)
+    print(text)
+    if args.compare:
+        compare(json.loads(args.compare.read_text()), run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Allocation and memory cost of the per-bar and per-fill records.
+
+Compares the original ``__dict__`` based layouts against the slotted classes in
+``systrade`` (and a slotted, frozen ``Bar`` for reference) when creating 1M
+instances. Run with ``python benchmarks/bench_objects.py``.
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional
+
+import numpy as np
+
+from systrade.data import Bar, ExecutionReport, Order, OrderType
+from systrade.position import Position
+
+N = 1_000_000
+
+
+@dataclass(init=True, repr=True, eq=True)
+class DictBar:
+    open: float = np.nan
+    high: float = np.nan
+    low: float = np.nan
+    close: float = np.nan
+    volume: float = np.nan
+
+
+@dataclass(init=True, repr=True, eq=True, slots=True, frozen=True)
+class FrozenBar:
+    open: float = np.nan
+    high: float = np.nan
+    low: float = np.nan
+    close: float = np.nan
+    volume: float = np.nan
+
+
+@dataclass(init=True, repr=True, eq=True)
+class DictOrder:
+    id: str
+    symbol: str
+    quantity: float
+    type: OrderType
+    submit_time: datetime
+    price: Optional[float] = None
+
+
+@dataclass(init=True, repr=True, eq=True)
+class DictExecutionReport:
+    order: DictOrder
+    last_price: float
+    last_quantity: float
+    cum_quantity: float
+    rem_quantity: float
+    fill_timestamp: datetime
+
+
+class DictPosition:
+    def __init__(self, symbol: str, qty: float) -> None:
+        self.symbol = symbol
+        self.qty = qty
+
+
+def measure(make: Callable[[int], object]) -> tuple[float, float, float]:
+    """Seconds, allocated blocks and traced bytes per instance for N instances"""
+    gc.collect()
+    blocks = sys.getallocatedblocks()
+    start = time.perf_counter()
+    items = [make(i) for i in range(N)]
+    elapsed = time.perf_counter() - start
+    blocks = sys.getallocatedblocks() - blocks
+    del items
+    gc.collect()
+    tracemalloc.start()
+    items = [make(i) for i in range(N)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return elapsed, blocks / N, size / N
+
+
+def main() -> None:
+    now = datetime(2025, 1, 1)
+    order = Order("1", "ABC", 1.0, OrderType.MARKET, now)
+    dict_order = DictOrder("1", "ABC", 1.0, OrderType.MARKET, now)
+    cases = [
+        ("Bar", lambda i: DictBar(1.0, 2.0, 0.5, 1.5, float(i))),
+        ("Bar", lambda i: Bar(1.0, 2.0, 0.5, 1.5, float(i))),
+        ("Bar", lambda i: FrozenBar(1.0, 2.0, 0.5, 1.5, float(i))),
+        ("Order", lambda i: DictOrder(str(i), "ABC", 1.0, OrderType.MARKET, now)),
+        ("Order", lambda i: Order(str(i), "ABC", 1.0, OrderType.MARKET, now)),
+        (
+            "ExecutionReport",
+            lambda i: DictExecutionReport(dict_order, 1.0, float(i), 1.0, 0.0, now),
+        ),
+        (
+            "ExecutionReport",
+            lambda i: ExecutionReport(order, 1.0, float(i), 1.0, 0.0, now),
+        ),
+        ("Position", lambda i: DictPosition("ABC", float(i))),
+        ("Position", lambda i: Position("ABC", float(i))),
+    ]
+    layouts = ["dict", "slots", "frozen slots"]
+    print(
+        f"{'record':<16}{'layout':<14}{'ns/obj':>10}{'blocks/obj':>12}{'bytes/obj':>11}"
+    )
+    seen = dict[str, int]()
+    for name, make in cases:
+        layout = layouts[seen.get(name, 0)]
+        seen[name] = seen.get(name, 0) + 1
+        elapsed, blocks, size = measure(make)
+        print(
+            f"{name:<16}{layout:<14}{elapsed / N * 1e9:>10.0f}"
+            f"{blocks:>12.2f}{size:>11.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
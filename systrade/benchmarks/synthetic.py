@@ -0,0 +1,88 @@
+"""Synthetic OHLCV data in the feed CSV layout.
+
+Each symbol follows a geometric random walk over business days. Files are
+written symbol by symbol like the history files. Run with
+``python benchmarks/synthetic.py out.csv --symbols 100 --years 10``.
+"""
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = [
+    "Date",
+    "Open",
+    "High",
+    "Low",
+    "Close",
+    "Volume",
+    "Dividends",
+    "Stock Splits",
+    "Symbol",
+]
+
+
+def symbol_names(count: int) -> list[str]:
+    return [f"S{i:04d}" for i in range(count)]
+
+
+def generate_bars(
+    symbols: int, years: float, seed: int = 0, start: str = "2000-01-03"
+) -> pd.DataFrame:
+    """Random walk bars for symbols over roughly years of business days"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start, periods=int(years * 252))
+    n = len(dates)
+    stamps = dates.strftime("%Y-%m-%d 00:00:00-05:00")
+    frames = []
+    for symbol in symbol_names(symbols):
+        returns = rng.normal(0.0003, 0.02, n)
+        close = rng.uniform(10, 200) * np.exp(np.cumsum(returns))
+        open_ = np.empty(n)
+        open_[0] = close[0]
+        open_[1:] = close[:-1] * np.exp(rng.normal(0, 0.005, n - 1))
+        high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.01, n))
+        low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.01, n))
+        volume = np.round(rng.lognormal(13, 0.5, n))
+        frames.append(
+            pd.DataFrame(
+                {
+                    "Date": stamps,
+                    "Open": open_,
+                    "High": high,
+                    "Low": low,
+                    "Close": close,
+                    "Volume": volume,
+                    "Dividends": 0.0,
+                    "Stock Splits": 0.0,
+                    "Symbol": symbol,
+                }
+            )
+        )
+    return pd.concat(frames, ignore_index=True)[COLUMNS]
+
+
+def write_bars(
+    path: str | Path, symbols: int, years: float, seed: int = 0
+) -> pd.DataFrame:
+    """Write random walk bars to a CSV file, returns the written frame"""
+    df = generate_bars(symbols, years, seed)
+    df.to_csv(path, index=False)
+    return df
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--years", type=float, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    df = write_bars(args.path, args.symbols, args.years, args.seed)
+    print(f"Wrote {len(df)} bars to {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,119 @@
+from systrade.aio import (
+    AsyncBroker,
+    AsyncEngine,
+    AsyncFeed,
+    LocalBroker,
+    LocalFeed,
+    SimulatedMarket,
+)
+from systrade.analytics import Tearsheet, tearsheet
 from systrade.broker import BacktestBroker, Broker
-from systrade.data import Bar, BarData, ExecutionReport, Order
-from systrade.engine import Engine
-from systrade.feed import Feed, FileFeed
+from systrade.costs import Commission, CompositeCost, CostModel, Spread, VolumeSlippage
+from systrade.data import (
+    ArrayBarData,
+    Bar,
+    BarData,
+    BarView,
+    CorporateAction,
+    ExecutionReport,
+    Order,
+    SymbolIndex,
+)
+from systrade.engine import Engine, MultiEngine
+from systrade.feed import (
+    Feed,
+    FileFeed,
+    MmapFeed,
+    PartitionedFeed,
+    StoreFeed,
+    StreamingFileFeed,
+)
+from systrade.indicators import (
+    ATR,
+    EMA,
+    SMA,
+    Indicator,
+    RingBuffer,
+    RollingIndicator,
+    RollingMax,
+    RollingMin,
+    RollingStd,
+)
+from systrade.portfolio import Calendar, RecordMode
+from systrade.profiling import Profiler, ProfileReport, Stage, StageProfile
+from systrade.store import BarStore, convert_csv
 from systrade.strategy import Strategy
+from systrade.sweep import RunSummary, parameter_grid, sweep
+from systrade.universe import (
+    DollarVolume,
+    Factor,
+    Momentum,
+    RankedStrategy,
+    Ranker,
+    Ranking,
+)
+from systrade.vectorized import PriceMatrix, VectorizedEngine, VectorizedStrategy
 
 __all__ = [
+    "AsyncBroker",
+    "AsyncEngine",
+    "AsyncFeed",
+    "LocalBroker",
+    "LocalFeed",
+    "SimulatedMarket",
+    "Tearsheet",
+    "tearsheet",
     "BacktestBroker",
     "Broker",
+    "Commission",
+    "CompositeCost",
+    "CostModel",
+    "Spread",
+    "VolumeSlippage",
     "Bar",
     "BarData",
+    "ArrayBarData",
+    "BarView",
+    "SymbolIndex",
+    "CorporateAction",
     "ExecutionReport",
     "Order",
     "Engine",
+    "MultiEngine",
     "Feed",
     "FileFeed",
+    "MmapFeed",
+    "PartitionedFeed",
+    "StoreFeed",
+    "StreamingFileFeed",
+    "ATR",
+    "EMA",
+    "SMA",
+    "Indicator",
+    "RingBuffer",
+    "RollingIndicator",
+    "RollingMax",
+    "RollingMin",
+    "RollingStd",
+    "Calendar",
+    "RecordMode",
+    "Profiler",
+    "ProfileReport",
+    "Stage",
+    "StageProfile",
+    "BarStore",
+    "convert_csv",
     "Strategy",
+    "RunSummary",
+    "parameter_grid",
+    "sweep",
+    "DollarVolume",
+    "Factor",
+    "Momentum",
+    "RankedStrategy",
+    "Ranker",
+    "Ranking",
+    "PriceMatrix",
+    "VectorizedEngine",
+    "VectorizedStrategy",
 ]
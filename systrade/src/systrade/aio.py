@@ -0,0 +1,294 @@
+import asyncio
+from abc import ABC, abstractmethod
+from datetime import datetime as dt
+from datetime import timedelta
+from typing import Iterable, Optional, override
+
+import numpy as np
+
+from systrade.broker import BacktestBroker, Broker
+from systrade.data import ArrayBarData, BarData, ExecutionReport, Order
+from systrade.engine import _close_bar, _fill, _open_bar
+from systrade.feed import StoreSubscriptions
+from systrade.portfolio import Calendar, Portfolio, PortfolioView, RecordMode
+from systrade.store import BarStore
+from systrade.strategy import Strategy
+
+
+class AsyncFeed(ABC):
+    """Feed whose data arrives asynchronously, e.g. over a network connection"""
+
+    @abstractmethod
+    async def start(self) -> None:
+        """Start streaming"""
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """Stop streaming"""
+
+    @abstractmethod
+    def is_running(self) -> bool:
+        """Whether feed is currently running"""
+
+    @abstractmethod
+    def subscribe(self, symbol: str) -> None:
+        """Subscribe to a symbol"""
+
+    def subscribe_many(self, symbols: Iterable[str]) -> None:
+        """Subscribe to several symbols, raising like ``subscribe`` for any
+        that are unknown or already subscribed to"""
+        for symbol in symbols:
+            self.subscribe(symbol)
+
+    def subscribe_all(self) -> None:
+        """Subscribe to every symbol with data that isn't subscribed to yet,
+        for feeds that know their symbols up front"""
+        raise NotImplementedError(f"{type(self).__name__} can't list its symbols")
+
+    @abstractmethod
+    async def next_data(self) -> Optional[BarData]:
+        """Wait for the next available data for subscribed symbols, None once
+        the feed has ended"""
+
+
+class AsyncBroker(ABC):
+    """Broker reached asynchronously, e.g. over a network connection"""
+
+    @abstractmethod
+    async def on_data(self, data: BarData) -> None:
+        """Process market data"""
+
+    @abstractmethod
+    async def post_order(self, order: Order) -> None:
+        """Post an order to the broker"""
+
+    @abstractmethod
+    async def pop_latest(self) -> list[ExecutionReport]:
+        """Pop latest execution reports, will return an empty list if none"""
+
+
+class SimulatedMarket:
+    """In-process market replaying a ``BarStore`` to any number of feeds.
+
+    Each time period is published once, as a single (symbol x OHLCV) array
+    shared by every feed, and feeds pick out their subscribed symbols when they
+    consume it. Feed queues are bounded so the market runs at the pace of its
+    slowest consumer.
+    """
+
+    def __init__(
+        self,
+        store: BarStore,
+        start: Optional[dt] = None,
+        end: Optional[dt] = None,
+        interval: float = 0.0,
+        maxsize: int = 64,
+    ) -> None:
+        """Simulated market initializer
+
+        Parameters
+        ----------
+        store
+            Bars to replay
+        start, optional
+            First date of the replay, defaults to the beginning of the store
+        end, optional
+            Last date (inclusive) of the replay, defaults to the end of the store
+        interval, optional
+            Seconds to wait between time periods
+        maxsize, optional
+            Time periods each feed may buffer before the market waits for it
+        """
+        self._store = store
+        self._begin = store.search(start) if start else 0
+        self._end = store.search(end + timedelta(days=1)) if end else len(store)
+        self._interval = interval
+        self._maxsize = maxsize
+        self._queues = list[asyncio.Queue]()
+
+    @property
+    def store(self) -> BarStore:
+        return self._store
+
+    def feed(self) -> "LocalFeed":
+        """Create a feed of this market. Feeds only receive time periods
+        published after they were created."""
+        queue = asyncio.Queue[Optional[tuple[dt, np.ndarray]]](self._maxsize)
+        self._queues.append(queue)
+        return LocalFeed(self._store, queue)
+
+    async def run(self) -> None:
+        """Publish every time period to the feeds, then signal the end"""
+        ids = np.arange(len(self._store.symbols), dtype=np.int32)
+        for i in range(self._begin, self._end):
+            period = (self._store.datetime_at(i), self._store.values_at(i, ids))
+            for queue in self._queues:
+                await queue.put(period)
+            if self._interval:
+                await asyncio.sleep(self._interval)
+        for queue in self._queues:
+            await queue.put(None)
+
+
+class LocalFeed(AsyncFeed):
+    """Feed of a ``SimulatedMarket``, create one with ``SimulatedMarket.feed``"""
+
+    def __init__(
+        self, store: BarStore, queue: asyncio.Queue[Optional[tuple[dt, np.ndarray]]]
+    ) -> None:
+        self._store = store
+        self._queue = queue
+        self._subscriptions = StoreSubscriptions(store)
+        self._running = False
+
+    @override
+    async def start(self) -> None:
+        self._running = True
+
+    @override
+    async def stop(self) -> None:
+        self._running = False
+
+    @override
+    def is_running(self) -> bool:
+        return self._running
+
+    @override
+    def subscribe(self, symbol: str) -> None:
+        self.subscribe_many((symbol,))
+
+    @override
+    def subscribe_many(self, symbols: Iterable[str]) -> None:
+        self._subscriptions.add(symbols)
+
+    @override
+    def subscribe_all(self) -> None:
+        self._subscriptions.add_all()
+
+    @override
+    async def next_data(self) -> Optional[BarData]:
+        period = await self._queue.get()
+        if period is None:
+            self._running = False
+            return None
+        as_of, values = period
+        # Subscribed symbols without a bar this period are reported as NaN
+        subscriptions = self._subscriptions
+        return ArrayBarData(subscriptions.index, values[subscriptions.ids], as_of=as_of)
+
+
+class LocalBroker(AsyncBroker):
+    """Runs a synchronous broker in process, optionally with simulated round
+    trip latency on each request"""
+
+    def __init__(self, broker: Optional[Broker] = None, latency: float = 0.0) -> None:
+        """Local broker initializer
+
+        Parameters
+        ----------
+        broker, optional
+            Broker doing the matching, a ``BacktestBroker`` by default
+        latency, optional
+            Seconds each order submission takes
+        """
+        self._broker = broker if broker is not None else BacktestBroker()
+        self._latency = latency
+
+    @override
+    async def on_data(self, data: BarData) -> None:
+        self._broker.on_data(data)
+
+    @override
+    async def post_order(self, order: Order) -> None:
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        self._broker.post_order(order)
+
+    @override
+    async def pop_latest(self) -> list[ExecutionReport]:
+        return self._broker.pop_latest()
+
+
+class AsyncEngine:
+    """Orchestrator for the different components on an asyncio event loop.
+    Strategies stay synchronous, orders they post during a callback are sent
+    to the broker once it returns. Run many engines concurrently with
+    ``asyncio.gather``."""
+
+    def __init__(
+        self,
+        feed: AsyncFeed,
+        broker: AsyncBroker,
+        strategy: Strategy,
+        cash: float,
+        record_mode: RecordMode = RecordMode.FULL,
+        sample_every: int = 1,
+        sample_on: Optional[Calendar] = None,
+    ) -> None:
+        """Async engine initializer
+
+        Parameters
+        ----------
+        feed
+            Source of market data
+        broker
+            Where orders get filled
+        strategy
+            Strategy to run
+        cash
+            Starting cash of the portfolio
+        record_mode, optional
+            How much portfolio activity to record
+        sample_every, optional
+            Only record portfolio activity every n-th bar
+        sample_on, optional
+            Only record portfolio activity on the first bar of each calendar
+            period
+        """
+        self._feed = feed
+        self._broker = broker
+        self._strategy = strategy
+        self._outbox = list[Order]()
+        self._portfolio = Portfolio(
+            cash,
+            record_mode=record_mode,
+            sample_every=sample_every,
+            sample_on=sample_on,
+        )
+
+    async def run(self) -> None:
+        """Run the strategy until the feed ends"""
+        self._strategy.setup_context(
+            self._feed.subscribe,
+            self._outbox.append,
+            self._portfolio,
+            subscribe_many_hook=self._feed.subscribe_many,
+            subscribe_all_hook=self._feed.subscribe_all,
+        )
+
+        await self._feed.start()
+        self._strategy.on_start()
+        await self._send_orders()
+        while self._feed.is_running():
+            data = await self._feed.next_data()
+            if data is None:
+                break
+            _open_bar(self._portfolio, self._strategy, data)
+            # Same ordering as Engine, the broker sees the data first
+            await self._broker.on_data(data)
+            exec_reports = await self._broker.pop_latest()
+            _fill(self._portfolio, self._strategy, exec_reports)
+            _close_bar(self._portfolio, self._strategy, data)
+            await self._send_orders()
+
+    async def _send_orders(self) -> None:
+        if not self._outbox:
+            return
+        orders = self._outbox.copy()
+        self._outbox.clear()
+        for order in orders:
+            await self._broker.post_order(order)
+
+    @property
+    def portfolio(self) -> PortfolioView:
+        return self._portfolio
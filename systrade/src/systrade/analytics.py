@@ -0,0 +1,142 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+from systrade.recorder import ActivityRecorder
+
+
+@dataclass(init=True, repr=True, eq=True)
+class Tearsheet:
+    """Risk and performance metrics of an equity curve. Metrics are floats for
+    a single curve and arrays with one entry per curve for a batch."""
+
+    total_return: float | np.ndarray
+    # Compound annual growth rate
+    annual_return: float | np.ndarray
+    # Annualized standard deviation of period returns
+    volatility: float | np.ndarray
+    sharpe: float | np.ndarray
+    sortino: float | np.ndarray
+    # Largest fall from a running peak, as a positive fraction of the peak
+    max_drawdown: float | np.ndarray
+    # Most periods spent below a previous peak
+    max_drawdown_duration: int | np.ndarray
+    # Traded value per year as a multiple of the average value, NaN if the
+    # traded value isn't known
+    turnover: float | np.ndarray
+    # Average gross position value as a fraction of the portfolio value, NaN
+    # if it isn't known
+    exposure: float | np.ndarray
+
+
+def tearsheet(
+    values: np.ndarray,
+    gross: Optional[np.ndarray] = None,
+    traded: Optional[np.ndarray] = None,
+    periods_per_year: float = 252,
+    risk_free: float = 0.0,
+) -> Tearsheet:
+    """Metrics of one equity curve, or of a batch of curves stacked as the
+    rows of a 2-D array (e.g. sweep runs over the same bars). Everything is
+    computed with whole array operations along the last axis.
+
+    Parameters
+    ----------
+    values
+        Portfolio value at each period, shape (periods,) or (runs, periods)
+    gross, optional
+        Gross value of the positions at each period, same shape as values
+    traded, optional
+        Value traded going into each period, same shape as values
+    periods_per_year, optional
+        Number of periods in a year, used to annualize
+    risk_free, optional
+        Annual risk free rate that Sharpe and Sortino ratios are in excess of
+    """
+    values = np.asarray(values, dtype=float)
+    if values.ndim not in (1, 2):
+        raise ValueError("values must be 1-D or 2-D")
+    n = values.shape[-1]
+    if n < 2:
+        raise ValueError("Need at least two values")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns = values[..., 1:] / values[..., :-1] - 1
+        total = values[..., -1] / values[..., 0] - 1
+        years = (n - 1) / periods_per_year
+        annual = (1 + total) ** (1 / years) - 1
+
+        excess = returns - ((1 + risk_free) ** (1 / periods_per_year) - 1)
+        mean = excess.mean(axis=-1)
+        std = returns.std(axis=-1, ddof=1) if n > 2 else np.zeros_like(total)
+        downside = np.sqrt(np.mean(np.minimum(excess, 0) ** 2, axis=-1))
+        scale = np.sqrt(periods_per_year)
+        sharpe = np.where(std > 0, mean / std * scale, np.nan)
+        sortino = np.where(downside > 0, mean / downside * scale, np.nan)
+
+        peaks = np.maximum.accumulate(values, axis=-1)
+        drawdown = 1 - (values / peaks).min(axis=-1)
+        # Periods since the curve was last at its peak
+        periods = np.arange(n)
+        at_peak = np.where(values >= peaks, periods, 0)
+        underwater = periods - np.maximum.accumulate(at_peak, axis=-1)
+
+        exposure = np.full_like(total, np.nan)
+        if gross is not None:
+            exposure = (np.asarray(gross, dtype=float) / values).mean(axis=-1)
+        turnover = np.full_like(total, np.nan)
+        if traded is not None:
+            traded = np.asarray(traded, dtype=float).sum(axis=-1)
+            turnover = traded / values.mean(axis=-1) / years
+
+    sheet = Tearsheet(
+        total_return=total,
+        annual_return=annual,
+        volatility=std * scale,
+        sharpe=sharpe,
+        sortino=sortino,
+        max_drawdown=drawdown,
+        max_drawdown_duration=underwater.max(axis=-1),
+        turnover=turnover,
+        exposure=exposure,
+    )
+    if values.ndim == 1:
+        sheet = Tearsheet(**{k: v.item() for k, v in sheet.__dict__.items()})
+    return sheet
+
+
+def gross_exposure(recorder: ActivityRecorder) -> np.ndarray:
+    """Gross value of the positions held at each recorded period"""
+    period, _, quantity, price = recorder.positions()
+    weights = np.abs(quantity * price)
+    return np.bincount(period, weights=weights, minlength=len(recorder))
+
+
+def traded_value(recorder: ActivityRecorder) -> np.ndarray:
+    """Value traded between each recorded period and the one before, from
+    changes in the positions held. Positions the first period starts with
+    count as traded, closed positions are valued at their last price."""
+    n = len(recorder)
+    period, code, quantity, price = recorder.positions()
+    # Entries are grouped by period, line each symbol's entries up instead
+    order = np.lexsort((period, code))
+    period, code = period[order], code[order]
+    quantity, price = quantity[order], price[order]
+    same = np.zeros(len(order), dtype=bool)
+    same[1:] = (code[1:] == code[:-1]) & (period[1:] == period[:-1] + 1)
+    previous = np.zeros(len(order))
+    previous[1:] = quantity[:-1]
+    previous[~same] = 0
+    traded = np.bincount(
+        period, weights=np.abs(quantity - previous) * price, minlength=n
+    )
+    # Positions missing from the next period were closed going into it
+    closed = np.ones(len(order), dtype=bool)
+    closed[:-1] = ~same[1:]
+    closed &= period < n - 1
+    traded += np.bincount(
+        period[closed] + 1,
+        weights=np.abs(quantity[closed] * price[closed]),
+        minlength=n,
+    )
+    return traded
@@ -1,8 +1,13 @@
+import heapq
+import math
 from abc import ABC, abstractmethod
-from collections import defaultdict
-from typing import override
+from collections import deque
+from typing import Optional, override
 
-from systrade.data import BarData, ExecutionReport, Order
+import numpy as np
+
+from systrade.costs import CostModel
+from systrade.data import Bar, BarData, ExecutionReport, Order, OrderType
 
 
 class Broker(ABC):
@@ -16,46 +21,274 @@ class Broker(ABC):
 
     @abstractmethod
     def pop_latest(self) -> list[ExecutionReport]:
-        """Pop latest execution reports, will return an empty list if none"""
+        """Pop latest execution reports, will return an empty list if none. The
+        list may be reused by the broker, it is only valid until the next call
+        to ``on_data`` or ``pop_latest``."""
 
 
-class BacktestBroker(Broker):
-    """A test broker to simulate order communication"""
+class _Resting:
+    """An open order along with how much of it is left to fill"""
+
+    __slots__ = ("order", "remaining", "filled")
+
+    def __init__(self, order: Order) -> None:
+        self.order = order
+        self.remaining = order.quantity
+        self.filled = 0.0
+
+
+class _OrderBook:
+    """Resting orders for a single symbol.
+
+    Market orders (including triggered stops) queue in arrival order. Limit and
+    stop orders sit in heaps keyed so the order that would trade first is on
+    top, ties going to the earliest order, so matching a bar only looks at
+    orders that actually cross.
+    """
 
     def __init__(self) -> None:
-        self._orders = defaultdict[str, list[Order]](lambda: [])
+        self.market = deque[tuple[_Resting, Optional[float]]]()
+        # Entries are (key, sequence, resting order)
+        self.buy_limits = list[tuple[float, int, _Resting]]()
+        self.sell_limits = list[tuple[float, int, _Resting]]()
+        self.buy_stops = list[tuple[float, int, _Resting]]()
+        self.sell_stops = list[tuple[float, int, _Resting]]()
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.market
+            or self.buy_limits
+            or self.sell_limits
+            or self.buy_stops
+            or self.sell_stops
+        )
+
+    def add(self, resting: _Resting, sequence: int) -> None:
+        order = resting.order
+        buy = order.quantity > 0
+        if order.type == OrderType.MARKET:
+            self.market.append((resting, None))
+        elif order.price is None:
+            raise ValueError(f"{order.type.name} order {order.id} needs a price")
+        elif order.type == OrderType.LIMIT:
+            if buy:
+                heapq.heappush(self.buy_limits, (-order.price, sequence, resting))
+            else:
+                heapq.heappush(self.sell_limits, (order.price, sequence, resting))
+        elif order.type == OrderType.STOP:
+            if buy:
+                heapq.heappush(self.buy_stops, (order.price, sequence, resting))
+            else:
+                heapq.heappush(self.sell_stops, (-order.price, sequence, resting))
+        else:
+            raise ValueError(f"Unsupported order type {order.type}")
+
+    def split(self, ratio: float) -> None:
+        """Adjust resting orders to a split of ratio new shares per old share.
+        Prices all scale the same way so the heaps stay in order."""
+        self.market = deque(
+            (resting, None if price is None else price / ratio)
+            for resting, price in self.market
+        )
+        for resting, _ in self.market:
+            self._split(resting, ratio)
+        for heap in (
+            self.buy_limits,
+            self.sell_limits,
+            self.buy_stops,
+            self.sell_stops,
+        ):
+            heap[:] = [(key / ratio, seq, resting) for key, seq, resting in heap]
+            for _, _, resting in heap:
+                self._split(resting, ratio)
+
+    @staticmethod
+    def _split(resting: _Resting, ratio: float) -> None:
+        order = resting.order
+        order.quantity *= ratio
+        if order.price is not None:
+            order.price /= ratio
+        resting.remaining *= ratio
+        resting.filled *= ratio
+
+
+class BacktestBroker(Broker):
+    """A test broker to simulate order communication.
+
+    Orders posted on a bar are matched against the following bars. Market
+    orders fill at the open. Buy (sell) limits fill once the low (high) reaches
+    the limit, at the open if it gapped through. Buy (sell) stops become market
+    orders once the high (low) reaches the stop and fill at the stop, or at the
+    open if it gapped through.
+
+    Splits reported in ``BarData.actions`` adjust resting orders of the symbol
+    before the bar is matched: quantities scale by the split and limit and
+    stop prices are divided by it.
+
+    With a participation rate, fills per symbol and bar are capped at that
+    fraction of the bar's volume, and orders fill partially over several bars.
+    With a cost model, each fill reports its trading costs in
+    ``ExecutionReport.fee``.
+    """
+
+    def __init__(
+        self,
+        participation: Optional[float] = None,
+        costs: Optional[CostModel] = None,
+    ) -> None:
+        """Backtest broker initializer
+
+        Parameters
+        ----------
+        participation, optional
+            Fraction of each bar's volume available to fill orders, unlimited
+            by default
+        costs, optional
+            Prices the fills of each bar, free by default
+        """
+        if participation is not None and participation <= 0:
+            raise ValueError("participation must be positive")
+        self._participation = participation
+        self._costs = costs
+        self._books = dict[str, _OrderBook]()
+        self._sequence = 0
+        # Reports are handed over by swapping two buffers rather than copying
         self._exec_reports = list[ExecutionReport]()
+        self._spare_reports = list[ExecutionReport]()
         self._last_data = BarData()
 
     @override
     def on_data(self, data: BarData) -> None:
         # We assume we trade at the close but won't be able to get filled until
-        # the open. Since we currently only support market orders, any orders
-        # posted will get filled right away.
+        # a later bar. Only symbols with open orders are looked at.
         self._last_data = data
-        for symbol, bar in data.bars():
-            open_orders = self._orders.get(symbol)
-            if open_orders:
-                for order in open_orders:
-                    fill = ExecutionReport(
-                        order=order,
-                        last_price=bar.open,
-                        last_quantity=order.quantity,
-                        cum_quantity=order.quantity,
-                        rem_quantity=0.0,
-                        fill_timestamp=data.as_of,
-                    )
-                    self._exec_reports.append(fill)
-                # All filled
-                open_orders.clear()
+        for action in data.actions:
+            book = self._books.get(action.symbol)
+            if book is not None and action.split > 0 and action.split != 1:
+                book.split(action.split)
+        filled = len(self._exec_reports)
+        for symbol in list(self._books):
+            bar = data.get(symbol)
+            # Array backed feeds report symbols without a bar as NaN, orders
+            # keep resting until there is one
+            if bar is None or math.isnan(bar.open):
+                continue
+            book = self._books[symbol]
+            self._match(book, bar, data)
+            if not book:
+                del self._books[symbol]
+        if self._costs is not None and len(self._exec_reports) > filled:
+            self._charge(self._exec_reports[filled:], data)
 
     @override
     def post_order(self, order: Order) -> None:
-        # Save order to get filled on the next bar
-        self._orders[order.symbol].append(order)
+        # Save order to get matched from the next bar on
+        book = self._books.get(order.symbol)
+        if book is None:
+            book = self._books[order.symbol] = _OrderBook()
+        book.add(_Resting(order), self._sequence)
+        self._sequence += 1
 
     @override
     def pop_latest(self) -> list[ExecutionReport]:
-        reports = self._exec_reports.copy()
-        self._exec_reports.clear()
+        reports = self._exec_reports
+        if not reports:
+            return reports
+        self._spare_reports.clear()
+        self._exec_reports = self._spare_reports
+        self._spare_reports = reports
         return reports
+
+    def open_orders(self, symbol: str) -> int:
+        """Number of orders still open for symbol"""
+        book = self._books.get(symbol)
+        if book is None:
+            return 0
+        return (
+            len(book.market)
+            + len(book.buy_limits)
+            + len(book.sell_limits)
+            + len(book.buy_stops)
+            + len(book.sell_stops)
+        )
+
+    def _charge(self, reports: list[ExecutionReport], data: BarData) -> None:
+        """Price all fills of a bar in one go"""
+        assert self._costs is not None
+        prices = np.fromiter((r.last_price for r in reports), dtype=float)
+        quantities = np.fromiter((r.last_quantity for r in reports), dtype=float)
+        volumes = np.fromiter(
+            (data[r.order.symbol].volume for r in reports), dtype=float
+        )
+        fees = self._costs.fees(prices, quantities, volumes)
+        for report, fee in zip(reports, fees.tolist()):
+            report.fee = fee
+
+    def _match(self, book: _OrderBook, bar: Bar, data: BarData) -> None:
+        if self._participation is None or math.isnan(bar.volume):
+            capacity = math.inf
+        else:
+            capacity = self._participation * bar.volume
+        # Stops reached during the bar join the market orders at their stop
+        for stops, triggered in (
+            (book.buy_stops, lambda stop: bar.open >= stop or bar.high >= stop),
+            (book.sell_stops, lambda stop: bar.open <= stop or bar.low <= stop),
+        ):
+            while stops and triggered(abs(stops[0][0])):
+                key, _, resting = heapq.heappop(stops)
+                stop = abs(key)
+                buy = resting.order.quantity > 0
+                price = max(bar.open, stop) if buy else min(bar.open, stop)
+                book.market.append((resting, price))
+        while book.market and capacity > 0:
+            resting, price = book.market[0]
+            capacity -= self._fill(
+                resting, bar.open if price is None else price, capacity, data
+            )
+            if resting.remaining:
+                # Triggered stops only get their stop price on the bar they
+                # trigger, the remainder is a plain market order
+                book.market[0] = (resting, None)
+                break
+            book.market.popleft()
+        for limits, crosses in (
+            (book.buy_limits, lambda limit: bar.open <= limit or bar.low <= limit),
+            (book.sell_limits, lambda limit: bar.open >= limit or bar.high >= limit),
+        ):
+            while limits and capacity > 0 and crosses(abs(limits[0][0])):
+                resting = limits[0][2]
+                limit = abs(limits[0][0])
+                buy = resting.order.quantity > 0
+                price = min(bar.open, limit) if buy else max(bar.open, limit)
+                capacity -= self._fill(resting, price, capacity, data)
+                if resting.remaining:
+                    break
+                heapq.heappop(limits)
+
+    def _fill(
+        self, resting: _Resting, price: float, capacity: float, data: BarData
+    ) -> float:
+        """Fill as much of an order as capacity allows, returning the absolute
+        quantity filled"""
+        quantity = min(abs(resting.remaining), capacity)
+        if quantity == abs(resting.remaining):
+            # Complete fills report exact totals without rounding residue, and
+            # take whatever makes the fills add up to them
+            last_quantity = resting.order.quantity - resting.filled
+            resting.filled = resting.order.quantity
+            resting.remaining = 0.0
+        else:
+            last_quantity = math.copysign(quantity, resting.order.quantity)
+            resting.filled += last_quantity
+            resting.remaining -= last_quantity
+        self._exec_reports.append(
+            ExecutionReport(
+                order=resting.order,
+                last_price=price,
+                last_quantity=last_quantity,
+                cum_quantity=resting.filled,
+                rem_quantity=resting.remaining,
+                fill_timestamp=data.as_of,
+            )
+        )
+        return quantity
@@ -0,0 +1,116 @@
+import io
+import os
+import pickle
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Optional
+
+from systrade.recorder import ActivityRecorder
+
+# Checkpoint layout: magic followed by a zlib compressed pickle of the state
+# and, separately, the activity recorders it refers to
+_MAGIC = b"SYSTCKP2"
+
+
+class _Pickler(pickle.Pickler):
+    """Pickles state except for activity recorders, which are frozen and set
+    aside so their history can be pickled off the caller's thread"""
+
+    def __init__(self, file: io.BytesIO) -> None:
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.recorders = list[ActivityRecorder]()
+
+    def persistent_id(self, obj: Any) -> Optional[int]:
+        if isinstance(obj, ActivityRecorder):
+            self.recorders.append(obj.frozen())
+            return len(self.recorders) - 1
+        return None
+
+
+class _Unpickler(pickle.Unpickler):
+    def __init__(self, file: io.BytesIO, recorders: list[ActivityRecorder]) -> None:
+        super().__init__(file)
+        self.recorders = recorders
+
+    def persistent_load(self, pid: Any) -> ActivityRecorder:
+        return self.recorders[pid]
+
+
+class Snapshot:
+    """Checkpoint state captured on the caller's thread so it is consistent.
+    Everything is pickled right away except recorder history, which grows with
+    the length of a run and is only serialized by ``dumps``."""
+
+    def __init__(self, state: dict[str, Any]) -> None:
+        buffer = io.BytesIO()
+        pickler = _Pickler(buffer)
+        pickler.dump(state)
+        self._state = buffer.getvalue()
+        self._recorders = pickler.recorders
+
+    def dumps(self) -> bytes:
+        """Serialize the checkpoint, safe to call from another thread"""
+        return pickle.dumps(
+            (self._state, self._recorders), protocol=pickle.HIGHEST_PROTOCOL
+        )
+
+
+def write(path: str | Path, payload: bytes) -> None:
+    """Compress and atomically write a serialized checkpoint, a crash midway
+    leaves the previous checkpoint in place"""
+    path = Path(path)
+    partial = path.with_name(path.name + ".partial")
+    with open(partial, "wb") as f:
+        f.write(_MAGIC)
+        f.write(zlib.compress(payload, 1))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+
+
+def load(path: str | Path) -> dict[str, Any]:
+    """Read a checkpoint written by ``write``"""
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[: len(_MAGIC)] != _MAGIC:
+        raise ValueError(f"{path} is not a checkpoint")
+    state, recorders = pickle.loads(zlib.decompress(data[len(_MAGIC) :]))
+    return _Unpickler(io.BytesIO(state), recorders).load()
+
+
+class CheckpointWriter:
+    """Serializes and writes checkpoints on a background thread. At most one
+    write is in flight, a new one waits for the previous to finish."""
+
+    def __init__(self, path: str | Path) -> None:
+        self._path = Path(path)
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def submit(self, snapshot: Snapshot) -> None:
+        """Start writing a snapshot"""
+        self.wait()
+        self._thread = threading.Thread(
+            target=self._write, args=(snapshot,), name="checkpoint", daemon=True
+        )
+        self._thread.start()
+
+    def wait(self) -> None:
+        """Wait for the write in flight, re-raising any error it hit"""
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _write(self, snapshot: Snapshot) -> None:
+        try:
+            write(self._path, snapshot.dumps())
+        except BaseException as error:
+            self._error = error
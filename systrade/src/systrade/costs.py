@@ -0,0 +1,129 @@
+from abc import ABC, abstractmethod
+from typing import override
+
+import numpy as np
+
+
+class CostModel(ABC):
+    """Trading costs charged on fills. Brokers price all fills of a bar with a
+    single call, so implementations should work on whole arrays."""
+
+    @abstractmethod
+    def fees(
+        self, prices: np.ndarray, quantities: np.ndarray, volumes: np.ndarray
+    ) -> np.ndarray:
+        """Cost of each fill as a positive amount of cash
+
+        Parameters
+        ----------
+        prices
+            Price of each fill
+        quantities
+            Signed quantity of each fill (negative for sells)
+        volumes
+            Volume of the bar each fill happened in, NaN if unknown
+        """
+
+
+class Commission(CostModel):
+    """Broker commission per share and/or as a fraction of the traded value,
+    with a minimum per fill"""
+
+    def __init__(
+        self, per_share: float = 0.0, rate: float = 0.0, minimum: float = 0.0
+    ) -> None:
+        """Commission initializer
+
+        Parameters
+        ----------
+        per_share, optional
+            Charge for each share traded
+        rate, optional
+            Charge as a fraction of the traded value
+        minimum, optional
+            Smallest charge for a fill
+        """
+        self.per_share = per_share
+        self.rate = rate
+        self.minimum = minimum
+
+    @override
+    def fees(
+        self, prices: np.ndarray, quantities: np.ndarray, volumes: np.ndarray
+    ) -> np.ndarray:
+        shares = np.abs(quantities)
+        charge = shares * (self.per_share + self.rate * prices)
+        return np.maximum(charge, self.minimum)
+
+
+class Spread(CostModel):
+    """Crossing the bid/ask spread, fills pay half of it relative to the price
+    they are recorded at"""
+
+    def __init__(self, spread: float) -> None:
+        """Spread initializer
+
+        Parameters
+        ----------
+        spread
+            Bid/ask spread as a fraction of the price, e.g. 0.001 for 10 basis
+            points
+        """
+        if spread < 0:
+            raise ValueError("spread can't be negative")
+        self.spread = spread
+
+    @override
+    def fees(
+        self, prices: np.ndarray, quantities: np.ndarray, volumes: np.ndarray
+    ) -> np.ndarray:
+        return np.abs(quantities) * prices * (self.spread / 2)
+
+
+class VolumeSlippage(CostModel):
+    """Market impact growing with the fraction of the bar's volume a fill
+    takes. Prices move against a fill by impact x participation^exponent, the
+    default exponent of 0.5 being the usual square root law. Fills in bars
+    without a known volume are charged as if they took all of it."""
+
+    def __init__(self, impact: float = 0.1, exponent: float = 0.5) -> None:
+        """Volume slippage initializer
+
+        Parameters
+        ----------
+        impact, optional
+            Price move, as a fraction of the price, of a fill taking a bar's
+            whole volume
+        exponent, optional
+            How the price move grows with participation
+        """
+        if impact < 0:
+            raise ValueError("impact can't be negative")
+        self.impact = impact
+        self.exponent = exponent
+
+    @override
+    def fees(
+        self, prices: np.ndarray, quantities: np.ndarray, volumes: np.ndarray
+    ) -> np.ndarray:
+        shares = np.abs(quantities)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            participation = np.where(volumes > 0, shares / volumes, 1.0)
+        participation = np.minimum(participation, 1.0)
+        return shares * prices * self.impact * participation**self.exponent
+
+
+class CompositeCost(CostModel):
+    """Sum of several cost models"""
+
+    def __init__(self, *models: CostModel) -> None:
+        self.models = models
+
+    @override
+    def fees(
+        self, prices: np.ndarray, quantities: np.ndarray, volumes: np.ndarray
+    ) -> np.ndarray:
+        total = np.zeros(len(prices))
+        for model in self.models:
+            total += model.fees(prices, quantities, volumes)
+        return total
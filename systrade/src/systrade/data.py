@@ -1,12 +1,12 @@
 from dataclasses import dataclass
 from datetime import datetime
 from enum import IntEnum
-from typing import Iterable, Optional
+from typing import Iterable, Optional, Sequence
 
 import numpy as np
 
 
-@dataclass(init=True, repr=True, eq=True)
+@dataclass(init=True, repr=True, eq=True, slots=True)
 class Bar:
     """An OHLCV event"""
 
@@ -17,12 +17,26 @@ class Bar:
     volume: float = np.nan
 
 
+@dataclass(init=True, repr=True, eq=True, slots=True)
+class CorporateAction:
+    """A dividend and/or split of a symbol going ex on a bar"""
+
+    symbol: str
+    # Cash paid per share held going into the bar
+    dividend: float = 0.0
+    # New shares per old share, e.g. 2 for a 2-for-1 split, 0 if none
+    split: float = 0.0
+
+
 class BarData:
     """Dictionary like container for a collection of bars at a current time period"""
 
     def __init__(self, as_of: Optional[datetime] = None) -> None:
         self._bars: dict[str, Bar] = {}
         self._as_of = as_of or datetime.min
+        # Corporate actions going ex at this time period, for feeds that
+        # report them
+        self.actions: Sequence[CorporateAction] = ()
 
     @property
     def as_of(self) -> datetime:
@@ -43,7 +57,9 @@ class BarData:
     def __eq__(self, value: object) -> bool:
         if not isinstance(value, BarData):
             return False
-        return self._bars == value._bars
+        if len(self) != len(value):
+            return False
+        return all(value.get(symbol) == bar for symbol, bar in self.bars())
 
     def get(self, key: str) -> Bar | None:
         return self._bars.get(key)
@@ -54,14 +70,194 @@ class BarData:
     def bars(self) -> Iterable[tuple[str, Bar]]:
         return self._bars.items()
 
+    def opens(self) -> np.ndarray:
+        """Opens of all bars in ``symbols()`` order"""
+        return np.fromiter((bar.open for bar in self._bars.values()), dtype=float)
+
+    def highs(self) -> np.ndarray:
+        """Highs of all bars in ``symbols()`` order"""
+        return np.fromiter((bar.high for bar in self._bars.values()), dtype=float)
+
+    def lows(self) -> np.ndarray:
+        """Lows of all bars in ``symbols()`` order"""
+        return np.fromiter((bar.low for bar in self._bars.values()), dtype=float)
+
+    def closes(self) -> np.ndarray:
+        """Closes of all bars in ``symbols()`` order"""
+        return np.fromiter((bar.close for bar in self._bars.values()), dtype=float)
+
+    def volumes(self) -> np.ndarray:
+        """Volumes of all bars in ``symbols()`` order"""
+        return np.fromiter((bar.volume for bar in self._bars.values()), dtype=float)
+
+
+class SymbolIndex:
+    """Symbol to column mapping shared by array backed bar data"""
+
+    def __init__(self, symbols: Sequence[str]) -> None:
+        self._symbols = list(symbols)
+        self._columns = {symbol: i for i, symbol in enumerate(self._symbols)}
+
+    @property
+    def symbols(self) -> list[str]:
+        return self._symbols
+
+    def __len__(self) -> int:
+        return len(self._symbols)
+
+    def __contains__(self, symbol: object) -> bool:
+        return symbol in self._columns
+
+    def __eq__(self, value: object) -> bool:
+        if not isinstance(value, SymbolIndex):
+            return False
+        return self._symbols == value._symbols
+
+    def get(self, symbol: str) -> int | None:
+        """Column of symbol, None if it isn't indexed"""
+        return self._columns.get(symbol)
+
+    def column(self, symbol: str) -> int:
+        """Column of symbol, raises KeyError if it isn't indexed"""
+        return self._columns[symbol]
+
+
+class BarView:
+    """A lightweight, read-only ``Bar`` over a row of an OHLCV array"""
+
+    __slots__ = ("_row",)
+
+    def __init__(self, row: np.ndarray) -> None:
+        self._row = row
+
+    @property
+    def open(self) -> float:
+        return self._row[0].item()
+
+    @property
+    def high(self) -> float:
+        return self._row[1].item()
+
+    @property
+    def low(self) -> float:
+        return self._row[2].item()
+
+    @property
+    def close(self) -> float:
+        return self._row[3].item()
+
+    @property
+    def volume(self) -> float:
+        return self._row[4].item()
+
+    def to_bar(self) -> Bar:
+        return Bar(*self._row.tolist())
+
+    def __eq__(self, value: object) -> bool:
+        if isinstance(value, BarView):
+            return self._row.tolist() == value._row.tolist()
+        if isinstance(value, Bar):
+            return self.to_bar() == value
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(self.to_bar())
+
+
+class ArrayBarData(BarData):
+    """Bar data for a fixed set of symbols held in a single (symbol x OHLCV)
+    array. Symbol lookups go through a ``SymbolIndex`` shared between periods,
+    bars are handed out as views of the array and whole cross sections are
+    available as vectors."""
+
+    def __init__(
+        self,
+        index: SymbolIndex,
+        values: np.ndarray,
+        as_of: Optional[datetime] = None,
+    ) -> None:
+        """Array bar data initializer
+
+        Parameters
+        ----------
+        index
+            Symbol of each row of values
+        values
+            Array of shape (len(index), 5) with open, high, low, close and
+            volume columns
+        as_of, optional
+            Time period of the bars
+        """
+        super().__init__(as_of)
+        if values.shape != (len(index), 5):
+            raise ValueError(f"Expected values of shape {(len(index), 5)}")
+        self._index = index
+        self._values = values
+
+    @property
+    def index(self) -> SymbolIndex:
+        return self._index
+
+    @property
+    def values(self) -> np.ndarray:
+        return self._values
+
+    def __getitem__(self, key: str) -> Bar:
+        return BarView(self._values[self._index.column(key)])  # type: ignore
+
+    def __setitem__(self, key: str, bar: Bar) -> None:
+        self._values[self._index.column(key)] = (
+            bar.open,
+            bar.high,
+            bar.low,
+            bar.close,
+            bar.volume,
+        )
+
+    def __repr__(self) -> str:
+        return repr(dict(self.bars()))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def get(self, key: str) -> Bar | None:
+        column = self._index.get(key)
+        if column is None:
+            return None
+        return BarView(self._values[column])  # type: ignore
+
+    def symbols(self) -> Iterable[str]:
+        return self._index.symbols
+
+    def bars(self) -> Iterable[tuple[str, Bar]]:
+        return zip(self._index.symbols, map(BarView, self._values))  # type: ignore
+
+    def opens(self) -> np.ndarray:
+        return self._values[:, 0]
+
+    def highs(self) -> np.ndarray:
+        return self._values[:, 1]
+
+    def lows(self) -> np.ndarray:
+        return self._values[:, 2]
+
+    def closes(self) -> np.ndarray:
+        return self._values[:, 3]
+
+    def volumes(self) -> np.ndarray:
+        return self._values[:, 4]
+
 
 class OrderType(IntEnum):
-    """The type of order. Currently on market orders are supported."""
+    """The type of order. Limit and stop orders carry their limit or stop level
+    in ``Order.price``."""
 
     MARKET = 1
+    LIMIT = 2
+    STOP = 3
 
 
-@dataclass(init=True, repr=True, eq=True)
+@dataclass(init=True, repr=True, eq=True, slots=True)
 class Order:
     """Information for a new order"""
 
@@ -73,7 +269,7 @@ class Order:
     price: Optional[float] = None
 
 
-@dataclass(init=True, repr=True, eq=True)
+@dataclass(init=True, repr=True, eq=True, slots=True)
 class ExecutionReport:
     """Information for an order fill"""
 
@@ -83,3 +279,5 @@ class ExecutionReport:
     cum_quantity: float
     rem_quantity: float
     fill_timestamp: datetime
+    # Trading costs charged on the fill
+    fee: float = 0.0
@@ -1,6 +1,13 @@
-from systrade.broker import Broker
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from systrade.broker import BacktestBroker, Broker
+from systrade.checkpoint import CheckpointWriter, Snapshot, load
+from systrade.data import BarData, ExecutionReport
 from systrade.feed import Feed
-from systrade.portfolio import Portfolio, PortfolioView
+from systrade.portfolio import Calendar, Portfolio, PortfolioView, RecordMode
+from systrade.profiling import Profiler, ProfileReport, Stage
 from systrade.strategy import Strategy
 
 
@@ -8,42 +15,342 @@ class Engine:
     """Orchestrator for the different components"""
 
     def __init__(
-        self, feed: Feed, broker: Broker, strategy: Strategy, cash: float
+        self,
+        feed: Feed,
+        broker: Broker,
+        strategy: Strategy,
+        cash: float,
+        record_mode: RecordMode = RecordMode.FULL,
+        sample_every: int = 1,
+        sample_on: Optional[Calendar] = None,
+        profiler: Optional[Profiler] = None,
+        checkpoint_path: Optional[str | Path] = None,
+        checkpoint_every: int = 1000,
     ) -> None:
+        """Engine initializer
+
+        Parameters
+        ----------
+        feed
+            Source of market data
+        broker
+            Where orders get filled
+        strategy
+            Strategy to run
+        cash
+            Starting cash of the portfolio
+        record_mode, optional
+            How much portfolio activity to record, cheaper modes skip building
+            per position records
+        sample_every, optional
+            Only record portfolio activity every n-th bar
+        sample_on, optional
+            Only record portfolio activity on the first bar of each calendar
+            period
+        profiler, optional
+            Times each stage of the loop when given. Profiled runs take a
+            separate loop so unprofiled runs pay nothing for it.
+        checkpoint_path, optional
+            Where to periodically snapshot the run so it can be picked back up
+            with ``resume``. The feed has to support checkpoints.
+        checkpoint_every, optional
+            Number of bars between snapshots
+        """
+        if checkpoint_every < 1:
+            raise ValueError("checkpoint_every must be at least 1")
+        # Fail now rather than at the first snapshot, after a run's worth of
+        # work
+        if checkpoint_path is not None and type(feed).checkpoint is Feed.checkpoint:
+            raise ValueError(f"{type(feed).__name__} can't be checkpointed")
         self._feed = feed
         self._broker = broker
         self._strategy = strategy
+        self._profiler = profiler
+        self._writer = (
+            CheckpointWriter(checkpoint_path) if checkpoint_path is not None else None
+        )
+        self._checkpoint_every = checkpoint_every
+        self._bars = 0
+        self._resume_from: Optional[dict] = None
         self._stop_flag = False
-        self._portfolio = Portfolio(cash)
+        self._portfolio = Portfolio(
+            cash,
+            record_mode=record_mode,
+            sample_every=sample_every,
+            sample_on=sample_on,
+        )
 
     def run(self) -> None:
         """Run the strategy"""
         self._strategy.setup_context(
-            self._feed.subscribe, self._broker.post_order, self._portfolio
+            self._feed.subscribe,
+            self._broker.post_order,
+            self._portfolio,
+            subscribe_many_hook=self._feed.subscribe_many,
+            subscribe_all_hook=self._feed.subscribe_all,
         )
 
         self._feed.start()
-        self._strategy.on_start()
+        if self._resume_from is not None:
+            # The strategy already started, pick up where the feed left off
+            self._feed.restore(self._resume_from)
+            self._resume_from = None
+        else:
+            self._strategy.on_start()
+        try:
+            if self._profiler is not None:
+                self._run_profiled(self._profiler)
+            else:
+                self._run()
+        finally:
+            if self._writer is not None:
+                self._writer.wait()
+
+    @classmethod
+    def resume(
+        cls,
+        path: str | Path,
+        feed: Feed,
+        profiler: Optional[Profiler] = None,
+        checkpoint_every: int = 1000,
+    ) -> "Engine":
+        """Engine picking a run back up from its latest checkpoint. The broker,
+        portfolio and strategy come from the checkpoint, the feed has to replay
+        the same data as the checkpointed run's. Checkpointing carries on to
+        the same path.
+
+        Parameters
+        ----------
+        path
+            Checkpoint written by an engine run
+        feed
+            Source of market data, it gets moved to where the run left off
+        profiler, optional
+            Times each stage of the remainder of the run
+        checkpoint_every, optional
+            Number of bars between snapshots
+        """
+        state = load(path)
+        engine = cls(
+            feed,
+            state["broker"],
+            state["strategy"],
+            0,
+            profiler=profiler,
+            checkpoint_path=path,
+            checkpoint_every=checkpoint_every,
+        )
+        engine._portfolio = state["portfolio"]
+        engine._bars = state["bars"]
+        engine._resume_from = state["feed"]
+        return engine
+
+    def _run(self) -> None:
+        checkpoints = self._writer is not None
         while self._feed.is_running():
             data = self._feed.next_data()
-            self._strategy.current_time = data.as_of
-            # Broker should get the data first in case an outstanding order has
-            # a fill. That way the strategy will have the most recent view of
-            # the portfolio.
-            self._broker.on_data(data)
-            exec_reports = self._broker.pop_latest()
-            # Update portfolio with fill information and notify strategy that
-            # fills have taken place.
-            for report in exec_reports:
-                self._portfolio.on_fill(
-                    report.order.symbol,
-                    price=report.last_price,
-                    qty=report.last_quantity,
-                )
-                self._strategy.on_execution(report)
-            self._portfolio.on_data(data)
-            self._strategy.on_data(data)
+            _step(self._broker, self._portfolio, self._strategy, data)
+            if checkpoints:
+                self._count_bar()
+
+    def _count_bar(self) -> None:
+        """Snapshot the run every checkpoint_every bars"""
+        assert self._writer is not None
+        self._bars += 1
+        if self._bars % self._checkpoint_every == 0:
+            self._writer.submit(Snapshot(self._state()))
+
+    def _state(self) -> dict[str, Any]:
+        """State of the run, captured on the loop's thread so it is
+        consistent"""
+        return {
+            "bars": self._bars,
+            "feed": self._feed.checkpoint(),
+            "broker": self._broker,
+            "portfolio": self._portfolio,
+            "strategy": self._strategy,
+        }
+
+    def _run_profiled(self, profiler: Profiler) -> None:
+        """Same loop as ``run`` with each stage timed"""
+        clock = time.perf_counter_ns
+        checkpoints = self._writer is not None
+        feed, broker, portfolio, strategy = (
+            self._feed,
+            self._broker,
+            self._portfolio,
+            self._strategy,
+        )
+        profiler.start()
+        while True:
+            # Feeds that read lazily do their reading in is_running, it counts
+            # as feed time
+            start = clock()
+            if not feed.is_running():
+                break
+            data = feed.next_data()
+            fed = clock()
+            _open_bar(portfolio, strategy, data)
+            broker.on_data(data)
+            exec_reports = broker.pop_latest()
+            brokered = clock()
+            if exec_reports:
+                _fill(portfolio, strategy, exec_reports)
+                filled = clock()
+                profiler.record(Stage.FILLS, filled - brokered)
+            else:
+                filled = brokered
+            portfolio.on_data(data)
+            valued = clock()
+            strategy.on_data(data)
+            done = clock()
+            profiler.record(Stage.FEED, fed - start)
+            profiler.record(Stage.BROKER, brokered - fed)
+            profiler.record(Stage.PORTFOLIO, valued - filled)
+            profiler.record(Stage.STRATEGY, done - valued)
+            profiler.record_bar()
+            if checkpoints:
+                self._count_bar()
+        profiler.stop()
 
     @property
     def portfolio(self) -> PortfolioView:
         return self._portfolio
+
+    @property
+    def profile(self) -> Optional[ProfileReport]:
+        """Stage timings of the run, None unless the engine has a profiler"""
+        if self._profiler is None:
+            return None
+        return self._profiler.report()
+
+
+class MultiEngine:
+    """Runs several strategies over a single pass of a feed. Each strategy has
+    its own broker and portfolio, and the feed is subscribed to the union of
+    the symbols they ask for, so every strategy sees the bars of all of them."""
+
+    def __init__(
+        self,
+        feed: Feed,
+        strategies: Sequence[tuple[Strategy, float]],
+        broker_factory: Callable[[], Broker] = BacktestBroker,
+        record_mode: RecordMode = RecordMode.FULL,
+        sample_every: int = 1,
+        sample_on: Optional[Calendar] = None,
+    ) -> None:
+        """Multi engine initializer
+
+        Parameters
+        ----------
+        feed
+            Source of market data shared by all strategies
+        strategies
+            Strategies to run along with the starting cash of each one's
+            portfolio
+        broker_factory, optional
+            Creates the broker of each strategy
+        record_mode, optional
+            How much portfolio activity to record
+        sample_every, optional
+            Only record portfolio activity every n-th bar
+        sample_on, optional
+            Only record portfolio activity on the first bar of each calendar
+            period
+        """
+        self._feed = feed
+        self._strategies = [strategy for strategy, _ in strategies]
+        self._brokers = [broker_factory() for _ in strategies]
+        self._portfolios = [
+            Portfolio(
+                cash,
+                record_mode=record_mode,
+                sample_every=sample_every,
+                sample_on=sample_on,
+            )
+            for _, cash in strategies
+        ]
+        self._subscribed = set[str]()
+        self._subscribed_all = False
+
+    def run(self) -> None:
+        """Run all strategies"""
+        slots = list(zip(self._brokers, self._portfolios, self._strategies))
+        for broker, portfolio, strategy in slots:
+            strategy.setup_context(
+                self._subscribe,
+                broker.post_order,
+                portfolio,
+                subscribe_many_hook=self._subscribe_many,
+                subscribe_all_hook=self._subscribe_all,
+            )
+
+        self._feed.start()
+        for strategy in self._strategies:
+            strategy.on_start()
+        while self._feed.is_running():
+            data = self._feed.next_data()
+            for broker, portfolio, strategy in slots:
+                _step(broker, portfolio, strategy, data)
+
+    @property
+    def portfolios(self) -> list[PortfolioView]:
+        """Portfolio of each strategy, in the order they were given"""
+        return list[PortfolioView](self._portfolios)
+
+    def _subscribe(self, symbol: str) -> None:
+        self._subscribe_many((symbol,))
+
+    def _subscribe_many(self, symbols: Iterable[str]) -> None:
+        # Strategies commonly share symbols, the feed only needs them once
+        if self._subscribed_all:
+            return
+        added = [s for s in dict.fromkeys(symbols) if s not in self._subscribed]
+        self._feed.subscribe_many(added)
+        self._subscribed.update(added)
+
+    def _subscribe_all(self) -> None:
+        if not self._subscribed_all:
+            self._feed.subscribe_all()
+            self._subscribed_all = True
+
+
+def _step(
+    broker: Broker, portfolio: Portfolio, strategy: Strategy, data: BarData
+) -> None:
+    """Process one bar for a strategy"""
+    _open_bar(portfolio, strategy, data)
+    # Broker should get the data first in case an outstanding order has
+    # a fill. That way the strategy will have the most recent view of
+    # the portfolio.
+    broker.on_data(data)
+    _fill(portfolio, strategy, broker.pop_latest())
+    _close_bar(portfolio, strategy, data)
+
+
+# The stages of ``_step`` besides the broker's, shared with the profiled and
+# async loops which call the broker themselves
+
+
+def _open_bar(portfolio: Portfolio, strategy: Strategy, data: BarData) -> None:
+    """Start of a bar, before the broker sees it"""
+    strategy.current_time = data.as_of
+    # Corporate actions go ex before the bar trades
+    for action in data.actions:
+        portfolio.on_corporate_action(action)
+
+
+def _fill(
+    portfolio: Portfolio, strategy: Strategy, exec_reports: list[ExecutionReport]
+) -> None:
+    """Update portfolio with fill information and notify strategy that fills
+    have taken place. Most bars have none."""
+    if exec_reports:
+        portfolio.on_fills(exec_reports)
+        strategy.on_executions(exec_reports)
+
+
+def _close_bar(portfolio: Portfolio, strategy: Strategy, data: BarData) -> None:
+    """End of a bar, once fills are in"""
+    portfolio.on_data(data)
+    strategy.on_data(data)
@@ -1,12 +1,18 @@
+import glob
+import heapq
+import re
+import time
 from abc import ABC, abstractmethod
-from pathlib import Path
-from typing import Optional, override
-from zoneinfo import ZoneInfo
 from datetime import datetime as dt
 from datetime import timedelta
-import pandas as pd
+from pathlib import Path
+from typing import Iterable, Iterator, Optional, override
+
 import numpy as np
-from systrade.data import Bar, BarData
+import pandas as pd
+
+from systrade.data import ArrayBarData, BarData, CorporateAction, SymbolIndex
+from systrade.store import BarStore, to_nanos, to_wall_clock
 
 
 class Feed(ABC):
@@ -26,15 +32,261 @@ class Feed(ABC):
     def subscribe(self, symbol: str) -> None:
         """Subscribe to a symbol"""
 
+    def subscribe_many(self, symbols: Iterable[str]) -> None:
+        """Subscribe to several symbols, raising like ``subscribe`` for any
+        that are unknown or already subscribed to"""
+        for symbol in symbols:
+            self.subscribe(symbol)
+
+    def subscribe_all(self) -> None:
+        """Subscribe to every symbol with data that isn't subscribed to yet,
+        for feeds that know their symbols up front"""
+        raise NotImplementedError(f"{type(self).__name__} can't list its symbols")
+
     @abstractmethod
     def next_data(self) -> BarData:
         """Block until returning the next available data for subscribed
         symbols"""
 
+    def checkpoint(self) -> dict:
+        """Replay position and subscriptions, for feeds that can resume"""
+        raise NotImplementedError(f"{type(self).__name__} can't be checkpointed")
+
+    def restore(self, state: dict) -> None:
+        """Resume from a ``checkpoint``, replacing any subscriptions"""
+        raise NotImplementedError(f"{type(self).__name__} can't be checkpointed")
+
+
+class StoreSubscriptions:
+    """Symbols of a ``BarStore`` that a feed is subscribed to, kept as sorted
+    store codes along with the index of the bars they make up. Subscribing
+    only records symbols, codes and index are rebuilt once on first use
+    after a change so subscribing one symbol at a time stays linear."""
+
+    def __init__(self, store: BarStore) -> None:
+        self._store = store
+        self._symbols = set[str]()
+        self._ids = np.empty(0, dtype=np.int32)
+        self._index = SymbolIndex([])
+        self._stale = False
+
+    @property
+    def ids(self) -> np.ndarray:
+        """Store codes of the subscribed symbols, ascending"""
+        if self._stale:
+            self._rebuild()
+        return self._ids
+
+    @property
+    def index(self) -> SymbolIndex:
+        """Index of the subscribed symbols in ``ids`` order"""
+        if self._stale:
+            self._rebuild()
+        return self._index
+
+    def add(self, symbols: Iterable[str]) -> None:
+        """Subscribe to symbols, raising for any that are unknown or already
+        subscribed to before anything changes"""
+        added = set[str]()
+        for symbol in symbols:
+            if not self._store.has_symbol(symbol):
+                raise ValueError(f"No data for symbol {symbol}")
+            if symbol in self._symbols or symbol in added:
+                raise ValueError(f"Already subscribed to {symbol}")
+            added.add(symbol)
+        if added:
+            self._symbols |= added
+            self._stale = True
+
+    def add_all(self) -> None:
+        """Subscribe to every symbol of the store not subscribed to yet"""
+        symbols = self._store.symbols
+        self.add(s for s in symbols if s not in self._symbols)
+
+    def clear(self) -> None:
+        self._symbols = set[str]()
+        self._stale = True
+
+    def _rebuild(self) -> None:
+        # Keep codes sorted so a time period can be searched in one pass
+        self._ids = np.sort(self._store.symbol_ids(self._symbols))
+        self._index = SymbolIndex([self._store.symbols[i] for i in self._ids.tolist()])
+        self._stale = False
+
+
+class StoreFeed(Feed):
+    """Replays bars out of a pre-indexed ``BarStore``. Each ``next_data`` call is
+    a lookup of the subscribed symbols at the current time period, there is no
+    filtering of the underlying data inside the replay loop."""
 
-class FileFeed(Feed):
     def __init__(
-        self, path: str | Path, start: Optional[str] = None, end: Optional[str] = None
+        self,
+        store: BarStore,
+        start: Optional[dt | str] = None,
+        end: Optional[dt | str] = None,
+        adjust: bool = False,
+        actions: bool = False,
+    ) -> None:
+        """Store feed initializer
+
+        Parameters
+        ----------
+        store
+            Bars to replay
+        start, optional
+            First date of the replay, defaults to the beginning of the store
+        end, optional
+            Last date (inclusive) of the replay, defaults to the end of the store
+        adjust, optional
+            Replay split and dividend adjusted prices and volumes
+        actions, optional
+            Report splits and dividends of subscribed symbols in
+            ``BarData.actions`` so a portfolio can apply them. Adjusted prices
+            already account for them, so only one of the two can be used, and
+            neither makes sense for data that comes split adjusted.
+        """
+        if adjust and actions:
+            raise ValueError("Adjusted prices already account for actions")
+        self._store = store
+        self._adjust = adjust
+        self._actions = actions
+        self._begin, self._end = self._bounds(start, end)
+        self._cursor = self._begin
+        self._subscriptions = StoreSubscriptions(store)
+        self._running = False
+
+    @property
+    def store(self) -> BarStore:
+        return self._store
+
+    @property
+    def window(self) -> tuple[int, int]:
+        """Range of store time periods the feed replays"""
+        return self._begin, self._end
+
+    def set_window(
+        self, start: Optional[dt | str] = None, end: Optional[dt | str] = None
+    ) -> None:
+        """Replay a different date range of the same data, rewinding to its
+        start. Bounds are binary searched so nothing gets reparsed, and
+        subscriptions are kept.
+
+        Parameters
+        ----------
+        start, optional
+            First date of the replay, defaults to the beginning of the store
+        end, optional
+            Last date (inclusive) of the replay, defaults to the end of the store
+        """
+        self._begin, self._end = self._bounds(start, end)
+        self._cursor = self._begin
+
+    def seek(self, when: dt | str) -> None:
+        """Move the replay to the first time period at or after when, staying
+        within the window"""
+        cursor = self._store.search(when)
+        self._cursor = min(max(cursor, self._begin), self._end)
+
+    def _bounds(
+        self, start: Optional[dt | str], end: Optional[dt | str]
+    ) -> tuple[int, int]:
+        begin = self._store.search(start) if start else 0
+        if end is None:
+            return begin, len(self._store)
+        if isinstance(end, str):
+            end = dt.strptime(end, "%Y-%m-%d")
+        return begin, self._store.search(end + timedelta(days=1))
+
+    @override
+    def start(self) -> None:
+        self._running = True
+
+    @override
+    def stop(self) -> None:
+        self._running = False
+
+    @override
+    def is_running(self) -> bool:
+        return self._running and self._cursor < self._end
+
+    @override
+    def subscribe(self, symbol: str) -> None:
+        self.subscribe_many((symbol,))
+
+    @override
+    def subscribe_many(self, symbols: Iterable[str]) -> None:
+        self._subscriptions.add(symbols)
+
+    @override
+    def subscribe_all(self) -> None:
+        self._subscriptions.add_all()
+
+    @override
+    def checkpoint(self) -> dict:
+        # Positions are kept as timestamps so a feed over a differently
+        # windowed or rebuilt store can pick up at the same point in time
+        if self._cursor < self._end:
+            next_time = int(self._store.timestamps[self._cursor])
+        else:
+            next_time = None
+        return {
+            "next": next_time,
+            "subscribed": list(self._subscriptions.index.symbols),
+        }
+
+    @override
+    def restore(self, state: dict) -> None:
+        self._subscriptions.clear()
+        self._subscriptions.add(state["subscribed"])
+        if state["next"] is None:
+            self._cursor = self._end
+        else:
+            cursor = int(np.searchsorted(self._store.timestamps, state["next"]))
+            self._cursor = min(max(cursor, self._begin), self._end)
+
+    @override
+    def next_data(self) -> BarData:
+        if self._cursor >= self._end:
+            raise RuntimeError("Feed has no more data")
+        i = self._cursor
+        self._cursor += 1
+        subscriptions = self._subscriptions
+        if not (self._adjust or self._actions):
+            # Subscribed symbols without a bar this period are reported as NaN
+            return ArrayBarData(
+                subscriptions.index,
+                self._store.values_at(i, subscriptions.ids),
+                as_of=self._store.datetime_at(i),
+            )
+        store = self._store
+        rows = store.locate(i, subscriptions.ids)
+        missing = rows < 0
+        values = store.bars[rows]
+        if self._adjust:
+            factors = store.adjustments()[rows]
+            values[:, :4] *= factors[:, :1]
+            values[:, 4] /= factors[:, 1]
+        values[missing] = np.nan
+        data = ArrayBarData(subscriptions.index, values, as_of=store.datetime_at(i))
+        if self._actions:
+            events = store.actions[rows]
+            hits = np.flatnonzero(~missing & events.any(axis=1))
+            if len(hits):
+                data.actions = [
+                    CorporateAction(subscriptions.index.symbols[j], *events[j].tolist())
+                    for j in hits.tolist()
+                ]
+        return data
+
+
+class FileFeed(StoreFeed):
+    def __init__(
+        self,
+        path: str | Path,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        adjust: bool = False,
+        actions: bool = False,
     ) -> None:
         """File feed initializer
 
@@ -46,64 +298,427 @@ class FileFeed(Feed):
             When to start the replay, in YYYY-MM-DD format
         end, optional
             When to end the replay, in YYYY-MM-DD format
+        adjust, optional
+            Replay split and dividend adjusted prices and volumes
+        actions, optional
+            Report splits and dividends in ``BarData.actions``
         """
+        frame = pd.read_csv(path)
+        frame["Date"] = to_wall_clock(frame["Date"])
+        # Date ordered, so the rows of a window are a contiguous slice
+        self._frame = frame.sort_values("Date", kind="stable")
+        super().__init__(
+            BarStore.from_frame(self._frame),
+            start=start,
+            end=end,
+            adjust=adjust,
+            actions=actions,
+        )
 
-        # Your implementation
-        self.path : pd.DataFrame = pd.read_csv(path)
-        self.path["Date"] = pd.to_datetime(self.path["Date"])
-        
-        self._start = dt.strptime(start or "2005-01-03", "%Y-%m-%d")
-        self._end = dt.strptime(end or "2025-08-29", "%Y-%m-%d")
-        
-        self.current = self._start
-        self.subscribed = []
-        self.started : bool = False
     @property
     def df(self) -> pd.DataFrame:
-        # Your implementation
-        mask = self.path["Date"].apply(dt.date).between(self._start.date(), self._end.date())
-        return self.path.loc[mask]
+        """Raw data within the replay window, in date order"""
+        offsets = self._store.offsets
+        return self._frame.iloc[offsets[self._begin] : offsets[self._end]]
+
+
+class MmapFeed(StoreFeed):
+    def __init__(
+        self,
+        path: str | Path,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        adjust: bool = False,
+        actions: bool = False,
+    ) -> None:
+        """Memory mapped feed initializer. Opening is independent of the size of
+        the data since nothing is parsed, pages are loaded (and shared between
+        processes) through the OS cache as the replay touches them.
+
+        Parameters
+        ----------
+        path
+            Full path to a binary store, see ``systrade.store.convert_csv``
+        start, optional
+            When to start the replay, in YYYY-MM-DD format
+        end, optional
+            When to end the replay, in YYYY-MM-DD format
+        adjust, optional
+            Replay split and dividend adjusted prices and volumes
+        actions, optional
+            Report splits and dividends in ``BarData.actions``
+        """
+        super().__init__(
+            BarStore.open(path),
+            start=start,
+            end=end,
+            adjust=adjust,
+            actions=actions,
+        )
+
+
+# A chunk of rows as (timestamps, columns, OHLCV values), the column of rows of
+# symbols that aren't subscribed to is -1
+_Rows = tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class StreamingFileFeed(Feed):
+    """Replays a CSV file that doesn't need to fit in memory. The file is read
+    in bounded chunks through a generator pipeline and one ``BarData`` is
+    assembled per timestamp as the replay reaches it, so memory use depends on
+    the chunk size rather than the file size. Rows must be in ascending date
+    order (as minute or tick files usually are), and since the file isn't
+    scanned up front subscriptions aren't validated against it. Subscriptions
+    have to be made before the replay begins."""
+
+    COLUMNS = ["Date", "Open", "High", "Low", "Close", "Volume", "Symbol"]
+
+    def __init__(
+        self,
+        path: str | Path,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        chunksize: int = 100_000,
+    ) -> None:
+        """Streaming file feed initializer
+
+        Parameters
+        ----------
+        path
+            Full path to data file
+        start, optional
+            When to start the replay, in YYYY-MM-DD format
+        end, optional
+            When to end the replay, in YYYY-MM-DD format
+        chunksize, optional
+            Number of rows to parse at a time
+        """
+        self._path = path
+        self._start = to_nanos(start) if start else None
+        self._end = (
+            to_nanos(dt.strptime(end, "%Y-%m-%d") + timedelta(days=1)) if end else None
+        )
+        self._chunksize = chunksize
+        self._index = SymbolIndex([])
+        # Column of each subscribed symbol, rows are mapped a chunk at a time
+        self._columns = dict[str, int]()
+        self._reading = False
+        self._periods = self._read_periods(self._read_chunks())
+        self._next: Optional[BarData] = None
+        self._running = False
+        self._bars_read = 0
+        self._started_at = 0.0
+        self._elapsed = 0.0
+
+    @property
+    def bars_read(self) -> int:
+        """Number of bar events returned so far"""
+        return self._bars_read
+
+    @property
+    def bars_per_sec(self) -> float:
+        """Replay throughput in bar events per second since the feed started"""
+        elapsed = self._elapsed
+        if self._running:
+            elapsed += time.perf_counter() - self._started_at
+        return self._bars_read / elapsed if elapsed > 0 else 0.0
 
     @override
     def start(self) -> None:
-        # Your implementation
-        self.started = True
+        if not self._running:
+            self._started_at = time.perf_counter()
+        self._running = True
 
     @override
     def stop(self) -> None:
-        # Your implementation
-        self.started = False
+        if self._running:
+            self._elapsed += time.perf_counter() - self._started_at
+        self._running = False
 
     @override
     def is_running(self) -> bool:
-        return self.started
+        if not self._running:
+            return False
+        if self._next is None:
+            self._next = next(self._periods, None)
+        return self._next is not None
 
     @override
     def subscribe(self, symbol: str) -> None:
-        # Your implementation
-        if symbol in self.path["Symbol"].unique() and symbol not in self.subscribed:
-            self.subscribed.append(symbol)
-        else:
-            raise ValueError("Invalid Symbolpython -m pytest tests/test_feed.py or Symbol Already in List" + symbol+self.path["Symbol"].unique()+self.subscribed)
+        self.subscribe_many((symbol,))
+
+    @override
+    def subscribe_many(self, symbols: Iterable[str]) -> None:
+        if self._reading:
+            raise RuntimeError("Can't subscribe once the replay has begun")
+        columns = self._columns.copy()
+        for symbol in symbols:
+            if symbol in columns:
+                raise ValueError(f"Already subscribed to {symbol}")
+            columns[symbol] = len(columns)
+        self._columns = columns
+        self._index = SymbolIndex(list(columns))
+
+    @override
+    def next_data(self) -> BarData:
+        if not self.is_running() or self._next is None:
+            raise RuntimeError("Feed has no more data")
+        data, self._next = self._next, None
+        self._bars_read += 1
+        return data
+
+    def _read_chunks(self) -> Iterator[_Rows]:
+        """Parse the file a chunk at a time, dropping rows outside of the
+        replay window and stopping once past its end"""
+        self._reading = True
+        with pd.read_csv(
+            self._path, usecols=self.COLUMNS, chunksize=self._chunksize
+        ) as reader:
+            for chunk in reader:
+                stamps = to_wall_clock(chunk["Date"]).view(np.int64)
+                keep = np.ones(len(stamps), dtype=bool)
+                if self._start is not None:
+                    keep &= stamps >= self._start
+                if self._end is not None:
+                    keep &= stamps < self._end
+                values = chunk[self.COLUMNS[1:-1]].to_numpy(dtype=np.float64)
+                columns = chunk["Symbol"].map(self._columns).fillna(-1)
+                columns = columns.to_numpy(dtype=np.int64)
+                yield stamps[keep], columns[keep], values[keep]
+                if self._end is not None and len(stamps) and stamps[-1] >= self._end:
+                    return
+
+    def _read_periods(self, chunks: Iterator[_Rows]) -> Iterator[BarData]:
+        """Group chunks of rows into one ``BarData`` per timestamp. The last
+        timestamp of a chunk is held back since it may continue in the next."""
+        carry: Optional[_Rows] = None
+        for rows in chunks:
+            if carry is not None:
+                rows = tuple(np.concatenate(pair) for pair in zip(carry, rows))
+            stamps = rows[0]
+            if not len(stamps):
+                continue
+            if np.any(np.diff(stamps) < 0):
+                raise ValueError(f"{self._path} is not sorted by date")
+            bounds = np.flatnonzero(np.diff(stamps)) + 1
+            starts = np.concatenate(([0], bounds))
+            ends = np.concatenate((bounds, [len(stamps)]))
+            for lo, hi in zip(starts[:-1].tolist(), ends[:-1].tolist()):
+                yield self._make_period(*(col[lo:hi] for col in rows))
+            carry = tuple(col[starts[-1] :] for col in rows)
+        if carry is not None and len(carry[0]):
+            yield self._make_period(*carry)
+
+    def _make_period(
+        self, stamps: np.ndarray, columns: np.ndarray, values: np.ndarray
+    ) -> BarData:
+        # Subscribed symbols without a bar this period are reported as NaN
+        period = np.full((len(self._index), 5), np.nan)
+        hits = columns >= 0
+        period[columns[hits]] = values[hits]
+        return ArrayBarData(self._index, period, as_of=pd.Timestamp(int(stamps[0])))
+
+
+class _Partition:
+    """One file of a partitioned data set, not read until the replay reaches
+    its lower bound"""
+
+    __slots__ = ("path", "symbol", "year")
+
+    def __init__(self, path: Path, symbol: Optional[str], year: Optional[int]):
+        self.path = path
+        self.symbol = symbol
+        self.year = year
+
+
+class _Cursor:
+    """Window rows of a partition that was read, for the subscribed symbols"""
+
+    __slots__ = ("stamps", "columns", "values", "position")
+
+    def __init__(self, stamps: np.ndarray, columns: np.ndarray, values: np.ndarray):
+        self.stamps = stamps
+        self.columns = columns
+        self.values = values
+        self.position = 0
+
+
+# Heap entries are (timestamp, kind, sequence, partition or cursor). Partitions
+# sort ahead of cursors at the same timestamp so they are read before any bars
+# at their lower bound go out.
+_PARTITION = 0
+_CURSOR = 1
+
+
+class PartitionedFeed(Feed):
+    """Replays data split over several CSV files, e.g. one file per symbol
+    and/or per year. Files are found with a path template such as
+    ``data/{symbol}/{year}.csv`` or ``data/{symbol}.csv``.
+
+    Only partitions of subscribed symbols that overlap the replay window are
+    read, each one once the replay reaches its lower bound (the start of its
+    year, if the template has one). The partitions are merged by timestamp with
+    a heap. Templates without
+    ``{symbol}`` have files holding several symbols, so subscriptions can't be
+    validated against them.
+    """
+
+    COLUMNS = ["Date", "Open", "High", "Low", "Close", "Volume"]
+
+    def __init__(
+        self,
+        template: str | Path,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+    ) -> None:
+        """Partitioned feed initializer
+
+        Parameters
+        ----------
+        template
+            Path of the files with ``{symbol}`` and/or ``{year}`` placeholders
+        start, optional
+            When to start the replay, in YYYY-MM-DD format
+        end, optional
+            When to end the replay, in YYYY-MM-DD format
+        """
+        template = str(template)
+        if "{symbol}" not in template and "{year}" not in template:
+            raise ValueError("template needs a {symbol} or {year} placeholder")
+        self._by_symbol = "{symbol}" in template
+        self._start = dt.strptime(start, "%Y-%m-%d") if start else None
+        self._end = dt.strptime(end, "%Y-%m-%d") + timedelta(days=1) if end else None
+        self._partitions = self._discover(template)
+        self._symbols = {p.symbol for p in self._partitions if p.symbol is not None}
+        self._subscribed = set[str]()
+        self._index = SymbolIndex([])
+        self._heap: Optional[list[tuple]] = None
+        self._running = False
+
+    @property
+    def symbols(self) -> list[str]:
+        """Symbols with partitions, empty if files aren't split by symbol"""
+        return sorted(self._symbols)
+
+    @override
+    def start(self) -> None:
+        self._running = True
+
+    @override
+    def stop(self) -> None:
+        self._running = False
+
+    @override
+    def is_running(self) -> bool:
+        if not self._running:
+            return False
+        self._advance()
+        return bool(self._heap)
+
+    @override
+    def subscribe(self, symbol: str) -> None:
+        self.subscribe_many((symbol,))
+
+    @override
+    def subscribe_many(self, symbols: Iterable[str]) -> None:
+        if self._heap is not None:
+            raise RuntimeError("Can't subscribe once the replay has begun")
+        added = set[str]()
+        for symbol in symbols:
+            if self._by_symbol and symbol not in self._symbols:
+                raise ValueError(f"No data for symbol {symbol}")
+            if symbol in self._subscribed or symbol in added:
+                raise ValueError(f"Already subscribed to {symbol}")
+            added.add(symbol)
+        self._subscribed |= added
+
+    @override
+    def subscribe_all(self) -> None:
+        if not self._by_symbol:
+            super().subscribe_all()
+        self.subscribe_many(self._symbols - self._subscribed)
 
     @override
     def next_data(self) -> BarData:
-        # Your implementation
-        bars = BarData(as_of=self.current)
-        data = self.path.loc[self.path["Date"].apply(dt.date) == self.current.date()]
-        for symbol in self.subscribed:
-            symbol_price = data.loc[data["Symbol"] == symbol]
-            if(data.empty):
-                bars[symbol] = Bar()
+        if not self.is_running():
+            raise RuntimeError("Feed has no more data")
+        heap = self._heap
+        assert heap is not None
+        now = heap[0][0]
+        values = np.full((len(self._index), 5), np.nan)
+        # All partitions at or before now have been read, gather their bars
+        while heap and heap[0][0] == now and heap[0][1] == _CURSOR:
+            _, _, sequence, cursor = heapq.heappop(heap)
+            i = cursor.position
+            j = i + int(np.searchsorted(cursor.stamps[i:], now, side="right"))
+            values[cursor.columns[i:j]] = cursor.values[i:j]
+            cursor.position = j
+            if j < len(cursor.stamps):
+                heapq.heappush(heap, (int(cursor.stamps[j]), _CURSOR, sequence, cursor))
+        return ArrayBarData(self._index, values, as_of=pd.Timestamp(now))
+
+    def _discover(self, template: str) -> list[_Partition]:
+        pattern = re.escape(template)
+        pattern = pattern.replace(re.escape("{symbol}"), r"(?P<symbol>[^/\\]+?)")
+        pattern = pattern.replace(re.escape("{year}"), r"(?P<year>\d{4})")
+        matcher = re.compile(pattern + "$")
+        partitions = list[_Partition]()
+        for path in sorted(glob.glob(template.format(symbol="*", year="*"))):
+            match = matcher.match(path)
+            if match is None:
                 continue
-            day_data = Bar(float(symbol_price["Open"].iloc[0]), float(symbol_price["High"].iloc[0]), float(symbol_price["Low"].iloc[0]), float(symbol_price["Close"].iloc[0]), float(symbol_price["Volume"].iloc[0]))
-            bars[symbol] = day_data
-        if self.current.date() == self._end.date():
-            self.stop()
-        mask = self.path["Date"].apply(dt.date) == self.current.date()
-        pos = mask.idxmax()
-        int_loc = self.path.index.get_loc(pos)
-        self.current = self.path.iloc[int_loc + 1]["Date"]
-        return bars
-            
-            
+            groups = match.groupdict()
+            year = int(groups["year"]) if groups.get("year") else None
+            if year is not None:
+                if self._start is not None and year < self._start.year:
+                    continue
+                if self._end is not None and dt(year, 1, 1) >= self._end:
+                    continue
+            partitions.append(_Partition(Path(path), groups.get("symbol"), year))
+        return partitions
+
+    def _begin(self) -> list[tuple]:
+        """Heap of the partitions to replay, keyed on their lower bounds"""
+        self._index = SymbolIndex(sorted(self._subscribed))
+        heap = list[tuple]()
+        earliest = to_nanos(self._start) if self._start else np.iinfo(np.int64).min
+        for sequence, partition in enumerate(self._partitions):
+            if partition.symbol is not None and partition.symbol not in self._index:
+                continue
+            bound = earliest
+            if partition.year is not None:
+                bound = max(bound, to_nanos(dt(partition.year, 1, 1)))
+            heap.append((bound, _PARTITION, sequence, partition))
+        heapq.heapify(heap)
+        return heap
+
+    def _advance(self) -> None:
+        """Read partitions until the earliest entry is a bar"""
+        if self._heap is None:
+            self._heap = self._begin()
+        heap = self._heap
+        while heap and heap[0][1] == _PARTITION:
+            _, _, sequence, partition = heapq.heappop(heap)
+            cursor = self._read(partition)
+            if len(cursor.stamps):
+                heapq.heappush(heap, (int(cursor.stamps[0]), _CURSOR, sequence, cursor))
+
+    def _read(self, partition: _Partition) -> _Cursor:
+        usecols = self.COLUMNS if partition.symbol else self.COLUMNS + ["Symbol"]
+        df = pd.read_csv(partition.path, usecols=usecols)
+        stamps = to_wall_clock(df["Date"]).view(np.int64)
+        if partition.symbol is not None:
+            columns = np.full(len(df), self._index.column(partition.symbol))
+        else:
+            lookup = {sym: i for i, sym in enumerate(self._index.symbols)}
+            columns = df["Symbol"].map(lookup).fillna(-1).to_numpy(dtype=np.int64)
+        keep = columns >= 0
+        if self._start is not None:
+            keep &= stamps >= to_nanos(self._start)
+        if self._end is not None:
+            keep &= stamps < to_nanos(self._end)
+        values = df[self.COLUMNS[1:]].to_numpy(dtype=np.float64)
+        stamps, columns, values = stamps[keep], columns[keep], values[keep]
+        # Files holding several symbols are usually written symbol by symbol
+        order = np.argsort(stamps, kind="stable")
+        return _Cursor(stamps[order], columns[order], values[order])
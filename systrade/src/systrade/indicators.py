@@ -0,0 +1,444 @@
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Optional, override
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from systrade.data import Bar, BarData
+
+
+class RingBuffer:
+    """Fixed size buffer of the latest values pushed to it"""
+
+    __slots__ = ("_values", "_next", "_count")
+
+    def __init__(self, size: int) -> None:
+        if size < 1:
+            raise ValueError("size must be positive")
+        self._values = [0.0] * size
+        self._next = 0
+        self._count = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    @property
+    def full(self) -> bool:
+        return self._count == len(self._values)
+
+    def push(self, value: float) -> Optional[float]:
+        """Add value, returns the value it evicts once the buffer is full"""
+        i = self._next
+        evicted = self._values[i] if self.full else None
+        self._values[i] = value
+        self._next = (i + 1) % len(self._values)
+        if evicted is None:
+            self._count += 1
+        return evicted
+
+
+class Indicator(ABC):
+    """Incrementally updated indicator of one symbol's bars. Bars missing from
+    the data, or with NaN inputs, are skipped and keep the current value."""
+
+    def __init__(self, window: int, symbol: Optional[str] = None) -> None:
+        """Indicator initializer
+
+        Parameters
+        ----------
+        window
+            Number of bars the indicator looks back over
+        symbol, optional
+            Symbol whose bars ``on_data`` reads, only needed when feeding the
+            indicator with ``BarData``
+        """
+        if window < 1:
+            raise ValueError("window must be positive")
+        self.window = window
+        self.symbol = symbol
+        self._value = math.nan
+
+    @property
+    def value(self) -> float:
+        """Current value, NaN until enough bars have been seen"""
+        return self._value
+
+    @property
+    def ready(self) -> bool:
+        return not math.isnan(self._value)
+
+    def on_data(self, data: BarData) -> float:
+        """Update with the symbol's bar, if there is one"""
+        if self.symbol is None:
+            raise ValueError("Indicator has no symbol to read")
+        bar = data.get(self.symbol)
+        if bar is not None:
+            self.on_bar(bar)
+        return self._value
+
+    @abstractmethod
+    def on_bar(self, bar: Bar) -> float:
+        """Update with a bar, returns the new value"""
+
+
+class RollingIndicator(Indicator):
+    """Indicator of a single bar field. ``batch`` computes the values
+    ``update`` would produce over a whole array."""
+
+    def __init__(
+        self, window: int, symbol: Optional[str] = None, field: str = "close"
+    ) -> None:
+        """Rolling indicator initializer
+
+        Parameters
+        ----------
+        window
+            Number of bars the indicator looks back over
+        symbol, optional
+            Symbol whose bars ``on_data`` reads
+        field, optional
+            Bar field the indicator is computed over
+        """
+        super().__init__(window, symbol)
+        self.field = field
+
+    @override
+    def on_bar(self, bar: Bar) -> float:
+        value = getattr(bar, self.field)
+        if not math.isnan(value):
+            self.update(value)
+        return self._value
+
+    @abstractmethod
+    def update(self, value: float) -> float:
+        """Update with a value, returns the new indicator value"""
+
+    def batch(self, values: np.ndarray) -> np.ndarray:
+        """Indicator values over a whole series, or over each column of a
+        (time x symbol) array. Doesn't touch the incremental state."""
+        values = np.asarray(values, dtype=float)
+        if values.ndim == 2:
+            result = np.empty_like(values)
+            for j in range(values.shape[1]):
+                result[:, j] = self.batch(values[:, j])
+            return result
+        return _skip_missing(values, self._batch)
+
+    @abstractmethod
+    def _batch(self, values: np.ndarray) -> np.ndarray:
+        """Batch values of a 1-D series without NaN"""
+
+
+class SMA(RollingIndicator):
+    """Simple moving average"""
+
+    def __init__(
+        self, window: int, symbol: Optional[str] = None, field: str = "close"
+    ) -> None:
+        super().__init__(window, symbol, field)
+        # Running total and the totals of the window, a window's sum is the
+        # difference of two totals so batch results match exactly
+        self._total = 0.0
+        self._totals = RingBuffer(window)
+
+    @override
+    def update(self, value: float) -> float:
+        self._total += value
+        evicted = self._totals.push(self._total)
+        if evicted is not None:
+            self._value = (self._total - evicted) / self.window
+        elif self._totals.full:
+            self._value = self._total / self.window
+        return self._value
+
+    @override
+    def _batch(self, values: np.ndarray) -> np.ndarray:
+        n = self.window
+        result = np.full(len(values), np.nan)
+        if len(values) < n:
+            return result
+        totals = np.cumsum(values)
+        result[n - 1] = totals[n - 1] / n
+        result[n:] = (totals[n:] - totals[:-n]) / n
+        return result
+
+
+class EMA(RollingIndicator):
+    """Exponential moving average, seeded with the simple average of the
+    first window"""
+
+    def __init__(
+        self,
+        window: int,
+        symbol: Optional[str] = None,
+        field: str = "close",
+        alpha: Optional[float] = None,
+    ) -> None:
+        """EMA initializer
+
+        Parameters
+        ----------
+        window
+            Number of bars of the seed average
+        symbol, optional
+            Symbol whose bars ``on_data`` reads
+        field, optional
+            Bar field the indicator is computed over
+        alpha, optional
+            Smoothing factor, 2 / (window + 1) by default
+        """
+        super().__init__(window, symbol, field)
+        self.alpha = alpha if alpha is not None else 2 / (window + 1)
+        self._seed = 0.0
+        self._count = 0
+
+    @override
+    def update(self, value: float) -> float:
+        self._value, self._seed, self._count = _smooth(
+            self._value, self._seed, self._count, value, self.window, self.alpha
+        )
+        return self._value
+
+    @override
+    def _batch(self, values: np.ndarray) -> np.ndarray:
+        # The recursion is inherently sequential, run it over the array
+        return _smooth_all(values.tolist(), self.window, self.alpha)
+
+
+class RollingStd(RollingIndicator):
+    """Rolling standard deviation, updated with Welford's algorithm"""
+
+    def __init__(
+        self,
+        window: int,
+        symbol: Optional[str] = None,
+        field: str = "close",
+        ddof: int = 1,
+    ) -> None:
+        """Rolling standard deviation initializer
+
+        Parameters
+        ----------
+        window
+            Number of bars in the window
+        symbol, optional
+            Symbol whose bars ``on_data`` reads
+        field, optional
+            Bar field the indicator is computed over
+        ddof, optional
+            Delta degrees of freedom, 1 for the sample standard deviation
+        """
+        if window <= ddof:
+            raise ValueError("window must be larger than ddof")
+        super().__init__(window, symbol, field)
+        self.ddof = ddof
+        self._window_values = RingBuffer(window)
+        self._mean = 0.0
+        self._m2 = 0.0
+
+    @override
+    def update(self, value: float) -> float:
+        evicted = self._window_values.push(value)
+        n = len(self._window_values)
+        self._mean, self._m2 = _welford(self._mean, self._m2, value, evicted, n)
+        if self._window_values.full:
+            self._value = math.sqrt(max(self._m2, 0.0) / (n - self.ddof))
+        return self._value
+
+    @override
+    def _batch(self, values: np.ndarray) -> np.ndarray:
+        # Same updates as ``update`` so results match exactly, a sliding window
+        # std rounds differently
+        return _welford_all(values.tolist(), self.window, self.ddof)
+
+
+class _RollingExtreme(RollingIndicator):
+    """Rolling min or max using a monotonic deque of (bar, value) candidates"""
+
+    def __init__(
+        self, window: int, symbol: Optional[str] = None, field: str = "close"
+    ) -> None:
+        super().__init__(window, symbol, field)
+        self._candidates = deque[tuple[int, float]]()
+        self._count = 0
+
+    @staticmethod
+    @abstractmethod
+    def _dominates(a: float, b: float) -> bool:
+        """Whether a newer value a makes an older value b irrelevant"""
+
+    @override
+    def update(self, value: float) -> float:
+        candidates = self._candidates
+        while candidates and self._dominates(value, candidates[-1][1]):
+            candidates.pop()
+        candidates.append((self._count, value))
+        self._count += 1
+        if candidates[0][0] <= self._count - 1 - self.window:
+            candidates.popleft()
+        if self._count >= self.window:
+            self._value = candidates[0][1]
+        return self._value
+
+
+class RollingMin(_RollingExtreme):
+    """Lowest value over the window"""
+
+    @staticmethod
+    @override
+    def _dominates(a: float, b: float) -> bool:
+        return a <= b
+
+    @override
+    def _batch(self, values: np.ndarray) -> np.ndarray:
+        result = np.full(len(values), np.nan)
+        if len(values) >= self.window:
+            windows = sliding_window_view(values, self.window)
+            result[self.window - 1 :] = windows.min(axis=1)
+        return result
+
+
+class RollingMax(_RollingExtreme):
+    """Highest value over the window"""
+
+    @staticmethod
+    @override
+    def _dominates(a: float, b: float) -> bool:
+        return a >= b
+
+    @override
+    def _batch(self, values: np.ndarray) -> np.ndarray:
+        result = np.full(len(values), np.nan)
+        if len(values) >= self.window:
+            windows = sliding_window_view(values, self.window)
+            result[self.window - 1 :] = windows.max(axis=1)
+        return result
+
+
+class ATR(Indicator):
+    """Average true range with Wilder's smoothing, seeded with the simple
+    average of the first window of true ranges"""
+
+    def __init__(self, window: int, symbol: Optional[str] = None) -> None:
+        super().__init__(window, symbol)
+        self._previous_close = math.nan
+        self._seed = 0.0
+        self._count = 0
+
+    @override
+    def on_bar(self, bar: Bar) -> float:
+        high, low, close = bar.high, bar.low, bar.close
+        if not (math.isnan(high) or math.isnan(low) or math.isnan(close)):
+            self.update(high, low, close)
+        return self._value
+
+    def update(self, high: float, low: float, close: float) -> float:
+        """Update with a bar's high, low and close, returns the new value"""
+        true_range = high - low
+        if not math.isnan(self._previous_close):
+            true_range = max(
+                true_range,
+                abs(high - self._previous_close),
+                abs(low - self._previous_close),
+            )
+        self._previous_close = close
+        self._value, self._seed, self._count = _smooth(
+            self._value,
+            self._seed,
+            self._count,
+            true_range,
+            self.window,
+            1 / self.window,
+        )
+        return self._value
+
+    def batch(self, high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+        """Indicator values over whole series, or over each column of (time x
+        symbol) arrays. Doesn't touch the incremental state."""
+        high = np.asarray(high, dtype=float)
+        low = np.asarray(low, dtype=float)
+        close = np.asarray(close, dtype=float)
+        if high.ndim == 2:
+            result = np.empty_like(high)
+            for j in range(high.shape[1]):
+                result[:, j] = self.batch(high[:, j], low[:, j], close[:, j])
+            return result
+        valid = ~(np.isnan(high) | np.isnan(low) | np.isnan(close))
+        high, low, close = high[valid], low[valid], close[valid]
+        true_range = high - low
+        previous = close[:-1]
+        true_range[1:] = np.maximum.reduce(
+            [true_range[1:], np.abs(high[1:] - previous), np.abs(low[1:] - previous)]
+        )
+        smoothed = _smooth_all(true_range.tolist(), self.window, 1 / self.window)
+        return _scatter(smoothed, valid)
+
+
+def _smooth(
+    value: float, seed: float, count: int, x: float, window: int, alpha: float
+) -> tuple[float, float, int]:
+    """One step of exponential smoothing seeded with a simple average, returns
+    the new (value, seed total, count)"""
+    if count < window:
+        seed += x
+        count += 1
+        if count == window:
+            value = seed / window
+        return value, seed, count
+    return value + alpha * (x - value), seed, count
+
+
+def _smooth_all(values: list[float], window: int, alpha: float) -> np.ndarray:
+    result = np.full(len(values), np.nan)
+    value, seed, count = math.nan, 0.0, 0
+    for i, x in enumerate(values):
+        value, seed, count = _smooth(value, seed, count, x, window, alpha)
+        result[i] = value
+    return result
+
+
+def _welford(
+    mean: float, m2: float, x: float, evicted: Optional[float], n: int
+) -> tuple[float, float]:
+    """One step of Welford's algorithm over a window of n values, returns the
+    new (mean, sum of squared deviations)"""
+    if evicted is None:
+        delta = x - mean
+        mean += delta / n
+        return mean, m2 + delta * (x - mean)
+    # Replace the evicted value in one step, n stays the same
+    delta = x - evicted
+    old_mean = mean
+    mean += delta / n
+    return mean, m2 + delta * (x - mean + evicted - old_mean)
+
+
+def _welford_all(values: list[float], window: int, ddof: int) -> np.ndarray:
+    result = np.full(len(values), np.nan)
+    mean, m2 = 0.0, 0.0
+    for i, x in enumerate(values):
+        evicted = values[i - window] if i >= window else None
+        mean, m2 = _welford(mean, m2, x, evicted, min(i + 1, window))
+        if i >= window - 1:
+            result[i] = math.sqrt(max(m2, 0.0) / (window - ddof))
+    return result
+
+
+def _skip_missing(values: np.ndarray, compute) -> np.ndarray:
+    """Compute over the non-NaN values only, holding results over NaN like the
+    incremental updates do"""
+    valid = ~np.isnan(values)
+    if valid.all():
+        return compute(values)
+    return _scatter(compute(values[valid]), valid)
+
+
+def _scatter(computed: np.ndarray, valid: np.ndarray) -> np.ndarray:
+    """Spread values computed over the valid entries back out, each entry
+    taking the value of the latest valid one at or before it"""
+    latest = np.cumsum(valid) - 1
+    if not len(computed):
+        return np.full(len(valid), np.nan)
+    return np.where(latest >= 0, computed[np.maximum(latest, 0)], np.nan)
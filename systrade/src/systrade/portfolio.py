@@ -1,39 +1,149 @@
+import math
 from abc import ABC, abstractmethod
 from datetime import datetime
-from multiprocessing import Value
-from typing import Optional, override
+from enum import IntEnum
+from typing import Callable, Hashable, Optional, Sequence, override
 
+import numpy as np
 import pandas as pd
 
-from systrade.data import BarData
+from systrade.analytics import Tearsheet, gross_exposure, tearsheet, traded_value
+from systrade.data import ArrayBarData, BarData, CorporateAction, ExecutionReport
 from systrade.position import Position
+from systrade.recorder import ActivityRecorder
+
+
+class RecordMode(IntEnum):
+    """How much portfolio activity to record on each bar"""
+
+    # Nothing besides the first and last value, enough for a total return
+    NONE = 0
+    # Timestamp, cash and values, without per position details
+    EQUITY = 1
+    # Everything including the quantity and price of each position
+    FULL = 2
+
+
+class Calendar(IntEnum):
+    """Calendar periods that recording can be sampled on"""
+
+    DAY = 1
+    WEEK = 2
+    MONTH = 3
+    YEAR = 4
+
+
+_CALENDAR_KEYS: dict[Calendar, Callable[[datetime], Hashable]] = {
+    Calendar.DAY: lambda t: (t.year, t.month, t.day),
+    Calendar.WEEK: lambda t: t.isocalendar()[:2],
+    Calendar.MONTH: lambda t: (t.year, t.month),
+    Calendar.YEAR: lambda t: t.year,
+}
 
 
 class PortfolioActivity:
-    """History of portfolio activity along with metrics"""
+    """History of portfolio activity along with metrics. This is a view over an
+    ``ActivityRecorder``, series and frames share the recorder's arrays."""
 
-    def __init__(self, records: list[dict]) -> None:
-        self._records = records
-        self._df = pd.DataFrame.from_records(records)
+    def __init__(self, recorder: ActivityRecorder) -> None:
+        self._recorder = recorder
+
+    @property
+    def recorder(self) -> ActivityRecorder:
+        return self._recorder
 
     def total_return(self) -> float:
-        """Total return on portfolio"""
-        return self._df["value"].iloc[-1] / self._df["value"].iloc[0] - 1
+        """Total return on portfolio, available whatever was recorded"""
+        first, last = self._recorder.first_value, self._recorder.last_value
+        if first is None or last is None:
+            raise ValueError("No portfolio activity")
+        return last / first - 1
 
     def equity_curve(self) -> pd.Series:
-        """The total value of the portfolio at each point in time"""
-        return self._df["value"]
+        """The total value of the portfolio at each recorded point in time"""
+        if not len(self._recorder) and self._recorder.first_value is not None:
+            raise ValueError("Portfolio values weren't recorded")
+        return pd.Series(self._recorder.value(), name="value", copy=False)
+
+    def tearsheet(
+        self, periods_per_year: float = 252, risk_free: float = 0.0
+    ) -> Tearsheet:
+        """Risk and performance metrics of the recorded activity. Turnover and
+        exposure need positions, they are NaN unless they were recorded.
+
+        Parameters
+        ----------
+        periods_per_year, optional
+            Number of recorded periods in a year, used to annualize
+        risk_free, optional
+            Annual risk free rate that Sharpe and Sortino ratios are in excess
+            of
+        """
+        recorder = self._recorder
+        if not len(recorder):
+            raise ValueError("Portfolio values weren't recorded")
+        gross = traded = None
+        # Holdings without any position entries means they weren't recorded
+        if len(recorder.positions()[0]) or not recorder.asset_value().any():
+            gross, traded = gross_exposure(recorder), traded_value(recorder)
+        return tearsheet(
+            recorder.value(),
+            gross=gross,
+            traded=traded,
+            periods_per_year=periods_per_year,
+            risk_free=risk_free,
+        )
 
     def df(self, condensed=True) -> pd.DataFrame:
         """Return all portfolio activity. If condensed, will keep individual
         position information packed in lists"""
+        recorder = self._recorder
+        n = len(recorder)
+        period, code, quantity, price = recorder.positions()
+        starts = np.searchsorted(period, np.arange(n))
+        ends = np.searchsorted(period, np.arange(n), side="right")
+        symbols = np.array(recorder.symbols, dtype=object)[code]
         if condensed:
-            result = self._df.copy()
-        else:
-            result = self._df.explode(
-                ["symbols", "quantities", "prices", "asset_values"]
+            index = np.arange(n)
+            rows = slice(None)
+            bounds = list(zip(starts.tolist(), ends.tolist()))
+            symbols, quantity, price, values = (
+                [column[lo:hi] for lo, hi in bounds]
+                for column in (
+                    symbols.tolist(),
+                    quantity.tolist(),
+                    price.tolist(),
+                    (quantity * price).tolist(),
+                )
             )
-        return result
+        else:
+            # One row per position, periods without positions get a NaN row
+            counts = ends - starts
+            width = np.maximum(counts, 1)
+            index = np.repeat(np.arange(n), width)
+            first = np.repeat(np.cumsum(width) - width, width)
+            entry = np.repeat(starts, width) + np.arange(len(index)) - first
+            # Point periods without positions at a trailing NaN entry
+            entry[np.repeat(counts == 0, width)] = len(period)
+            rows = index
+            symbols = np.append(symbols, np.nan)[entry]
+            quantity = np.append(quantity, np.nan)[entry]
+            price = np.append(price, np.nan)[entry]
+            values = quantity * price
+        return pd.DataFrame(
+            {
+                "timestamp": recorder.timestamps()[rows],
+                "cash": recorder.cash()[rows],
+                "symbols": symbols,
+                "quantities": quantity,
+                "prices": price,
+                "asset_values": values,
+                "asset_value": recorder.asset_value()[rows],
+                "value": recorder.value()[rows],
+            },
+            index=index,
+            copy=False,
+        )
 
 
 class PortfolioView(ABC):
@@ -77,6 +187,13 @@ class PortfolioView(ABC):
 
 
 class Portfolio(PortfolioView):
+    """Portfolio that marks positions to the latest available close.
+
+    Marks, per symbol values and the total asset value are maintained
+    incrementally as fills and prices arrive, so valuation is O(1) and each
+    update only touches the positions it changes.
+    """
+
     _zero_tolerance = 1e-8
 
     def __init__(
@@ -84,11 +201,48 @@ class Portfolio(PortfolioView):
         cash: float,
         current_positions: Optional[dict[str, Position]] = None,
         current_prices: Optional[BarData] = None,
+        record_mode: RecordMode = RecordMode.FULL,
+        sample_every: int = 1,
+        sample_on: Optional[Calendar] = None,
     ) -> None:
+        """Portfolio initializer
+
+        Parameters
+        ----------
+        cash
+            Starting cash balance
+        current_positions, optional
+            Starting positions keyed by symbol
+        current_prices, optional
+            Latest prices to value starting positions with
+        record_mode, optional
+            How much activity to record on each bar
+        sample_every, optional
+            Only record every n-th bar
+        sample_on, optional
+            Only record the first bar of each calendar period
+        """
+        if sample_every < 1:
+            raise ValueError("sample_every must be at least 1")
         self._cash = cash
+        self._record_mode = record_mode
+        self._sample_every = sample_every
+        self._sample_on = sample_on
+        self._bars = 0
+        self._last_key: Optional[Hashable] = None
         self._current_positions = current_positions or {}
-        self._current_prices = (current_prices if current_prices is not None else BarData())
-        self._portfolio_activity = list[dict]()
+        self._current_prices = (
+            current_prices if current_prices is not None else BarData()
+        )
+        self._recorder = ActivityRecorder()
+        # Latest close and market value of each invested symbol that has been
+        # priced, the running total of those values and symbols never priced
+        self._marks = dict[str, float]()
+        self._values = dict[str, float]()
+        self._asset_value = 0
+        self._unpriced = set[str]()
+        for symbol in self._current_positions:
+            self._mark(symbol, self._latest_close(symbol))
 
     @override
     def cash(self) -> float:
@@ -96,104 +250,183 @@ class Portfolio(PortfolioView):
 
     @override
     def asset_value(self) -> float:
-        # Your implementation
-        total_value = 0
-        for position in self._current_positions.values():
-            if(position.symbol in self._current_prices.symbols()):
-                price = self._current_prices[position.symbol].close
-                value = position.value(price)
-                total_value += value
-            else:
-                raise RuntimeError("Current Prices not Updated")
-        return total_value
-            
-            
-        
+        if self._unpriced:
+            raise RuntimeError(f"No prices for {sorted(self._unpriced)}")
+        return self._asset_value
 
     @override
     def asset_value_of(self, symbol: str) -> float:
-        # Your implementation
-        if self.is_invested_in(symbol):
-            if(symbol in self._current_prices.symbols()):
-                price = self._current_prices[symbol].close
-                value = self._current_positions[symbol].value(price)
-                return value
-            else:
-                raise RuntimeError("Symbol Not In Prices.")
-        else:
-                raise ValueError("Symbol Not in Positions")
+        if not self.is_invested_in(symbol):
+            raise ValueError(f"Not invested in {symbol}")
+        if symbol in self._unpriced:
+            raise RuntimeError(f"No prices for {symbol}")
+        return self._values[symbol]
 
     @override
     def value(self) -> float:
-        # Your implementation
         return self.asset_value() + self.cash()
 
     @override
     def as_of(self) -> datetime:
-        # Your implementation
         return self._current_prices.as_of
 
     @override
     def is_invested(self) -> bool:
-        # Your implementation
         return len(self._current_positions) != 0
 
     @override
     def is_invested_in(self, symbol: str) -> bool:
-        # Your implementation
-        return symbol in self._current_positions.keys()
+        return symbol in self._current_positions
 
     @override
     def position(self, symbol) -> Position:
-        # Your implementation
-        if symbol in self._current_positions.keys():
+        if symbol in self._current_positions:
             return self._current_positions[symbol]
         else:
-            raise ValueError("Symbol not in Positions")
+            raise ValueError(f"Not invested in {symbol}")
 
     @override
     def activity(self) -> PortfolioActivity:
-        return PortfolioActivity(self._portfolio_activity)
+        return PortfolioActivity(self._recorder)
 
     def on_data(self, data: BarData) -> None:
         """Cache latest data to use in calculating latest values"""
         self._current_prices = data
-        symbols = list(self._current_positions.keys())
-        positions = list(self._current_positions.values())
-        record = {}
-        record["timestamp"] = self.as_of()
-        record["cash"] = self.cash()
-        record["symbols"] = symbols
-        record["quantities"] = [p.qty for p in positions]
-        record["prices"] = [data[sym].close for sym in symbols]
-        record["asset_values"] = [self.asset_value_of(sym) for sym in symbols]
-        record["asset_value"] = self.asset_value()
-        record["value"] = self.value()
-        self._portfolio_activity.append(record)
-
-    def on_fill(self, symbol: str, price: float, qty: float) -> None:
+        if isinstance(data, ArrayBarData):
+            # Read marks off the close vector rather than through bar views
+            index, closes = data.index, data.closes()
+            for symbol in self._current_positions:
+                column = index.get(symbol)
+                if column is not None:
+                    self._mark(symbol, closes[column].item())
+        else:
+            for symbol in self._current_positions:
+                bar = data.get(symbol)
+                if bar is not None:
+                    self._mark(symbol, bar.close)
+        asset_value = self._asset_value if not self._unpriced else np.nan
+        value = asset_value + self._cash
+        self._recorder.observe(value)
+        if self._record_mode == RecordMode.NONE or not self._sample(data.as_of):
+            return
+        if self._record_mode == RecordMode.EQUITY:
+            self._recorder.append(data.as_of, self._cash, asset_value, value)
+            return
+        symbols = list(self._current_positions)
+        self._recorder.append(
+            data.as_of,
+            self._cash,
+            asset_value,
+            value,
+            symbols,
+            [self._current_positions[s].qty for s in symbols],
+            [self._marks.get(s, np.nan) for s in symbols],
+        )
+
+    def _sample(self, as_of: datetime) -> bool:
+        """Whether the current bar falls on the sampling schedule"""
+        bar = self._bars
+        self._bars += 1
+        if bar % self._sample_every:
+            return False
+        if self._sample_on is None:
+            return True
+        key = _CALENDAR_KEYS[self._sample_on](as_of)
+        if key == self._last_key:
+            return False
+        self._last_key = key
+        return True
+
+    def on_fill(self, symbol: str, price: float, qty: float, fee: float = 0.0) -> None:
         """Update portfolio with a fill information (negative qty indicates
-        sell). If a fill takes the quantity down to 0 (within tolerance) it
-        should be removed from tracking"""
-
-        # Your implementation
-        if not self.is_invested_in(symbol): # new stock purchase
-            self._current_positions[symbol] = Position(symbol,qty)
-            self._cash -= price*qty 
-        elif qty <= 0:
-            position = self._current_positions[symbol]
-            new_quantitiy = position.qty + qty
-            self._current_positions[symbol] = Position(position.symbol, new_quantitiy)
-            if(new_quantitiy==0):
-                self._current_positions.pop(symbol)
-            if new_quantitiy < 0: #insufficient qty
-                raise RuntimeError("Fill Attempted With Insufficient Quantity")
-            self._cash -= price*qty
-        elif qty > 0:
-            position = self._current_positions[symbol]
-            new_quantitiy = position.qty + qty
-            self._current_positions[symbol] = Position(position.symbol, new_quantitiy)
-            self._cash -= price*qty
-                
-                
-                
+        sell), paying fee on top. If a fill takes the quantity down to 0
+        (within tolerance) it should be removed from tracking"""
+        self._check_fill(symbol, qty)
+        self._cash -= price * qty + fee
+        self._apply_fill(symbol, qty)
+
+    def on_fills(self, reports: Sequence[ExecutionReport]) -> None:
+        """Update portfolio with all fills of a bar at once. Cash is debited
+        fill by fill, as ``on_fill`` would, while positions move by their net
+        quantity so each symbol is updated and revalued once. Nothing changes
+        if any symbol would be oversold."""
+        net = dict[str, float]()
+        for report in reports:
+            symbol = report.order.symbol
+            net[symbol] = net.get(symbol, 0) + report.last_quantity
+        for symbol, qty in net.items():
+            self._check_fill(symbol, qty)
+        for report in reports:
+            self._cash -= report.last_price * report.last_quantity + report.fee
+        for symbol, qty in net.items():
+            if qty != 0 or symbol in self._current_positions:
+                self._apply_fill(symbol, qty)
+
+    def on_corporate_action(self, action: CorporateAction) -> None:
+        """Apply a dividend and/or split going ex before the bar's prices
+        arrive. Dividends are paid on the shares held, splits scale the
+        position and its mark so its value is unchanged."""
+        position = self._current_positions.get(action.symbol)
+        if position is None:
+            return
+        if action.dividend:
+            self._cash += action.dividend * position.qty
+        if action.split > 0 and action.split != 1:
+            self._current_positions[action.symbol] = Position(
+                position.symbol, position.qty * action.split
+            )
+            mark = self._marks.get(action.symbol)
+            if mark is not None:
+                self._marks[action.symbol] = mark / action.split
+                self._revalue(action.symbol, mark / action.split)
+
+    def _check_fill(self, symbol: str, qty: float) -> None:
+        """Raise if a fill would sell more than an existing position holds,
+        beyond rounding"""
+        position = self._current_positions.get(symbol)
+        if (
+            position is not None
+            and qty <= 0
+            and position.qty + qty < -self._zero_tolerance
+        ):
+            raise RuntimeError("Fill Attempted With Insufficient Quantity")
+
+    def _apply_fill(self, symbol: str, qty: float) -> None:
+        position = self._current_positions.get(symbol)
+        if position is None:
+            # New position, priced off the latest data if there is any
+            self._current_positions[symbol] = Position(symbol, qty)
+            self._mark(symbol, self._latest_close(symbol))
+            return
+        new_quantity = position.qty + qty
+        if abs(new_quantity) <= self._zero_tolerance:
+            self._current_positions.pop(symbol)
+            self._values.pop(symbol, None)
+            # Re-sum rather than subtract so residue from the running updates
+            # doesn't outlive the positions
+            self._asset_value = math.fsum(self._values.values())
+            self._marks.pop(symbol, None)
+            self._unpriced.discard(symbol)
+            return
+        self._current_positions[symbol] = Position(position.symbol, new_quantity)
+        if symbol in self._marks:
+            self._revalue(symbol, self._marks[symbol])
+
+    def _latest_close(self, symbol: str) -> Optional[float]:
+        bar = self._current_prices.get(symbol)
+        return bar.close if bar is not None else None
+
+    def _mark(self, symbol: str, close: Optional[float]) -> None:
+        """Mark symbol to a close. Missing closes keep the previous mark."""
+        if close is None or np.isnan(close):
+            if symbol not in self._marks:
+                self._unpriced.add(symbol)
+            return
+        self._unpriced.discard(symbol)
+        self._marks[symbol] = close
+        self._revalue(symbol, close)
+
+    def _revalue(self, symbol: str, price: float) -> None:
+        value = self._current_positions[symbol].value(price)
+        self._asset_value += value - self._values.get(symbol, 0)
+        self._values[symbol] = value
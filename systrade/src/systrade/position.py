@@ -1,6 +1,8 @@
 class Position:
     """Represents some asset amount currently invested"""
 
+    __slots__ = ("symbol", "qty")
+
     def __init__(self, symbol: str, qty: float) -> None:
         self.symbol = symbol
         self.qty = qty
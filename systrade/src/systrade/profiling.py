@@ -0,0 +1,126 @@
+import time
+from dataclasses import dataclass
+from enum import IntEnum
+from typing import Optional
+
+import numpy as np
+
+# Histogram bucket k counts latencies in [2^(k-1), 2^k) nanoseconds, bucket 0
+# counts zero latencies
+_BUCKETS = 64
+
+
+class Stage(IntEnum):
+    """Stages of an engine loop iteration"""
+
+    FEED = 0
+    BROKER = 1
+    FILLS = 2
+    PORTFOLIO = 3
+    STRATEGY = 4
+
+
+@dataclass(init=True, repr=True, eq=True)
+class StageProfile:
+    """Time spent in one stage of the engine loop"""
+
+    name: str
+    calls: int
+    seconds: float
+    histogram: Optional[np.ndarray] = None
+
+    @property
+    def mean(self) -> float:
+        """Mean seconds per call"""
+        return self.seconds / self.calls if self.calls else 0.0
+
+
+@dataclass(init=True, repr=True, eq=True)
+class ProfileReport:
+    """Per stage timings of an engine run"""
+
+    bars: int
+    seconds: float
+    stages: list[StageProfile]
+
+    @property
+    def bars_per_sec(self) -> float:
+        return self.bars / self.seconds if self.seconds else 0.0
+
+    def stage(self, stage: Stage) -> StageProfile:
+        return self.stages[stage]
+
+    @staticmethod
+    def bucket_edges() -> np.ndarray:
+        """Lower edge of each histogram bucket in seconds"""
+        edges = np.zeros(_BUCKETS)
+        edges[1:] = 2.0 ** np.arange(_BUCKETS - 1) / 1e9
+        return edges
+
+    def __str__(self) -> str:
+        lines = [
+            f"{self.bars} bars in {self.seconds:.3f}s "
+            f"({self.bars_per_sec:,.0f} bars/sec)",
+            f"{'stage':<10}{'calls':>10}{'total s':>12}{'mean us':>12}{'share':>8}",
+        ]
+        for stage in self.stages:
+            share = stage.seconds / self.seconds if self.seconds else 0.0
+            lines.append(
+                f"{stage.name:<10}{stage.calls:>10}{stage.seconds:>12.4f}"
+                f"{stage.mean * 1e6:>12.2f}{share:>8.1%}"
+            )
+        return "\n".join(lines)
+
+
+class Profiler:
+    """Accumulates wall time and call counts of engine loop stages, and
+    optionally a log2 histogram of per call latencies"""
+
+    def __init__(self, histograms: bool = False) -> None:
+        """Profiler initializer
+
+        Parameters
+        ----------
+        histograms, optional
+            Whether to keep a latency histogram of each stage
+        """
+        self._histograms = histograms
+        self._nanos = [0] * len(Stage)
+        self._calls = [0] * len(Stage)
+        self._buckets = [[0] * _BUCKETS for _ in Stage]
+        self._bars = 0
+        self._started = 0
+        self._elapsed = 0
+
+    def start(self) -> None:
+        self._started = time.perf_counter_ns()
+
+    def stop(self) -> None:
+        self._elapsed += time.perf_counter_ns() - self._started
+
+    def record(self, stage: Stage, nanos: int) -> None:
+        """Add a call to stage that took nanos"""
+        self._nanos[stage] += nanos
+        self._calls[stage] += 1
+        if self._histograms:
+            self._buckets[stage][min(nanos.bit_length(), _BUCKETS - 1)] += 1
+
+    def record_bar(self) -> None:
+        self._bars += 1
+
+    def report(self) -> ProfileReport:
+        return ProfileReport(
+            bars=self._bars,
+            seconds=self._elapsed / 1e9,
+            stages=[
+                StageProfile(
+                    name=stage.name.lower(),
+                    calls=self._calls[stage],
+                    seconds=self._nanos[stage] / 1e9,
+                    histogram=(
+                        np.array(self._buckets[stage]) if self._histograms else None
+                    ),
+                )
+                for stage in Stage
+            ],
+        )
@@ -0,0 +1,194 @@
+from datetime import datetime
+from typing import Optional, Sequence
+
+import numpy as np
+
+# Range of datetimes representable as datetime64[ns], anything outside (such
+# as the datetime.min default of BarData) is recorded as NaT
+_EARLIEST = datetime(1678, 1, 1)
+_LATEST = datetime(2262, 1, 1)
+
+
+class ActivityRecorder:
+    """Preallocated, growable columnar record of portfolio activity.
+
+    Per period values (timestamp, cash, asset value, value) live in typed
+    arrays. Positions are stored sparsely as one (period, symbol, quantity,
+    price) entry per position held at each period, with symbols encoded
+    against a symbol dictionary. Arrays grow geometrically so appends are
+    amortized O(1).
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self._size = 0
+        self._timestamps = np.empty(capacity, dtype="datetime64[ns]")
+        self._cash = np.empty(capacity)
+        self._asset_value = np.empty(capacity)
+        self._value = np.empty(capacity)
+        self._entries = 0
+        self._period = np.empty(capacity, dtype=np.int64)
+        self._code = np.empty(capacity, dtype=np.int32)
+        self._quantity = np.empty(capacity)
+        self._price = np.empty(capacity)
+        self._symbols = list[str]()
+        self._symbol_codes = dict[str, int]()
+        self._first_value: Optional[float] = None
+        self._last_value: Optional[float] = None
+
+    @classmethod
+    def from_arrays(
+        cls,
+        timestamps: np.ndarray,
+        cash: np.ndarray,
+        asset_value: np.ndarray,
+        value: np.ndarray,
+        period: np.ndarray,
+        code: np.ndarray,
+        quantity: np.ndarray,
+        price: np.ndarray,
+        symbols: Sequence[str],
+    ) -> "ActivityRecorder":
+        """Build a recorder in one go from whole columns. Position entries must
+        be grouped by period in ascending order."""
+        recorder = cls(capacity=0)
+        recorder._size = len(timestamps)
+        recorder._timestamps = np.asarray(timestamps, dtype="datetime64[ns]")
+        recorder._cash = np.asarray(cash, dtype=float)
+        recorder._asset_value = np.asarray(asset_value, dtype=float)
+        recorder._value = np.asarray(value, dtype=float)
+        recorder._entries = len(period)
+        recorder._period = np.asarray(period, dtype=np.int64)
+        recorder._code = np.asarray(code, dtype=np.int32)
+        recorder._quantity = np.asarray(quantity, dtype=float)
+        recorder._price = np.asarray(price, dtype=float)
+        recorder._symbols = list(symbols)
+        recorder._symbol_codes = {sym: i for i, sym in enumerate(symbols)}
+        if len(value):
+            recorder._first_value = float(value[0])
+            recorder._last_value = float(value[-1])
+        return recorder
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getstate__(self) -> dict:
+        # Unused capacity isn't worth pickling, arrays grow again on append
+        state = self.__dict__.copy()
+        for name in ("_timestamps", "_cash", "_asset_value", "_value"):
+            state[name] = state[name][: self._size].copy()
+        for name in ("_period", "_code", "_quantity", "_price"):
+            state[name] = state[name][: self._entries].copy()
+        return state
+
+    def frozen(self) -> "ActivityRecorder":
+        """Copy of what has been recorded so far, taken in O(symbols). Recorded
+        rows are never written again, so the copy shares the arrays and can
+        be read (e.g. pickled on another thread) while this one keeps
+        appending."""
+        # Not copy.copy, that would go through __getstate__ and copy the arrays
+        frozen = ActivityRecorder.__new__(ActivityRecorder)
+        frozen.__dict__.update(self.__dict__)
+        frozen._symbols = self._symbols.copy()
+        frozen._symbol_codes = self._symbol_codes.copy()
+        return frozen
+
+    @property
+    def symbols(self) -> list[str]:
+        """Symbol dictionary that position codes index into"""
+        return self._symbols
+
+    @property
+    def first_value(self) -> Optional[float]:
+        """Value of the first period observed, recorded or not"""
+        return self._first_value
+
+    @property
+    def last_value(self) -> Optional[float]:
+        """Value of the latest period observed, recorded or not"""
+        return self._last_value
+
+    def observe(self, value: float) -> None:
+        """Track the value of a period, whether or not it gets recorded"""
+        if self._first_value is None:
+            self._first_value = value
+        self._last_value = value
+
+    def append(
+        self,
+        timestamp: datetime,
+        cash: float,
+        asset_value: float,
+        value: float,
+        symbols: Sequence[str] = (),
+        quantities: Sequence[float] = (),
+        prices: Sequence[float] = (),
+    ) -> None:
+        """Record a period along with the positions held during it"""
+        self.observe(value)
+        n = self._size
+        if n == len(self._timestamps):
+            self._grow_periods(n + 1)
+        if timestamp.tzinfo is not None:
+            # Wall clock time, like the bar store
+            timestamp = timestamp.replace(tzinfo=None)
+        if _EARLIEST <= timestamp < _LATEST:
+            self._timestamps[n] = np.datetime64(timestamp, "ns")
+        else:
+            self._timestamps[n] = np.datetime64("NaT", "ns")
+        self._cash[n] = cash
+        self._asset_value[n] = asset_value
+        self._value[n] = value
+        self._size += 1
+        if not symbols:
+            return
+        k = len(symbols)
+        m = self._entries
+        if m + k > len(self._period):
+            self._grow_entries(m + k)
+        codes = self._symbol_codes
+        for symbol in symbols:
+            if symbol not in codes:
+                codes[symbol] = len(self._symbols)
+                self._symbols.append(symbol)
+        self._period[m : m + k] = n
+        self._code[m : m + k] = [codes[symbol] for symbol in symbols]
+        self._quantity[m : m + k] = quantities
+        self._price[m : m + k] = prices
+        self._entries += k
+
+    def timestamps(self) -> np.ndarray:
+        return self._timestamps[: self._size]
+
+    def cash(self) -> np.ndarray:
+        return self._cash[: self._size]
+
+    def asset_value(self) -> np.ndarray:
+        return self._asset_value[: self._size]
+
+    def value(self) -> np.ndarray:
+        return self._value[: self._size]
+
+    def positions(self) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Sparse positions as (period, symbol code, quantity, price) arrays"""
+        m = self._entries
+        return self._period[:m], self._code[:m], self._quantity[:m], self._price[:m]
+
+    def _grow_periods(self, needed: int) -> None:
+        capacity = max(needed, 2 * len(self._timestamps), 16)
+        self._timestamps = _resized(self._timestamps, capacity)
+        self._cash = _resized(self._cash, capacity)
+        self._asset_value = _resized(self._asset_value, capacity)
+        self._value = _resized(self._value, capacity)
+
+    def _grow_entries(self, needed: int) -> None:
+        capacity = max(needed, 2 * len(self._period), 16)
+        self._period = _resized(self._period, capacity)
+        self._code = _resized(self._code, capacity)
+        self._quantity = _resized(self._quantity, capacity)
+        self._price = _resized(self._price, capacity)
+
+
+def _resized(array: np.ndarray, capacity: int) -> np.ndarray:
+    result = np.empty(capacity, dtype=array.dtype)
+    result[: len(array)] = array
+    return result
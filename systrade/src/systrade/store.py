@@ -0,0 +1,299 @@
+import json
+import mmap
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+# Trailing UTC offset on timestamps, e.g. "2005-02-01 00:00:00-05:00"
+_UTC_OFFSET = r"[+-]\d{2}:?\d{2}$"
+
+# Binary store layout: magic, little endian uint64 header length, JSON header
+# and then each array at a 64 byte aligned offset given in the header. Bars are
+# one row major (bar x OHLCV) float64 array, corporate actions and adjustment
+# factors are (bar x 2) float64 arrays.
+_MAGIC = b"SYSTBAR1"
+_ALIGN = 64
+
+
+def _aligned(position: int) -> int:
+    return -(-position // _ALIGN) * _ALIGN
+
+
+def to_wall_clock(dates: pd.Series) -> np.ndarray:
+    """Convert a column of timestamps to exchange local wall clock time. UTC
+    offsets are dropped rather than converted so daylight savings changes don't
+    move bars onto a different date."""
+    if pd.api.types.is_string_dtype(dates) or dates.dtype == object:
+        dates = pd.to_datetime(
+            dates.astype(str).str.replace(_UTC_OFFSET, "", regex=True)
+        )
+    else:
+        dates = pd.to_datetime(dates)
+        if dates.dt.tz is not None:
+            dates = dates.dt.tz_localize(None)
+    return dates.to_numpy(dtype="datetime64[ns]")
+
+
+def to_nanos(value: datetime | str) -> int:
+    """Wall clock nanoseconds since the epoch for a datetime or date string"""
+    if isinstance(value, str):
+        value = datetime.strptime(value, "%Y-%m-%d")
+    return int(np.datetime64(value.replace(tzinfo=None), "ns").view(np.int64))
+
+
+class BarStore:
+    """Date sorted, symbol keyed columnar bar storage.
+
+    Rows are sorted by timestamp and then by symbol code. Rows for the i-th
+    distinct timestamp live at ``offsets[i]:offsets[i + 1]`` so any point in
+    time can be located without scanning the data.
+    """
+
+    FIELDS = ("open", "high", "low", "close", "volume")
+    ACTIONS = ("dividend", "split")
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        offsets: np.ndarray,
+        symbols: list[str],
+        codes: np.ndarray,
+        bars: np.ndarray,
+        actions: Optional[np.ndarray] = None,
+    ) -> None:
+        """Store initializer
+
+        Parameters
+        ----------
+        timestamps
+            Distinct wall clock timestamps as int64 nanoseconds, ascending
+        offsets
+            Row offsets for each timestamp, one longer than timestamps
+        symbols
+            Symbol dictionary, a row's code indexes into this list
+        codes
+            Symbol code of each row
+        bars
+            Float64 array with a row per bar and a column for each of
+            ``FIELDS``, row major so a time period's bars can be gathered in
+            one pass
+        actions, optional
+            Float64 array with a row per bar and a column for each of
+            ``ACTIONS`` (split 0 meaning none), no corporate actions by default
+        """
+        self.timestamps = timestamps
+        self.offsets = offsets
+        self.symbols = symbols
+        self.codes = codes
+        self.bars = bars
+        self.columns = {field: bars[:, j] for j, field in enumerate(self.FIELDS)}
+        self.actions = (
+            actions if actions is not None else np.zeros((len(bars), len(self.ACTIONS)))
+        )
+        self._adjustments: Optional[np.ndarray] = None
+        self._symbol_ids = {sym: i for i, sym in enumerate(symbols)}
+        self._symbol_rows: Optional[np.ndarray] = None
+        self._symbol_offsets: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "BarStore":
+        """Build a store from a frame with the CSV layout
+        (Date,Open,High,Low,Close,Volume,...,Symbol)"""
+        stamps = to_wall_clock(df["Date"]).view(np.int64)
+        symbols, codes = np.unique(
+            df["Symbol"].to_numpy(dtype=str), return_inverse=True
+        )
+        codes = codes.astype(np.int32)
+        order = np.lexsort((codes, stamps))
+        stamps = stamps[order]
+        timestamps, starts = np.unique(stamps, return_index=True)
+        offsets = np.append(starts, len(stamps)).astype(np.int64)
+        columns = [field.capitalize() for field in cls.FIELDS]
+        bars = df[columns].to_numpy(dtype=np.float64)[order]
+        actions = np.zeros((len(df), len(cls.ACTIONS)))
+        for j, column in enumerate(["Dividends", "Stock Splits"]):
+            if column in df:
+                actions[:, j] = df[column].to_numpy(dtype=np.float64)[order]
+        np.nan_to_num(actions, copy=False)
+        return cls(timestamps, offsets, symbols.tolist(), codes[order], bars, actions)
+
+    @classmethod
+    def from_csv(cls, path: str | Path) -> "BarStore":
+        """Parse a CSV file once into a store"""
+        return cls.from_frame(pd.read_csv(path))
+
+    @classmethod
+    def open(cls, path: str | Path) -> "BarStore":
+        """Memory map a store written by ``save``. Arrays are read-only views of
+        the mapped file so processes opening the same store share its pages."""
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if buffer[: len(_MAGIC)] != _MAGIC:
+            raise ValueError(f"{path} is not a bar store")
+        start = len(_MAGIC) + 8
+        header_len = int.from_bytes(buffer[len(_MAGIC) : start], "little")
+        header = json.loads(buffer[start : start + header_len])
+        base = _aligned(start + header_len)
+        arrays = {
+            name: np.frombuffer(
+                buffer, dtype=dtype, count=int(np.prod(shape)), offset=base + offset
+            ).reshape(shape)
+            for name, (offset, dtype, shape) in header["arrays"].items()
+        }
+        store = cls(
+            arrays.pop("timestamps"),
+            arrays.pop("offsets"),
+            header["symbols"],
+            arrays.pop("codes"),
+            arrays.pop("bars"),
+            arrays.pop("actions", None),
+        )
+        store._symbol_rows = arrays.pop("symbol_rows")
+        store._symbol_offsets = arrays.pop("symbol_offsets")
+        store._adjustments = arrays.pop("adjustments", None)
+        return store
+
+    def save(self, path: str | Path) -> None:
+        """Write the store in its binary layout so it can be opened with
+        ``open``"""
+        symbol_rows, symbol_offsets = self.symbol_index()
+        arrays = {
+            "timestamps": self.timestamps,
+            "offsets": self.offsets,
+            "codes": self.codes,
+            "bars": self.bars,
+            "symbol_rows": symbol_rows,
+            "symbol_offsets": symbol_offsets,
+            "actions": self.actions,
+            "adjustments": self.adjustments(),
+        }
+        layout = {}
+        position = 0
+        for name, array in arrays.items():
+            layout[name] = [position, array.dtype.str, list(array.shape)]
+            position = _aligned(position + array.nbytes)
+        header = json.dumps({"symbols": self.symbols, "arrays": layout}).encode()
+        base = _aligned(len(_MAGIC) + 8 + len(header))
+        with open(path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for name, array in arrays.items():
+                f.seek(base + layout[name][0])
+                f.write(np.ascontiguousarray(array).tobytes())
+            f.truncate(base + position)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def has_symbol(self, symbol: str) -> bool:
+        return symbol in self._symbol_ids
+
+    def symbol_id(self, symbol: str) -> int:
+        """Code of symbol, raises KeyError if it isn't in the store"""
+        return self._symbol_ids[symbol]
+
+    def symbol_ids(self, symbols: Iterable[str]) -> np.ndarray:
+        """Codes of several symbols, raises KeyError if any aren't in the store"""
+        return np.fromiter((self._symbol_ids[sym] for sym in symbols), dtype=np.int32)
+
+    def symbol_index(self) -> tuple[np.ndarray, np.ndarray]:
+        """Per symbol row index. Rows of symbol code c in time order are
+        ``rows[offsets[c]:offsets[c + 1]]``"""
+        if self._symbol_rows is None or self._symbol_offsets is None:
+            self._symbol_rows = np.argsort(self.codes, kind="stable")
+            counts = np.bincount(self.codes, minlength=len(self.symbols))
+            self._symbol_offsets = np.concatenate(([0], np.cumsum(counts)))
+        return self._symbol_rows, self._symbol_offsets
+
+    def adjustments(self) -> np.ndarray:
+        """(bar x 2) back adjustment factors for prices and volumes, computed
+        once per store over each symbol's history. Multiplying prices and
+        dividing volumes by them makes bars before a split or dividend
+        comparable with the latest ones."""
+        if self._adjustments is None:
+            self._adjustments = self._compute_adjustments()
+        return self._adjustments
+
+    def _compute_adjustments(self) -> np.ndarray:
+        factors = np.ones((len(self.bars), 2))
+        if not self.actions.any():
+            return factors
+        symbol_rows, symbol_offsets = self.symbol_index()
+        for code in range(len(self.symbols)):
+            rows = symbol_rows[symbol_offsets[code] : symbol_offsets[code + 1]]
+            dividends = self.actions[rows, 0]
+            splits = self.actions[rows, 1]
+            if not (dividends.any() or splits.any()):
+                continue
+            # An event on a bar scales all bars before it
+            split_scale = np.where(splits > 0, 1 / np.where(splits > 0, splits, 1), 1)
+            previous_close = np.empty(len(rows))
+            previous_close[0] = np.nan
+            previous_close[1:] = self.bars[rows[:-1], 3]
+            paid = (dividends > 0) & (previous_close > 0)
+            dividend_scale = np.ones(len(rows))
+            dividend_scale[paid] = 1 - dividends[paid] / previous_close[paid]
+            for j, scale in enumerate([split_scale * dividend_scale, split_scale]):
+                # Product of the scales of every later event
+                later = np.cumprod(scale[::-1])[::-1]
+                factors[rows[:-1], j] = later[1:]
+        return factors
+
+    def datetime_at(self, i: int) -> datetime:
+        """Timestamp of the i-th distinct time period"""
+        return pd.Timestamp(int(self.timestamps[i]))
+
+    def search(self, value: datetime | str, side: str = "left") -> int:
+        """Index of the first time period at (or after, for side="right") value"""
+        return int(np.searchsorted(self.timestamps, to_nanos(value), side=side))
+
+    def locate(self, i: int, ids: np.ndarray) -> np.ndarray:
+        """Rows holding the bars of symbol codes ``ids`` (sorted ascending) at the
+        i-th time period, -1 where a symbol has no bar"""
+        lo, hi = self.offsets[i], self.offsets[i + 1]
+        rows = lo + np.searchsorted(self.codes[lo:hi], ids)
+        found = rows < hi
+        found[found] = self.codes[rows[found]] == ids[found]
+        return np.where(found, rows, -1)
+
+    def values_at(self, i: int, ids: np.ndarray) -> np.ndarray:
+        """(symbol x OHLCV) array of symbol codes ``ids`` (sorted ascending) at
+        the i-th time period, NaN where a symbol has no bar"""
+        rows = self.locate(i, ids)
+        values = self.bars[rows]
+        values[rows < 0] = np.nan
+        return values
+
+    def matrix(self, ids: np.ndarray, begin: int, end: int) -> dict[str, np.ndarray]:
+        """Dense (time period x symbol) matrix of each of ``FIELDS`` over periods
+        ``begin:end`` with a column per symbol code in ``ids``. Missing bars are
+        NaN."""
+        lo, hi = self.offsets[begin], self.offsets[end]
+        n, width = end - begin, len(ids)
+        bars = self.bars[lo:hi]
+        lookup = np.full(len(self.symbols), -1, dtype=np.int64)
+        lookup[ids] = np.arange(width)
+        cols = lookup[self.codes[lo:hi]]
+        keep = cols >= 0
+        if len(bars) == n * width and keep.all():
+            # Every period has a bar for every symbol, rows are in matrix order
+            grid = bars
+        else:
+            periods = np.repeat(np.arange(n), np.diff(self.offsets[begin : end + 1]))
+            grid = np.full((n * width, len(self.FIELDS)), np.nan)
+            grid[periods[keep] * width + cols[keep]] = bars[keep]
+        # Transpose in one pass rather than gathering each field separately
+        fields = np.ascontiguousarray(grid.T).reshape(len(self.FIELDS), n, width)
+        return dict(zip(self.FIELDS, fields))
+
+
+def convert_csv(csv_path: str | Path, store_path: str | Path) -> BarStore:
+    """One-shot conversion of a CSV file in the feed layout
+    (Date,Open,High,Low,Close,Volume,Dividends,Stock Splits,Symbol) to a binary
+    store, returns the memory mapped result"""
+    BarStore.from_csv(csv_path).save(store_path)
+    return BarStore.open(store_path)
@@ -1,11 +1,13 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Callable, override
+from typing import Callable, Iterable, Optional, Sequence, override
 
 from systrade.data import BarData, ExecutionReport, Order, OrderType
 from systrade.portfolio import PortfolioView
 
 SubscribeHook = Callable[[str], None]
+SubscribeManyHook = Callable[[Iterable[str]], None]
+SubscribeAllHook = Callable[[], None]
 PostOrderHook = Callable[[Order], None]
 
 
@@ -13,6 +15,8 @@ class Strategy(ABC):
     def __init__(self) -> None:
         self._subscribe_hook: Callable[[str], None] = lambda _: None
         self._post_order_hook: Callable[[Order], None] = lambda _: None
+        self._subscribe_many_hook: Optional[SubscribeManyHook] = None
+        self._subscribe_all_hook: Optional[SubscribeAllHook] = None
         self._portfolio: PortfolioView | None = None
         self._current_order_id = 1
         self._current_time: datetime
@@ -22,6 +26,8 @@ class Strategy(ABC):
         subscribe_hook: SubscribeHook,
         post_order_hook: PostOrderHook,
         portfolio: PortfolioView,
+        subscribe_many_hook: Optional[SubscribeManyHook] = None,
+        subscribe_all_hook: Optional[SubscribeAllHook] = None,
     ) -> None:
         """Sets up interface for working with external dependencies. This should
         be called by clients orchestrating a strategy.
@@ -34,10 +40,39 @@ class Strategy(ABC):
             Callback to submit an order
         portfolio
             A portfolio view to access positions, etc.
+        subscribe_many_hook, optional
+            Callback to subscribe to several symbols at once, subscribe_hook is
+            called for each symbol without one
+        subscribe_all_hook, optional
+            Callback to subscribe to every symbol with data
         """
         self._subscribe_hook = subscribe_hook
         self._post_order_hook = post_order_hook
         self._portfolio = portfolio
+        self._subscribe_many_hook = subscribe_many_hook
+        self._subscribe_all_hook = subscribe_all_hook
+
+    def __getstate__(self) -> dict:
+        """Pickle strategy state without the hooks into its orchestrator, they
+        are set up again with ``setup_context``"""
+        state = self.__dict__.copy()
+        for hook in (
+            "_subscribe_hook",
+            "_post_order_hook",
+            "_subscribe_many_hook",
+            "_subscribe_all_hook",
+            "_portfolio",
+        ):
+            state.pop(hook, None)
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self._subscribe_hook = lambda _: None
+        self._post_order_hook = lambda _: None
+        self._subscribe_many_hook = None
+        self._subscribe_all_hook = None
+        self._portfolio = None
 
     @property
     def portfolio(self) -> PortfolioView:
@@ -60,14 +95,46 @@ class Strategy(ABC):
         """Subscribe to symbol"""
         self._subscribe_hook(symbol)
 
+    def subscribe_many(self, symbols: Iterable[str]) -> None:
+        """Subscribe to several symbols in one go"""
+        if self._subscribe_many_hook is None:
+            for symbol in symbols:
+                self._subscribe_hook(symbol)
+        else:
+            self._subscribe_many_hook(symbols)
+
+    def subscribe_all(self) -> None:
+        """Subscribe to every symbol the feed has data for"""
+        if self._subscribe_all_hook is None:
+            raise NotImplementedError("Can't subscribe to all symbols")
+        self._subscribe_all_hook()
+
     def post_market_order(self, symbol: str, quantity: float) -> None:
         """Post order to broker"""
+        self._post_order(symbol, quantity, OrderType.MARKET)
+
+    def post_limit_order(self, symbol: str, quantity: float, price: float) -> None:
+        """Post an order that only fills at price or better"""
+        self._post_order(symbol, quantity, OrderType.LIMIT, price)
+
+    def post_stop_order(self, symbol: str, quantity: float, price: float) -> None:
+        """Post an order that becomes a market order once price trades"""
+        self._post_order(symbol, quantity, OrderType.STOP, price)
+
+    def _post_order(
+        self,
+        symbol: str,
+        quantity: float,
+        type: OrderType,
+        price: Optional[float] = None,
+    ) -> None:
         order = Order(
             id=str(self._current_order_id),
             symbol=symbol,
             quantity=quantity,
-            type=OrderType.MARKET,
+            type=type,
             submit_time=self.current_time,
+            price=price,
         )
         self._current_order_id += 1
         self._post_order_hook(order)
@@ -83,3 +150,9 @@ class Strategy(ABC):
     @abstractmethod
     def on_execution(self, report: ExecutionReport) -> None:
         """Called on an order update"""
+
+    def on_executions(self, reports: Sequence[ExecutionReport]) -> None:
+        """Called once per bar with all of its order updates. Calls
+        ``on_execution`` for each report unless overridden."""
+        for report in reports:
+            self.on_execution(report)
@@ -0,0 +1,154 @@
+import itertools
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime as dt
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Mapping, Optional, Sequence
+
+import numpy as np
+
+from systrade.broker import BacktestBroker, Broker
+from systrade.engine import Engine
+from systrade.feed import StoreFeed
+from systrade.portfolio import RecordMode
+from systrade.store import BarStore
+from systrade.strategy import Strategy
+
+StrategyFactory = Callable[..., Strategy]
+BrokerFactory = Callable[[], Broker]
+
+
+@dataclass(init=True, repr=True, eq=True)
+class RunSummary:
+    """Compact result of a single run in a sweep"""
+
+    params: dict[str, Any]
+    total_return: float
+    final_value: float
+    equity_curve: np.ndarray
+
+
+@dataclass(init=True, repr=True, eq=True)
+class _Job:
+    """Everything a worker needs to run one parameter combination"""
+
+    store_path: str
+    strategy_factory: StrategyFactory
+    broker_factory: BrokerFactory
+    params: dict[str, Any]
+    cash: float
+    record_mode: RecordMode
+    start: Optional[dt]
+    end: Optional[dt]
+
+
+def parameter_grid(grid: Mapping[str, Sequence[Any]]) -> list[dict[str, Any]]:
+    """Every combination of the parameter values in grid"""
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+@lru_cache(maxsize=None)
+def _open_store(path: str) -> BarStore:
+    """Memory map a store once per process, runs in the same worker share it"""
+    return BarStore.open(path)
+
+
+def _run(job: _Job) -> RunSummary:
+    feed = StoreFeed(_open_store(job.store_path), start=job.start, end=job.end)
+    engine = Engine(
+        feed,
+        job.broker_factory(),
+        job.strategy_factory(**job.params),
+        job.cash,
+        record_mode=job.record_mode,
+    )
+    engine.run()
+    activity = engine.portfolio.activity()
+    recorder = activity.recorder
+    if recorder.last_value is None:
+        # Nothing was replayed
+        total_return, final_value = 0.0, job.cash
+    else:
+        total_return, final_value = activity.total_return(), recorder.last_value
+    return RunSummary(
+        params=job.params,
+        total_return=total_return,
+        final_value=final_value,
+        equity_curve=recorder.value().copy(),
+    )
+
+
+def sweep(
+    path: str | Path,
+    strategy_factory: StrategyFactory,
+    grid: Mapping[str, Sequence[Any]],
+    cash: float,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    broker_factory: BrokerFactory = BacktestBroker,
+    processes: Optional[int] = None,
+    record_mode: RecordMode = RecordMode.EQUITY,
+) -> list[RunSummary]:
+    """Run an ``Engine`` for every combination of parameters in grid over a pool
+    of processes.
+
+    Bar data is converted at most once into a binary ``BarStore`` which every
+    worker memory maps, so the data is shared through the OS page cache rather
+    than copied into each process. Factories are sent to the workers by
+    pickling and so must be importable, e.g. module level functions or classes.
+
+    Parameters
+    ----------
+    path
+        Binary bar store or CSV file (converted to a temporary store)
+    strategy_factory
+        Called with each parameter combination as keyword arguments
+    grid
+        Values to try for each parameter
+    cash
+        Starting cash of each run
+    start, optional
+        When to start the replay, in YYYY-MM-DD format
+    end, optional
+        When to end the replay, in YYYY-MM-DD format
+    broker_factory, optional
+        Makes a fresh broker for each run
+    processes, optional
+        Number of worker processes, defaults to the number of CPUs. With 1
+        runs happen in the calling process.
+    record_mode, optional
+        Activity recorded by each run, by default just enough for the equity
+        curve. With ``RecordMode.NONE`` summaries have an empty equity curve.
+
+    Returns
+    -------
+        Run summaries in the order of ``parameter_grid(grid)``
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        if Path(path).suffix.lower() == ".csv":
+            store_path = Path(tmp) / "bars.bin"
+            BarStore.from_csv(path).save(store_path)
+            path = store_path
+        jobs = [
+            _Job(
+                store_path=str(path),
+                strategy_factory=strategy_factory,
+                broker_factory=broker_factory,
+                params=params,
+                cash=cash,
+                record_mode=record_mode,
+                start=dt.strptime(start, "%Y-%m-%d") if start else None,
+                end=dt.strptime(end, "%Y-%m-%d") if end else None,
+            )
+            for params in parameter_grid(grid)
+        ]
+        processes = processes or os.cpu_count() or 1
+        if processes == 1 or len(jobs) <= 1:
+            return [_run(job) for job in jobs]
+        with ProcessPoolExecutor(max_workers=min(processes, len(jobs))) as pool:
+            chunksize = max(1, len(jobs) // (4 * processes))
+            return list(pool.map(_run, jobs, chunksize=chunksize))
@@ -0,0 +1,197 @@
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, override
+
+import numpy as np
+
+from systrade.data import BarData
+from systrade.strategy import Strategy
+
+
+class _Window:
+    """Ring buffer of the latest cross sections, one row per bar"""
+
+    def __init__(self, length: int, width: int) -> None:
+        self.rows = np.full((length, width), np.nan)
+        self.next = 0
+        self.count = 0
+
+    def push(self, row: np.ndarray) -> np.ndarray:
+        """Add a cross section, returns the one it replaces (NaN until full)"""
+        evicted = self.rows[self.next].copy()
+        self.rows[self.next] = row
+        self.next = (self.next + 1) % len(self.rows)
+        self.count += 1
+        return evicted
+
+
+class Factor(ABC):
+    """Cross sectional score of every symbol in a bar, updated once per bar.
+    State is kept per column so the universe is expected to stay the same, a
+    new set of symbols resets it."""
+
+    def __init__(self) -> None:
+        self._symbols: Optional[list[str]] = None
+
+    def update(self, data: BarData) -> np.ndarray:
+        """Score of each of ``data.symbols()`` in order, NaN where there isn't
+        one"""
+        symbols = data.symbols()
+        # Array backed bars share one symbol list between bars, which makes
+        # the usual case an identity check
+        if symbols is not self._symbols:
+            symbols = symbols if isinstance(symbols, list) else list(symbols)
+            if symbols != self._symbols:
+                self._reset(len(symbols))
+            self._symbols = symbols
+        return self._update(data)
+
+    @abstractmethod
+    def _reset(self, width: int) -> None:
+        """Start over for a universe of width symbols"""
+
+    @abstractmethod
+    def _update(self, data: BarData) -> np.ndarray:
+        """Scores of a bar"""
+
+
+class Momentum(Factor):
+    """Return over the last lookback bars"""
+
+    def __init__(self, lookback: int) -> None:
+        if lookback < 1:
+            raise ValueError("lookback must be positive")
+        super().__init__()
+        self.lookback = lookback
+        self._closes = _Window(lookback, 0)
+
+    @override
+    def _reset(self, width: int) -> None:
+        self._closes = _Window(self.lookback, width)
+
+    @override
+    def _update(self, data: BarData) -> np.ndarray:
+        closes = data.closes()
+        return closes / self._closes.push(closes) - 1
+
+
+class DollarVolume(Factor):
+    """Average traded value (close x volume) over the last window bars,
+    missing bars count as no trading"""
+
+    def __init__(self, window: int) -> None:
+        if window < 1:
+            raise ValueError("window must be positive")
+        super().__init__()
+        self.window = window
+        self._values = _Window(window, 0)
+        self._total = np.zeros(0)
+
+    @override
+    def _reset(self, width: int) -> None:
+        self._values = _Window(self.window, width)
+        self._values.rows[:] = 0
+        self._total = np.zeros(width)
+
+    @override
+    def _update(self, data: BarData) -> np.ndarray:
+        traded = np.nan_to_num(data.closes() * data.volumes())
+        self._total += traded - self._values.push(traded)
+        if self._values.count < self.window:
+            return np.full(len(traded), np.nan)
+        return self._total / self.window
+
+
+@dataclass(init=True, repr=True, eq=False)
+class Ranking:
+    """Top ranked symbols of a bar, best first"""
+
+    as_of: datetime
+    symbols: list[str]
+    # Position of each ranked symbol in the bar's symbols
+    columns: np.ndarray
+    scores: np.ndarray
+
+
+class Ranker:
+    """Scores a universe every bar, drops illiquid symbols and keeps the top
+    k. Work per bar is linear in the number of symbols, no sorting besides the
+    k selected."""
+
+    def __init__(
+        self,
+        factor: Factor,
+        k: int,
+        min_price: Optional[float] = None,
+        min_dollar_volume: Optional[float] = None,
+        liquidity_window: int = 20,
+        ascending: bool = False,
+    ) -> None:
+        """Ranker initializer
+
+        Parameters
+        ----------
+        factor
+            Score to rank symbols by
+        k
+            Number of symbols to keep
+        min_price, optional
+            Only rank symbols closing at or above this price
+        min_dollar_volume, optional
+            Only rank symbols with at least this average traded value
+        liquidity_window, optional
+            Number of bars the traded value is averaged over
+        ascending, optional
+            Rank the lowest scores first instead of the highest
+        """
+        if k < 1:
+            raise ValueError("k must be positive")
+        self.factor = factor
+        self.k = k
+        self.min_price = min_price
+        self.min_dollar_volume = min_dollar_volume
+        self.ascending = ascending
+        self._liquidity = (
+            DollarVolume(liquidity_window) if min_dollar_volume is not None else None
+        )
+
+    def rank(self, data: BarData) -> Ranking:
+        scores = self.factor.update(data)
+        eligible = ~np.isnan(scores)
+        if self.min_price is not None:
+            eligible &= data.closes() >= self.min_price
+        if self._liquidity is not None:
+            eligible &= self._liquidity.update(data) >= self.min_dollar_volume
+        candidates = np.flatnonzero(eligible)
+        keys = scores[candidates] if self.ascending else -scores[candidates]
+        if len(candidates) > self.k:
+            top = np.argpartition(keys, self.k - 1)[: self.k]
+            candidates, keys = candidates[top], keys[top]
+        order = np.argsort(keys, kind="stable")
+        columns = candidates[order]
+        symbols = data.symbols()
+        if not isinstance(symbols, list):
+            symbols = list(symbols)
+        return Ranking(
+            as_of=data.as_of,
+            symbols=[symbols[j] for j in columns.tolist()],
+            columns=columns,
+            scores=scores[columns],
+        )
+
+
+class RankedStrategy(Strategy):
+    """Strategy that gets each bar along with a ranking of its universe"""
+
+    def __init__(self, ranker: Ranker) -> None:
+        super().__init__()
+        self.ranker = ranker
+
+    @override
+    def on_data(self, data: BarData) -> None:
+        self.on_ranked(data, self.ranker.rank(data))
+
+    @abstractmethod
+    def on_ranked(self, data: BarData, ranking: Ranking) -> None:
+        """Called on each market data event with the bar's ranking"""
@@ -0,0 +1,31 @@
+"""Strategies shared between test modules. Kept in an importable module so
+sweeps can pickle them over to worker processes."""
+
+from typing import override
+
+from systrade.data import BarData, ExecutionReport
+from systrade.strategy import Strategy
+
+
+class BuyOnDay(Strategy):
+    """Buys qty shares of NVDA on the given bar and holds"""
+
+    def __init__(self, day: int, qty: float) -> None:
+        super().__init__()
+        self.day = day
+        self.qty = qty
+        self.bar = 0
+
+    @override
+    def on_start(self) -> None:
+        self.subscribe("NVDA")
+
+    @override
+    def on_data(self, data: BarData) -> None:
+        if self.bar == self.day:
+            self.post_market_order("NVDA", self.qty)
+        self.bar += 1
+
+    @override
+    def on_execution(self, report: ExecutionReport) -> None:
+        pass
@@ -0,0 +1,63 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from systrade.aio import AsyncEngine, LocalBroker, SimulatedMarket
+from systrade.broker import BacktestBroker
+from systrade.engine import Engine
+from systrade.feed import StoreFeed
+from systrade.store import BarStore
+
+from strategies import BuyOnDay
+
+BARS = Path(__file__).parent / "bars.csv"
+
+
+def test_async_engines_match_engine():
+    """Test concurrent strategies against a simulated market end up where the
+    synchronous engine does"""
+    store = BarStore.from_csv(BARS)
+    days = range(5)
+
+    market = SimulatedMarket(store, maxsize=2)
+    engines = [
+        AsyncEngine(market.feed(), LocalBroker(latency=0.001), BuyOnDay(day, 10), 1000)
+        for day in days
+    ]
+
+    async def main():
+        await asyncio.gather(market.run(), *(engine.run() for engine in engines))
+
+    asyncio.run(main())
+
+    for day, engine in zip(days, engines):
+        expected = Engine(StoreFeed(store), BacktestBroker(), BuyOnDay(day, 10), 1000)
+        expected.run()
+        assert engine.portfolio.cash() == expected.portfolio.cash()
+        assert engine.portfolio.value() == expected.portfolio.value()
+        assert engine.portfolio.as_of() == expected.portfolio.as_of()
+
+
+def test_local_feed_ends_with_market():
+    store = BarStore.from_csv(BARS)
+    market = SimulatedMarket(store)
+    feed = market.feed()
+
+    async def consume():
+        await feed.start()
+        feed.subscribe("NVDA")
+        with pytest.raises(ValueError):
+            feed.subscribe("NVDA")
+        periods = []
+        while feed.is_running():
+            data = await feed.next_data()
+            if data is not None:
+                periods.append(data.as_of)
+        return periods
+
+    async def main():
+        _, periods = await asyncio.gather(market.run(), consume())
+        return periods
+
+    assert len(asyncio.run(main())) == len(store)
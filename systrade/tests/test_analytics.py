@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from systrade.analytics import gross_exposure, tearsheet, traded_value
+from systrade.data import Bar, BarData
+from systrade.portfolio import Portfolio, RecordMode
+from systrade.recorder import ActivityRecorder
+
+
+def _pandas_metrics(values: np.ndarray, periods_per_year: float) -> dict:
+    """Reference implementation of the per run loop the tearsheet replaces"""
+    curve = pd.Series(values)
+    returns = curve.pct_change().dropna()
+    downside = np.sqrt((returns.clip(upper=0) ** 2).mean())
+    peaks = curve.cummax()
+    durations, streak = [], 0
+    for value, peak in zip(curve, peaks):
+        streak = streak + 1 if value < peak else 0
+        durations.append(streak)
+    return {
+        "sharpe": returns.mean() / returns.std() * np.sqrt(periods_per_year),
+        "sortino": returns.mean() / downside * np.sqrt(periods_per_year),
+        "max_drawdown": -(curve / peaks - 1).min(),
+        "max_drawdown_duration": max(durations),
+    }
+
+
+def test_tearsheet_of_one_curve():
+    sheet = tearsheet(np.array([100.0, 110, 99, 105, 120, 118]), periods_per_year=5)
+    assert sheet.total_return == pytest.approx(0.18)
+    assert sheet.annual_return == pytest.approx(0.18)
+    assert sheet.max_drawdown == pytest.approx(0.1)
+    assert sheet.max_drawdown_duration == 2
+    assert np.isnan(sheet.turnover) and np.isnan(sheet.exposure)
+    expected = _pandas_metrics(np.array([100.0, 110, 99, 105, 120, 118]), 5)
+    for name, value in expected.items():
+        assert getattr(sheet, name) == pytest.approx(value)
+
+
+def test_tearsheet_batch_matches_single_curves():
+    rng = np.random.default_rng(0)
+    values = 100 * np.cumprod(1 + rng.normal(0, 0.01, (20, 300)), axis=1)
+    gross = values * rng.uniform(0, 1, values.shape)
+    traded = rng.uniform(0, 10, values.shape)
+    batch = tearsheet(values, gross=gross, traded=traded, risk_free=0.02)
+    for i in range(len(values)):
+        single = tearsheet(values[i], gross[i], traded[i], risk_free=0.02)
+        for name, value in single.__dict__.items():
+            assert getattr(batch, name)[i] == pytest.approx(value)
+    for name, value in _pandas_metrics(values[3], 252).items():
+        if name != "sharpe" and name != "sortino":
+            assert getattr(batch, name)[3] == pytest.approx(value)
+
+
+def test_traded_value_and_gross_exposure():
+    """ABC is held for two periods then closed, DEF opened and cut down"""
+    recorder = ActivityRecorder.from_arrays(
+        timestamps=pd.date_range("2025-01-01", periods=4).to_numpy(),
+        cash=np.zeros(4),
+        asset_value=np.zeros(4),
+        value=np.ones(4),
+        period=np.array([0, 1, 2, 3]),
+        code=np.array([0, 0, 1, 1]),
+        quantity=np.array([10.0, 10, 5, 3]),
+        price=np.array([10.0, 11, 20, 20]),
+        symbols=["ABC", "DEF"],
+    )
+    np.testing.assert_allclose(traded_value(recorder), [100, 0, 210, 40])
+    np.testing.assert_allclose(gross_exposure(recorder), [100, 110, 100, 60])
+
+
+def test_portfolio_activity_tearsheet():
+    for mode in (RecordMode.FULL, RecordMode.EQUITY):
+        pf = Portfolio(1000, record_mode=mode)
+        for day in range(1, 5):
+            data = BarData(datetime(2025, 1, day))
+            data["ABC"] = Bar(close=100 + day)
+            if day == 2:
+                pf.on_fill("ABC", 101, 5)
+            pf.on_data(data)
+        sheet = pf.activity().tearsheet()
+        assert sheet.total_return == pytest.approx(1015 / 1000 - 1)
+        if mode == RecordMode.FULL:
+            assert sheet.exposure > 0 and sheet.turnover > 0
+        else:
+            assert np.isnan(sheet.exposure) and np.isnan(sheet.turnover)
+
+    with pytest.raises(ValueError):
+        Portfolio(1000, record_mode=RecordMode.NONE).activity().tearsheet()
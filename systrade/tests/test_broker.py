@@ -1,7 +1,20 @@
 from datetime import datetime
 
+import numpy as np
+
 from systrade.broker import BacktestBroker
-from systrade.data import Bar, BarData, ExecutionReport, Order, OrderType
+from systrade.costs import Commission
+from systrade.data import (
+    ArrayBarData,
+    Bar,
+    BarData,
+    CorporateAction,
+    ExecutionReport,
+    Order,
+    OrderType,
+    SymbolIndex,
+)
+from systrade.portfolio import Portfolio
 
 
 def _make_market_order(sym: str, qty: float, order_id: str) -> Order:
@@ -47,3 +60,200 @@ def test_backtest_broker_fills_market_orders_at_next_bar():
 
     # All reports are cleared out
     assert not broker.pop_latest()
+
+
+def _make_order(
+    sym: str, qty: float, order_id: str, type: OrderType, price: float
+) -> Order:
+    return Order(
+        id=order_id,
+        symbol=sym,
+        quantity=qty,
+        type=type,
+        submit_time=datetime.now(),
+        price=price,
+    )
+
+
+def _bar_data(day: int, **bars: Bar) -> BarData:
+    data = BarData(as_of=datetime(2025, 1, day))
+    for sym, bar in bars.items():
+        data[sym] = bar
+    return data
+
+
+def test_limit_orders_fill_when_price_reached():
+    """Test limits rest until crossed, filling at the limit or a better open"""
+    broker = BacktestBroker()
+    buy = _make_order("ABC", 5, "B", OrderType.LIMIT, 95)
+    sell = _make_order("ABC", -5, "S", OrderType.LIMIT, 110)
+    broker.post_order(buy)
+    broker.post_order(sell)
+
+    broker.on_data(_bar_data(1, ABC=Bar(100, 105, 96, 100, 1000)))
+    assert not broker.pop_latest()
+    assert broker.open_orders("ABC") == 2
+
+    broker.on_data(_bar_data(2, ABC=Bar(100, 104, 94, 100, 1000)))
+    (rep,) = broker.pop_latest()
+    assert rep.order == buy
+    assert rep.last_price == 95
+
+    # Gapping through the limit fills at the better open
+    broker.on_data(_bar_data(3, ABC=Bar(112, 115, 111, 113, 1000)))
+    (rep,) = broker.pop_latest()
+    assert rep.order == sell
+    assert rep.last_price == 112
+    assert broker.open_orders("ABC") == 0
+
+
+def test_best_priced_limit_fills_first():
+    broker = BacktestBroker(participation=0.01)
+    low = _make_order("ABC", 10, "L", OrderType.LIMIT, 90)
+    high = _make_order("ABC", 10, "H", OrderType.LIMIT, 99)
+    broker.post_order(low)
+    broker.post_order(high)
+
+    broker.on_data(_bar_data(1, ABC=Bar(100, 101, 85, 90, 1000)))
+    (rep,) = broker.pop_latest()
+    assert rep.order == high
+
+
+def test_stop_orders_trigger_into_market_orders():
+    broker = BacktestBroker()
+    stop = _make_order("ABC", -5, "S", OrderType.STOP, 90)
+    broker.post_order(stop)
+
+    broker.on_data(_bar_data(1, ABC=Bar(100, 105, 91, 100, 1000)))
+    assert not broker.pop_latest()
+
+    broker.on_data(_bar_data(2, ABC=Bar(95, 96, 85, 88, 1000)))
+    (rep,) = broker.pop_latest()
+    assert rep.last_price == 90
+    assert rep.last_quantity == -5
+
+
+def test_partially_filled_stop_remainder_fills_at_later_opens():
+    broker = BacktestBroker(participation=0.1)
+    broker.post_order(_make_order("ABC", 10, "S", OrderType.STOP, 100))
+
+    broker.on_data(_bar_data(1, ABC=Bar(99, 101, 98, 100, 10)))
+    broker.on_data(_bar_data(2, ABC=Bar(150, 151, 149, 150, 90)))
+    fills = [(rep.last_price, rep.last_quantity) for rep in broker.pop_latest()]
+    assert fills == [(100, 1), (150, 9)]
+
+
+def test_orders_rest_through_missing_bars():
+    """Array backed feeds report symbols without a bar as NaN rows"""
+    index = SymbolIndex(["ABC", "DEF"])
+    broker = BacktestBroker()
+    broker.post_order(_make_market_order("DEF", 5, "O1"))
+    broker.post_order(_make_order("DEF", 5, "S", OrderType.STOP, 10))
+
+    values = np.array([[10, 11, 9, 10, 100], [np.nan] * 5])
+    broker.on_data(ArrayBarData(index, values, as_of=datetime(2025, 1, 2)))
+    assert not broker.pop_latest()
+
+    values = np.array([[10, 11, 9, 10, 100], [12, 13, 11, 12, 100]])
+    broker.on_data(ArrayBarData(index, values, as_of=datetime(2025, 1, 3)))
+    assert [rep.last_price for rep in broker.pop_latest()] == [12, 12]
+
+
+def test_splits_adjust_resting_orders():
+    """Test resting orders keep their meaning across a 2-for-1 split"""
+    broker = BacktestBroker()
+    stop = _make_order("ABC", -10, "S", OrderType.STOP, 90)
+    limit = _make_order("ABC", 4, "L", OrderType.LIMIT, 80)
+    broker.post_order(stop)
+    broker.post_order(limit)
+
+    data = _bar_data(1, ABC=Bar(51, 52, 50, 51, 1000))
+    data.actions = [CorporateAction("ABC", split=2)]
+    broker.on_data(data)
+    assert not broker.pop_latest()
+    assert (stop.quantity, stop.price) == (-20, 45)
+    assert (limit.quantity, limit.price) == (8, 40)
+
+    broker.on_data(_bar_data(2, ABC=Bar(46, 47, 39, 40, 1000)))
+    fills = [(rep.last_price, rep.last_quantity) for rep in broker.pop_latest()]
+    assert fills == [(45, -20), (40, 8)]
+
+
+def test_partial_fills_by_volume():
+    """Test fills are capped by bar volume and complete over several bars"""
+    broker = BacktestBroker(participation=0.1)
+    order = _make_market_order("ABC", -25, "O1")
+    broker.post_order(order)
+
+    quantities = []
+    for day, volume in enumerate([100, 100, 100], start=1):
+        broker.on_data(_bar_data(day, ABC=Bar(10, 11, 9, 10, volume)))
+        quantities += [
+            (rep.last_quantity, rep.cum_quantity, rep.rem_quantity)
+            for rep in broker.pop_latest()
+        ]
+
+    assert quantities == [(-10, -10, -15), (-10, -20, -5), (-5, -25, 0)]
+    assert broker.open_orders("ABC") == 0
+
+
+def test_partial_fills_add_up_to_the_order():
+    """Test rounding in partial fills doesn't stop a full exit later"""
+    broker = BacktestBroker(participation=0.1)
+    pf = Portfolio(1e6)
+    broker.post_order(_make_market_order("ABC", 100, "O1"))
+    for day in range(1, 5):
+        broker.on_data(_bar_data(day, ABC=Bar(10, 11, 9, 10, 333)))
+        reports = broker.pop_latest()
+        pf.on_fills(reports)
+    assert reports[-1].cum_quantity == 100
+    assert pf.position("ABC").qty == 100
+
+    broker.post_order(_make_market_order("ABC", -100, "O2"))
+    broker.on_data(_bar_data(5, ABC=Bar(10, 11, 9, 10, 1e6)))
+    pf.on_fills(broker.pop_latest())
+    assert not pf.is_invested_in("ABC")
+
+
+def test_only_symbols_with_orders_are_matched():
+    broker = BacktestBroker()
+    broker.post_order(_make_market_order("ABC", 1, "O1"))
+
+    broker.on_data(_bar_data(1, DEF=Bar(10, 11, 9, 10, 100)))
+    assert not broker.pop_latest()
+    broker.on_data(_bar_data(2, ABC=Bar(10, 11, 9, 10, 100)))
+    assert len(broker.pop_latest()) == 1
+
+
+def test_pop_latest_swaps_buffers():
+    """Test reports are handed over without copying and stay valid until the
+    next pop"""
+    broker = BacktestBroker()
+    broker.post_order(_make_market_order("ABC", 1, "O1"))
+    broker.on_data(_bar_data(1, ABC=Bar(10, 11, 9, 10, 100)))
+    first = broker.pop_latest()
+    assert len(first) == 1
+
+    broker.post_order(_make_market_order("ABC", 2, "O2"))
+    broker.on_data(_bar_data(2, ABC=Bar(10, 11, 9, 10, 100)))
+    assert len(first) == 1
+    second = broker.pop_latest()
+    assert second is not first
+    assert second[0].order.id == "O2"
+    assert not broker.pop_latest()
+
+
+def test_cost_model_prices_each_fill():
+    broker = BacktestBroker(costs=Commission(per_share=0.01, minimum=1.0))
+    broker.post_order(_make_market_order("ABC", 500, "O1"))
+    broker.post_order(_make_market_order("ABC", -20, "O2"))
+    broker.post_order(_make_market_order("DEF", 300, "O3"))
+    broker.on_data(
+        _bar_data(1, ABC=Bar(open=10, volume=1000), DEF=Bar(open=20, volume=1000))
+    )
+    assert [report.fee for report in broker.pop_latest()] == [5.0, 1.0, 3.0]
+
+    free = BacktestBroker()
+    free.post_order(_make_market_order("ABC", 500, "O1"))
+    free.on_data(_bar_data(1, ABC=Bar(open=10, volume=1000)))
+    assert free.pop_latest()[0].fee == 0
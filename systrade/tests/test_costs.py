@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from systrade.costs import Commission, CompositeCost, Spread, VolumeSlippage
+
+PRICES = np.array([10.0, 20.0, 50.0])
+QUANTITIES = np.array([100.0, -10.0, 1000.0])
+VOLUMES = np.array([10_000.0, np.nan, 1000.0])
+
+
+def test_commission():
+    fees = Commission(per_share=0.01, rate=0.001, minimum=1.0).fees(
+        PRICES, QUANTITIES, VOLUMES
+    )
+    np.testing.assert_allclose(fees, [2.0, 1.0, 60.0])
+
+
+def test_spread_charges_half_on_each_fill():
+    fees = Spread(0.002).fees(PRICES, QUANTITIES, VOLUMES)
+    np.testing.assert_allclose(fees, [1.0, 0.2, 50.0])
+
+
+def test_volume_slippage_grows_with_participation():
+    fees = VolumeSlippage(impact=0.1).fees(PRICES, QUANTITIES, VOLUMES)
+    # 1% of the volume, unknown volume and all of it
+    np.testing.assert_allclose(fees, [10.0, 20.0, 5000.0])
+    with pytest.raises(ValueError):
+        VolumeSlippage(impact=-1)
+
+
+def test_composite_cost_sums_models():
+    models = [Commission(per_share=0.01), Spread(0.002)]
+    np.testing.assert_allclose(
+        CompositeCost(*models).fees(PRICES, QUANTITIES, VOLUMES),
+        sum(model.fees(PRICES, QUANTITIES, VOLUMES) for model in models),
+    )
@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from systrade.data import (
+    ArrayBarData,
+    Bar,
+    BarData,
+    ExecutionReport,
+    Order,
+    OrderType,
+    SymbolIndex,
+)
+
+
+def _make_data() -> ArrayBarData:
+    index = SymbolIndex(["ABC", "DEF"])
+    values = np.array([[1.0, 2.0, 0.5, 1.5, 100], [10.0, 11.0, 9.0, 10.5, 50]])
+    return ArrayBarData(index, values, as_of=datetime(2025, 1, 1))
+
+
+def test_array_bar_data_lookups():
+    """Test dictionary like access returns views over the array"""
+    data = _make_data()
+    assert len(data) == 2
+    assert list(data.symbols()) == ["ABC", "DEF"]
+    assert data["ABC"].close == 1.5
+    assert data["DEF"] == Bar(10.0, 11.0, 9.0, 10.5, 50)
+    assert data.get("XYZ") is None
+    with pytest.raises(KeyError):
+        data["XYZ"]
+    assert [(sym, bar.open) for sym, bar in data.bars()] == [
+        ("ABC", 1.0),
+        ("DEF", 10.0),
+    ]
+
+
+def test_array_bar_data_vectors():
+    """Test cross sections are exposed as vectors without copying"""
+    data = _make_data()
+    assert data.closes().tolist() == [1.5, 10.5]
+    assert data.volumes().tolist() == [100, 50]
+    assert np.shares_memory(data.closes(), data.values)
+
+    data["ABC"] = Bar(close=3.0)
+    assert data.closes().tolist() == [3.0, 10.5]
+
+
+def test_array_bar_data_equals_dict_bar_data():
+    data = _make_data()
+    expected = BarData(data.as_of)
+    expected["ABC"] = Bar(1.0, 2.0, 0.5, 1.5, 100)
+    expected["DEF"] = Bar(10.0, 11.0, 9.0, 10.5, 50)
+    assert data == expected
+    assert expected == data
+    np.testing.assert_array_equal(expected.closes(), data.closes())
+
+    expected["DEF"] = Bar(close=1)
+    assert data != expected
+
+
+def test_array_bar_data_checks_shape():
+    with pytest.raises(ValueError):
+        ArrayBarData(SymbolIndex(["ABC"]), np.zeros((2, 5)))
+
+
+def test_records_are_slotted():
+    """Test per bar and per fill records don't carry an instance dict"""
+    order = Order("1", "ABC", 1.0, OrderType.MARKET, datetime(2025, 1, 1))
+    report = ExecutionReport(order, 1.0, 1.0, 1.0, 0.0, datetime(2025, 1, 1))
+    for record in (Bar(), order, report):
+        assert not hasattr(record, "__dict__")
+    assert Bar(1, 2, 0, 1, 10) == Bar(1, 2, 0, 1, 10)
+    assert report == ExecutionReport(order, 1.0, 1.0, 1.0, 0.0, datetime(2025, 1, 1))
@@ -1,11 +1,18 @@
+import time
 from datetime import datetime
-from typing import override
+from pathlib import Path
+from typing import Sequence, override
 from unittest import mock
 
+import pandas as pd
+import pytest
+
 from systrade.broker import BacktestBroker, Broker
 from systrade.data import Bar, BarData, ExecutionReport
-from systrade.engine import Engine
-from systrade.feed import Feed
+from systrade.engine import Engine, MultiEngine
+from systrade.feed import Feed, StoreFeed
+from systrade.profiling import Profiler, Stage
+from systrade.store import BarStore
 from systrade.strategy import Strategy
 
 
@@ -94,7 +101,7 @@ def test_engine_round_trip():
     sym = "ABC"
     qty = 10
     d1[sym] = Bar(close=123)
-    d2[sym] = Bar(close=124)
+    d2[sym] = Bar(open=124, close=124)
 
     feed = FakeFeed([d1, d2])
     broker = BacktestBroker()
@@ -106,3 +113,202 @@ def test_engine_round_trip():
     # High level checks that we made it through both loops
     assert strategy.exec_report is not None
     assert engine.portfolio.is_invested_in(sym)
+
+
+class BatchStrategy(FakeStrategy):
+    """Buy and hold strategy that takes its fills in batches"""
+
+    def __init__(self, sym: str, qty: float) -> None:
+        super().__init__(sym, qty)
+        self.batches = list[int]()
+
+    @override
+    def on_executions(self, reports: Sequence[ExecutionReport]) -> None:
+        self.batches.append(len(reports))
+
+
+def test_engine_delivers_fill_batches():
+    """Test strategies get one batch per bar with fills"""
+    sym = "ABC"
+    bars = list[BarData]()
+    for day in range(1, 4):
+        data = BarData(datetime(2025, 1, day))
+        data[sym] = Bar(open=100, close=100)
+        bars.append(data)
+
+    strategy = BatchStrategy(sym, 10)
+    engine = Engine(FakeFeed(bars), BacktestBroker(), strategy, cash=1000)
+    engine.run()
+
+    assert strategy.batches == [1]
+    assert strategy.exec_report is None
+    assert engine.portfolio.cash() == 0
+
+
+def test_multi_engine_matches_separate_engines():
+    """Test strategies sharing a feed pass end up where they would running on
+    their own, with shared symbols only subscribed once"""
+    store = BarStore.from_csv(Path(__file__).parent / "bars.csv")
+    cash = [1000, 2000, 3000]
+
+    def strategies() -> list[Strategy]:
+        return [FakeStrategy("NVDA", qty) for qty in (5, 10, 20)]
+
+    multi = MultiEngine(StoreFeed(store), list(zip(strategies(), cash)))
+    multi.run()
+
+    for portfolio, strategy, start in zip(multi.portfolios, strategies(), cash):
+        engine = Engine(StoreFeed(store), BacktestBroker(), strategy, start)
+        engine.run()
+        assert portfolio.cash() == engine.portfolio.cash()
+        assert portfolio.value() == engine.portfolio.value()
+        assert portfolio.position("NVDA") == engine.portfolio.position("NVDA")
+
+
+class UniverseStrategy(FakeStrategy):
+    """Buys NVDA after subscribing in bulk"""
+
+    def __init__(self, qty: float, all_symbols: bool) -> None:
+        super().__init__("NVDA", qty)
+        self.all_symbols = all_symbols
+
+    @override
+    def on_start(self) -> None:
+        if self.all_symbols:
+            self.subscribe_all()
+        else:
+            self.subscribe_many(["NVDA", "NVDA"])
+
+
+def test_multi_engine_shares_bulk_subscriptions():
+    """Test strategies subscribing in bulk, to the same symbols, both get
+    their bars"""
+    store = BarStore.from_csv(Path(__file__).parent / "bars.csv")
+    feed = StoreFeed(store)
+    strategies = [UniverseStrategy(5, False), UniverseStrategy(10, True)]
+    multi = MultiEngine(feed, [(strategy, 1000) for strategy in strategies])
+    multi.run()
+    assert feed.checkpoint()["subscribed"] == ["NVDA"]
+    assert [p.position("NVDA").qty for p in multi.portfolios] == [5, 10]
+
+    engine = Engine(StoreFeed(store), BacktestBroker(), UniverseStrategy(5, True), 1000)
+    engine.run()
+    assert engine.portfolio.position("NVDA").qty == 5
+
+
+def test_engine_profiles_stages():
+    """Test a profiled run times every stage of every bar"""
+    store = BarStore.from_csv(Path(__file__).parent / "bars.csv")
+    strategy = FakeStrategy("NVDA", 10)
+    engine = Engine(
+        StoreFeed(store),
+        BacktestBroker(),
+        strategy,
+        cash=1000,
+        profiler=Profiler(histograms=True),
+    )
+    engine.run()
+
+    report = engine.profile
+    assert report is not None
+    assert report.bars == len(store)
+    assert report.stage(Stage.FEED).calls == len(store)
+    assert report.stage(Stage.STRATEGY).calls == len(store)
+    # Only one bar has fills
+    assert report.stage(Stage.FILLS).calls == 1
+    histogram = report.stage(Stage.BROKER).histogram
+    assert histogram is not None and histogram.sum() == len(store)
+    assert report.bars_per_sec > 0
+    assert "strategy" in str(report)
+    assert engine.portfolio.is_invested_in("NVDA")
+
+
+class LazyFeed(FakeFeed):
+    """Feed that does its reading in is_running, like the streaming feeds"""
+
+    @override
+    def is_running(self) -> bool:
+        time.sleep(0.002)
+        return super().is_running()
+
+
+def test_profiled_feed_time_includes_is_running():
+    bars = [BarData(datetime(2025, 1, day)) for day in range(1, 6)]
+    profiler = Profiler()
+    engine = Engine(
+        LazyFeed(bars),
+        BacktestBroker(),
+        FakeStrategy("ABC", 1),
+        1000,
+        profiler=profiler,
+    )
+    engine.run()
+    assert profiler.report().stage(Stage.FEED).seconds >= 5 * 0.002
+
+
+def test_engine_without_profiler_has_no_profile():
+    engine = Engine(FakeFeed([]), BacktestBroker(), FakeStrategy("ABC", 1), 1000)
+    engine.run()
+    assert engine.profile is None
+
+
+class CountingStrategy(FakeStrategy):
+    """Buy and hold strategy that counts its callbacks"""
+
+    def __init__(self, sym: str, qty: float) -> None:
+        super().__init__(sym, qty)
+        self.starts = 0
+        self.bars = 0
+
+    @override
+    def on_start(self) -> None:
+        self.starts += 1
+        super().on_start()
+
+    @override
+    def on_data(self, data: BarData) -> None:
+        self.bars += 1
+        super().on_data(data)
+
+
+def test_engine_resumes_from_checkpoint(tmp_path):
+    """Test a run resumed from its last checkpoint ends up where the full run
+    did"""
+    store = BarStore.from_csv(Path(__file__).parent / "bars.csv")
+    path = tmp_path / "run.ckpt"
+    strategy = CountingStrategy("NVDA", 10)
+    full = Engine(
+        StoreFeed(store),
+        BacktestBroker(),
+        strategy,
+        cash=1000,
+        checkpoint_path=path,
+        checkpoint_every=4,
+    )
+    full.run()
+
+    resumed = Engine.resume(path, StoreFeed(store))
+    resumed.run()
+
+    assert resumed.portfolio.cash() == full.portfolio.cash()
+    assert resumed.portfolio.value() == full.portfolio.value()
+    assert resumed.portfolio.as_of() == full.portfolio.as_of()
+    pd.testing.assert_frame_equal(
+        resumed.portfolio.activity().df(), full.portfolio.activity().df()
+    )
+    # Resumed strategy doesn't start again and only sees the remaining bars
+    restored = resumed._strategy
+    assert isinstance(restored, CountingStrategy)
+    assert restored.starts == 1
+    assert restored.bars == strategy.bars == len(store)
+
+
+def test_checkpointing_needs_a_feed_that_supports_it(tmp_path):
+    with pytest.raises(ValueError):
+        Engine(
+            FakeFeed([]),
+            BacktestBroker(),
+            FakeStrategy("ABC", 1),
+            1000,
+            checkpoint_path=tmp_path / "run.ckpt",
+        )
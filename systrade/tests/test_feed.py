@@ -1,10 +1,19 @@
 from datetime import date
 from pathlib import Path
 
+import numpy as np
+import pandas as pd
 import pytest
 
-from systrade.data import BarData
-from systrade.feed import FileFeed
+from systrade.data import BarData, CorporateAction
+from systrade.feed import (
+    FileFeed,
+    MmapFeed,
+    PartitionedFeed,
+    StoreFeed,
+    StreamingFileFeed,
+)
+from systrade.store import BarStore, convert_csv
 
 
 def test_is_running():
@@ -58,3 +67,283 @@ def test_start_with_date_filter():
     assert d1.as_of.date() == date.fromisoformat("2005-02-04")
     assert d2.as_of.date() == date.fromisoformat("2005-02-07")
     assert d3.as_of.date() == date.fromisoformat("2005-02-08")
+
+
+def test_next_data_skips_non_trading_start_date():
+    """Test a start date without data begins at the next available bar"""
+    feed = FileFeed(
+        Path(__file__).parent / "bars.csv", start="2005-02-05", end="2005-02-07"
+    )
+    feed.start()
+    feed.subscribe("NVDA")
+
+    data = feed.next_data()
+    assert not feed.is_running()
+    assert data.as_of.date() == date.fromisoformat("2005-02-07")
+    assert data["NVDA"].open == pytest.approx(0.197283426444969)
+
+
+def test_df_is_limited_to_window():
+    feed = FileFeed(
+        Path(__file__).parent / "bars.csv", start="2005-02-04", end="2005-02-08"
+    )
+    assert len(feed.df) == 3
+
+
+def test_mmap_feed_matches_file_feed(tmp_path):
+    """Test replaying a converted store gives the same bars as the CSV"""
+    csv_path = Path(__file__).parent / "bars.csv"
+    convert_csv(csv_path, tmp_path / "bars.bin")
+    file_feed = FileFeed(csv_path, start="2005-02-04", end="2005-02-08")
+    mmap_feed = MmapFeed(tmp_path / "bars.bin", start="2005-02-04", end="2005-02-08")
+    for feed in (file_feed, mmap_feed):
+        feed.start()
+        feed.subscribe("NVDA")
+
+    while file_feed.is_running():
+        expected = file_feed.next_data()
+        actual = mmap_feed.next_data()
+        assert actual.as_of == expected.as_of
+        assert actual == expected
+    assert not mmap_feed.is_running()
+
+
+@pytest.mark.parametrize("chunksize", [1, 2, 100])
+def test_streaming_feed_matches_file_feed(chunksize):
+    """Test bars assembled across chunk boundaries match the in-memory feed"""
+    path = Path(__file__).parent / "bars.csv"
+    file_feed = FileFeed(path, start="2005-02-04", end="2005-02-10")
+    stream_feed = StreamingFileFeed(
+        path, start="2005-02-04", end="2005-02-10", chunksize=chunksize
+    )
+    for feed in (file_feed, stream_feed):
+        feed.start()
+        feed.subscribe("NVDA")
+
+    while file_feed.is_running():
+        assert stream_feed.is_running()
+        expected = file_feed.next_data()
+        actual = stream_feed.next_data()
+        assert actual.as_of == expected.as_of
+        assert actual == expected
+    assert not stream_feed.is_running()
+    assert stream_feed.bars_read == 5
+    assert stream_feed.bars_per_sec > 0
+
+
+def test_streaming_feed_requires_sorted_dates(tmp_path):
+    path = tmp_path / "bars.csv"
+    rows = pd.read_csv(Path(__file__).parent / "bars.csv")
+    rows.iloc[::-1].to_csv(path, index=False)
+    feed = StreamingFileFeed(path, chunksize=4)
+    feed.start()
+
+    with pytest.raises(ValueError):
+        while feed.is_running():
+            feed.next_data()
+
+
+def test_store_feed_checkpoint_restore():
+    """Test a restored feed carries on at the same bar with the same
+    subscriptions"""
+    store = BarStore.from_csv(Path(__file__).parent / "bars.csv")
+    feed = StoreFeed(store)
+    feed.start()
+    feed.subscribe("NVDA")
+    feed.next_data()
+    feed.next_data()
+    state = feed.checkpoint()
+
+    restored = StoreFeed(store)
+    restored.start()
+    restored.restore(state)
+    assert restored.next_data() == feed.next_data()
+    with pytest.raises(ValueError):
+        restored.subscribe("NVDA")
+
+
+def test_seek_and_set_window():
+    """Test seeking and re-windowing one loaded feed, including dates that
+    aren't trading days"""
+    feed = FileFeed(Path(__file__).parent / "bars.csv")
+    feed.start()
+    feed.subscribe("NVDA")
+
+    # 2005-02-05 is a Saturday
+    feed.seek("2005-02-05")
+    assert feed.next_data().as_of.date() == date.fromisoformat("2005-02-07")
+
+    feed.set_window("2005-02-05", "2005-02-09")
+    assert len(feed.df) == 3
+    assert feed.df["Date"].is_monotonic_increasing
+    dates = []
+    while feed.is_running():
+        dates.append(feed.next_data().as_of.date())
+    assert dates == [date(2005, 2, 7), date(2005, 2, 8), date(2005, 2, 9)]
+
+    # Seeking outside of the window stays within it
+    feed.seek("2000-01-01")
+    assert feed.next_data().as_of.date() == date(2005, 2, 7)
+    feed.set_window()
+    assert len(feed.df) == 11
+
+
+def _bars(symbols: list[str]) -> pd.DataFrame:
+    """Bars over a year end with a gap, ABC is missing a day"""
+    dates = pd.bdate_range("2024-12-27", "2025-01-08")
+    frames = []
+    for k, sym in enumerate(symbols):
+        prices = 10.0 * (k + 1) + np.arange(len(dates))
+        frame = pd.DataFrame(
+            {
+                "Date": dates.strftime("%Y-%m-%d 00:00:00-05:00"),
+                "Open": prices,
+                "High": prices + 1,
+                "Low": prices - 1,
+                "Close": prices + 0.5,
+                "Volume": 1000.0,
+                "Dividends": 0.0,
+                "Stock Splits": 0.0,
+                "Symbol": sym,
+            }
+        )
+        if sym == "ABC":
+            frame = frame.drop(index=3)
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _replay(feed, symbols: list[str]) -> list[BarData]:
+    for sym in symbols:
+        feed.subscribe(sym)
+    feed.start()
+    result = []
+    while feed.is_running():
+        result.append(feed.next_data())
+    return result
+
+
+def _assert_same_bars(actual: list[BarData], expected: list[BarData]) -> None:
+    """Missing bars are NaN, which doesn't compare equal as a Bar"""
+    assert [d.as_of for d in actual] == [d.as_of for d in expected]
+    for a, e in zip(actual, expected):
+        assert list(a.symbols()) == list(e.symbols())
+        np.testing.assert_array_equal(a.closes(), e.closes())
+        np.testing.assert_array_equal(a.volumes(), e.volumes())
+
+
+def test_partitioned_feed_merges_symbol_year_files(tmp_path):
+    """Test per symbol and year files replay like one file, without reading
+    files of symbols that aren't subscribed"""
+    df = _bars(["ABC", "DEF", "GHI"])
+    years = pd.to_datetime(df["Date"].str[:10]).dt.year
+    for (sym, year), part in df.groupby([df["Symbol"], years]):
+        (tmp_path / sym).mkdir(exist_ok=True)
+        path = tmp_path / sym / f"{year}.csv"
+        if sym == "GHI":
+            # Reading this would fail
+            path.write_text("garbage\n")
+        else:
+            part.to_csv(path, index=False)
+    df.to_csv(tmp_path / "all.csv", index=False)
+
+    feed = PartitionedFeed(tmp_path / "{symbol}" / "{year}.csv")
+    assert feed.symbols == ["ABC", "DEF", "GHI"]
+    with pytest.raises(ValueError):
+        feed.subscribe("XYZ")
+    merged = _replay(feed, ["DEF", "ABC"])
+    expected = _replay(FileFeed(tmp_path / "all.csv"), ["DEF", "ABC"])
+    _assert_same_bars(merged, expected)
+    assert np.isnan(merged[3]["ABC"].close)
+
+
+def test_partitioned_feed_skips_years_outside_window(tmp_path):
+    df = _bars(["ABC", "DEF"])
+    years = pd.to_datetime(df["Date"].str[:10]).dt.year
+    for year, part in df.groupby(years):
+        if year == 2024:
+            (tmp_path / f"{year}.csv").write_text("garbage\n")
+        else:
+            part.to_csv(tmp_path / f"{year}.csv", index=False)
+    df.to_csv(tmp_path / "all.csv", index=False)
+
+    start, end = "2025-01-02", "2025-01-07"
+    merged = _replay(PartitionedFeed(tmp_path / "{year}.csv", start, end), ["DEF"])
+    expected = _replay(FileFeed(tmp_path / "all.csv", start, end), ["DEF"])
+    assert len(merged) == 4
+    _assert_same_bars(merged, expected)
+
+
+def test_adjusted_and_action_feeds():
+    """ABC splits 2-for-1 on the third day and pays a dividend on the fifth"""
+    close = [100.0, 100.0, 50.0, 50.0, 50.0]
+    frame = pd.DataFrame(
+        {
+            "Date": [f"2005-02-0{day} 00:00:00-05:00" for day in range(1, 6)] * 2,
+            "Open": close * 2,
+            "High": close * 2,
+            "Low": close * 2,
+            "Close": close * 2,
+            "Volume": [10.0] * 10,
+            "Dividends": [0, 0, 0, 0, 1.0] + [0] * 5,
+            "Stock Splits": [0, 0, 2.0, 0, 0] + [0] * 5,
+            "Symbol": ["ABC"] * 5 + ["DEF"] * 5,
+        }
+    )
+    store = BarStore.from_frame(frame)
+    adjusted = _replay(StoreFeed(store, adjust=True), ["ABC"])
+    np.testing.assert_allclose([d["ABC"].close for d in adjusted], [49, 49, 49, 49, 50])
+    assert [d["ABC"].volume for d in adjusted] == [20, 20, 10, 10, 10]
+
+    reported = _replay(StoreFeed(store, actions=True), ["ABC", "DEF"])
+    assert [list(d.actions) for d in reported] == [
+        [],
+        [],
+        [CorporateAction("ABC", 0, 2)],
+        [],
+        [CorporateAction("ABC", 1, 0)],
+    ]
+    with pytest.raises(ValueError):
+        StoreFeed(store, adjust=True, actions=True)
+
+
+def test_subscribe_many_and_all():
+    """Test bulk subscriptions match subscribing one symbol at a time"""
+    store = BarStore.from_frame(_bars(["ABC", "DEF", "GHI"]))
+    feed = StoreFeed(store)
+    with pytest.raises(ValueError):
+        feed.subscribe_many(["GHI", "XYZ"])
+    with pytest.raises(ValueError):
+        feed.subscribe_many(["GHI", "GHI"])
+    feed.subscribe_many(["GHI", "ABC"])
+    with pytest.raises(ValueError):
+        feed.subscribe_many(["DEF", "ABC"])
+    feed.subscribe_all()
+    bulk = _replay(feed, [])
+    _assert_same_bars(bulk, _replay(StoreFeed(store), ["ABC", "DEF", "GHI"]))
+
+
+def test_subscriptions_during_replay_apply_from_next_bar():
+    store = BarStore.from_frame(_bars(["ABC", "DEF", "GHI"]))
+    feed = StoreFeed(store)
+    feed.subscribe("GHI")
+    feed.start()
+    assert list(feed.next_data().symbols()) == ["GHI"]
+    feed.subscribe("ABC")
+    feed.subscribe("DEF")
+    assert list(feed.next_data().symbols()) == ["ABC", "DEF", "GHI"]
+    assert feed.checkpoint()["subscribed"] == ["ABC", "DEF", "GHI"]
+
+
+def test_streaming_feed_subscribe_many(tmp_path):
+    path = tmp_path / "bars.csv"
+    df = _bars(["ABC", "DEF", "GHI"])
+    df.sort_values("Date", kind="stable").to_csv(path, index=False)
+    feed = StreamingFileFeed(path, chunksize=7)
+    feed.subscribe_many(["ABC", "GHI"])
+    with pytest.raises(NotImplementedError):
+        feed.subscribe_all()
+    streamed = _replay(feed, [])
+    _assert_same_bars(streamed, _replay(FileFeed(path), ["ABC", "GHI"]))
+    with pytest.raises(RuntimeError):
+        feed.subscribe("DEF")
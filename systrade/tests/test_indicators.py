@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from systrade.data import Bar, BarData
+from systrade.indicators import (
+    ATR,
+    EMA,
+    SMA,
+    RingBuffer,
+    RollingMax,
+    RollingMin,
+    RollingStd,
+)
+
+
+def _prices(n: int = 200, seed: int = 7) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    prices = 100 + np.cumsum(rng.normal(0, 1, n))
+    # Some missing bars, which get skipped
+    prices[[3, 50, 51, 120]] = np.nan
+    return prices
+
+
+def test_ring_buffer_evicts_oldest():
+    buffer = RingBuffer(2)
+    assert buffer.push(1) is None
+    assert buffer.push(2) is None
+    assert buffer.full
+    assert buffer.push(3) == 1
+    assert buffer.push(4) == 2
+
+
+@pytest.mark.parametrize(
+    "make",
+    [lambda: SMA(5), lambda: EMA(5), lambda: RollingMin(5), lambda: RollingMax(5)],
+)
+def test_batch_matches_updates_exactly(make):
+    prices = _prices()
+    indicator = make()
+    updates = [
+        indicator.update(x) if not np.isnan(x) else indicator.value for x in prices
+    ]
+    np.testing.assert_array_equal(make().batch(prices), updates)
+
+
+def test_rolling_std_matches_updates():
+    """Long enough for rounding in the running sums to show"""
+    prices = _prices(20000)
+    indicator = RollingStd(10)
+    updates = [
+        indicator.update(x) if not np.isnan(x) else indicator.value for x in prices
+    ]
+    np.testing.assert_array_equal(RollingStd(10).batch(prices), updates)
+    valid = prices[~np.isnan(prices)]
+    assert indicator.value == pytest.approx(np.std(valid[-10:], ddof=1))
+
+
+def test_known_values():
+    values = np.array([1.0, 2, 3, 4, 5])
+    np.testing.assert_array_equal(SMA(3).batch(values), [np.nan, np.nan, 2, 3, 4])
+    np.testing.assert_array_equal(
+        RollingMin(2).batch(values[::-1]), [np.nan, 4, 3, 2, 1]
+    )
+    np.testing.assert_array_equal(
+        EMA(2, alpha=0.5).batch(values), [np.nan, 1.5, 2.25, 3.125, 4.0625]
+    )
+
+
+def test_batch_by_column():
+    prices = np.column_stack([_prices(seed=1), _prices(seed=2)])
+    result = SMA(4).batch(prices)
+    np.testing.assert_array_equal(result[:, 1], SMA(4).batch(prices[:, 1]))
+
+
+def test_atr_on_data_matches_batch():
+    rng = np.random.default_rng(3)
+    close = 50 + np.cumsum(rng.normal(0, 1, 100))
+    high = close + rng.uniform(0, 1, 100)
+    low = close - rng.uniform(0, 1, 100)
+
+    atr = ATR(14, symbol="ABC")
+    updates = []
+    for i in range(100):
+        data = BarData(datetime(2025, 1, 1))
+        if i != 40:
+            data["ABC"] = Bar(high=high[i], low=low[i], close=close[i])
+        updates.append(atr.on_data(data))
+
+    high[40] = np.nan
+    np.testing.assert_array_equal(ATR(14).batch(high, low, close), updates)
+    assert not np.isnan(updates[14]) and np.isnan(updates[12])
+
+
+def test_invalid_windows():
+    with pytest.raises(ValueError):
+        SMA(0)
+    with pytest.raises(ValueError):
+        RollingStd(1)
@@ -4,8 +4,15 @@ import numpy as np
 import pandas as pd
 import pytest
 
-from systrade.data import Bar, BarData
-from systrade.portfolio import Portfolio
+from systrade.data import (
+    Bar,
+    BarData,
+    CorporateAction,
+    ExecutionReport,
+    Order,
+    OrderType,
+)
+from systrade.portfolio import Calendar, Portfolio, RecordMode
 from systrade.position import Position
 
 
@@ -187,6 +194,35 @@ def test_on_fill_closing_removes_position():
     assert not pf.is_invested_in(pos.symbol)
 
 
+def _report(sym: str, price: float, qty: float, fee: float = 0.0) -> ExecutionReport:
+    order = Order("O1", sym, qty, OrderType.MARKET, datetime(2025, 1, 1))
+    return ExecutionReport(order, price, qty, qty, 0, datetime(2025, 1, 1), fee)
+
+
+def test_on_fills_matches_on_fill():
+    """Test a batch of fills ends up where fill by fill updates do, fees
+    included"""
+    pos = Position("ABC", 3)
+    fills = [
+        ("ABC", 100, -3, 1.5),
+        ("DEF", 50.5, 2, 0.0),
+        ("GHI", 10, 1, 0.25),
+        ("GHI", 11, -1, 0.25),
+    ]
+
+    one_by_one = Portfolio(1000, current_positions={pos.symbol: pos})
+    for sym, price, qty, fee in fills:
+        one_by_one.on_fill(sym, price, qty, fee)
+    batched = Portfolio(1000, current_positions={pos.symbol: pos})
+    batched.on_fills([_report(*fill) for fill in fills])
+
+    assert batched.cash() == one_by_one.cash()
+    assert batched.cash() == pytest.approx(1000 + 300 - 101 - 10 + 11 - 2)
+    assert batched.position("DEF") == one_by_one.position("DEF")
+    assert not batched.is_invested_in("ABC")
+    assert not batched.is_invested_in("GHI")
+
+
 def test_activity_returns_history():
     pf = Portfolio(1000)
     data = BarData(datetime(2025, 1, 1))
@@ -209,7 +245,8 @@ def test_activity_returns_history():
     data["DEF"] = Bar(close=102)
     pf.on_data(data)
 
-    # Would be the result of df.to_records(index=False)
+    # Would be the result of df.to_records(index=False). Values are recorded in
+    # float64 columns.
     records = np.rec.array(
         [
             (
@@ -255,16 +292,167 @@ def test_activity_returns_history():
         ],
         dtype=[
             ("timestamp", "<M8[ns]"),
-            ("cash", "<i8"),
+            ("cash", "<f8"),
             ("symbols", "O"),
             ("quantities", "O"),
             ("prices", "O"),
             ("asset_values", "O"),
-            ("asset_value", "<i8"),
-            ("value", "<i8"),
+            ("asset_value", "<f8"),
+            ("value", "<f8"),
         ],
     )
 
     pd.testing.assert_frame_equal(
         pf.activity().df(), pd.DataFrame.from_records(records)
     )
+
+
+def test_missing_prices_keep_last_mark():
+    """Test positions stay marked to the latest close when a bar is missing or
+    has no close"""
+    pos = Position("ABC", 5)
+    pf = Portfolio(1000, current_positions={pos.symbol: pos})
+    data = BarData()
+    data[pos.symbol] = Bar(close=100)
+    pf.on_data(data)
+
+    pf.on_data(BarData())
+    assert pf.asset_value() == 500
+    data = BarData()
+    data[pos.symbol] = Bar()
+    pf.on_data(data)
+    assert pf.asset_value_of(pos.symbol) == 500
+
+
+def test_asset_value_tracks_fills_and_prices():
+    """Test the running asset value across opening, adding to and closing
+    positions in a wide universe"""
+    symbols = [f"S{i}" for i in range(500)]
+    pf = Portfolio(0)
+    data = BarData()
+    for i, sym in enumerate(symbols):
+        data[sym] = Bar(close=float(i))
+    pf.on_data(data)
+    for sym in symbols:
+        pf.on_fill(sym, 1, 2)
+    assert pf.asset_value() == sum(2 * i for i in range(500))
+
+    pf.on_fill("S10", 1, 3)
+    pf.on_fill("S20", 1, -2)
+    data["S10"] = Bar(close=50)
+    pf.on_data(data)
+    expected = sum(2 * i for i in range(500)) - 20 - 40 + 5 * 50
+    assert pf.asset_value() == expected
+    assert pf.asset_value_of("S10") == 250
+    assert not pf.is_invested_in("S20")
+    assert pf.value() == expected + pf.cash()
+
+
+def _run_days(pf: Portfolio, days: list[datetime]) -> None:
+    """Buy on the first day then feed a rising close each day"""
+    for i, day in enumerate(days):
+        data = BarData(day)
+        data["ABC"] = Bar(close=100 + i)
+        pf.on_data(data)
+        if i == 0:
+            pf.on_fill("ABC", 100, 5)
+
+
+def test_record_mode_none_keeps_total_return():
+    pf = Portfolio(1000, record_mode=RecordMode.NONE)
+    _run_days(pf, [datetime(2025, 1, d) for d in range(1, 6)])
+
+    activity = pf.activity()
+    assert activity.total_return() == pytest.approx(1020 / 1000 - 1)
+    with pytest.raises(ValueError):
+        activity.equity_curve()
+
+
+def test_record_mode_equity_skips_positions():
+    pf = Portfolio(1000, record_mode=RecordMode.EQUITY)
+    _run_days(pf, [datetime(2025, 1, d) for d in range(1, 4)])
+
+    activity = pf.activity()
+    assert activity.equity_curve().tolist() == [1000, 1005, 1010]
+    assert activity.df()["symbols"].tolist() == [[], [], []]
+
+
+def test_sample_every_n_bars():
+    pf = Portfolio(1000, sample_every=2)
+    _run_days(pf, [datetime(2025, 1, d) for d in range(1, 6)])
+
+    activity = pf.activity()
+    assert activity.equity_curve().tolist() == [1000, 1010, 1020]
+    assert activity.total_return() == pytest.approx(1020 / 1000 - 1)
+
+
+def test_sample_on_calendar_month():
+    pf = Portfolio(1000, record_mode=RecordMode.EQUITY, sample_on=Calendar.MONTH)
+    days = [datetime(2025, 1, 30), datetime(2025, 1, 31), datetime(2025, 2, 3)]
+    _run_days(pf, days)
+
+    timestamps = pf.activity().df()["timestamp"]
+    assert timestamps.tolist() == [days[0], days[2]]
+
+
+def test_on_corporate_action_applies_splits_and_dividends():
+    pf = Portfolio(1000, current_positions={"ABC": Position("ABC", 10)})
+    data = BarData(datetime(2025, 1, 1))
+    data["ABC"] = Bar(close=100)
+    pf.on_data(data)
+
+    pf.on_corporate_action(CorporateAction("ABC", split=2))
+    assert pf.position("ABC") == Position("ABC", 20)
+    assert pf.asset_value() == 1000
+
+    pf.on_corporate_action(CorporateAction("ABC", dividend=1.5))
+    assert pf.cash() == 1030
+    # Symbols that aren't held are ignored
+    pf.on_corporate_action(CorporateAction("DEF", dividend=1, split=3))
+    assert not pf.is_invested_in("DEF")
+
+
+def test_rejected_fills_leave_portfolio_unchanged():
+    pos = Position("ABC", 5)
+    pf = Portfolio(1000, current_positions={pos.symbol: pos})
+    with pytest.raises(RuntimeError):
+        pf.on_fill("ABC", 10, -10)
+    with pytest.raises(RuntimeError):
+        pf.on_fills(
+            [_report("DEF", 10, 1), _report("ABC", 10, -4, 1.0), _report("ABC", 10, -2)]
+        )
+    assert pf.cash() == 1000
+    assert pf.position("ABC").qty == 5
+    assert not pf.is_invested_in("DEF")
+
+
+def test_rounding_residue_closes_positions():
+    """Test sells within rounding of a position close it instead of raising
+    or leaving a sliver behind"""
+    pf = Portfolio(1000)
+    for qty in [33.3, 33.3, 33.3, 0.0999999999999801]:
+        pf.on_fill("ABC", 1.0, qty)
+    pf.on_fill("ABC", 1.0, -100)
+    assert not pf.is_invested_in("ABC")
+
+    pf.on_fill("DEF", 1.0, 0.3)
+    pf.on_fill("DEF", 1.0, -0.1)
+    pf.on_fill("DEF", 1.0, -0.2)
+    assert not pf.is_invested_in("DEF")
+
+
+def test_asset_value_is_zero_once_positions_close():
+    rng = np.random.default_rng(0)
+    symbols = [f"S{i}" for i in range(20)]
+    pf = Portfolio(1e6)
+    for symbol in symbols:
+        pf.on_fill(symbol, 1.0, 3)
+    for _ in range(2000):
+        data = BarData(datetime(2025, 1, 1))
+        for symbol, close in zip(symbols, rng.uniform(0.1, 100, len(symbols))):
+            data[symbol] = Bar(close=close)
+        pf.on_data(data)
+    for symbol in symbols:
+        pf.on_fill(symbol, 1.0, -3)
+    assert not pf.is_invested()
+    assert pf.asset_value() == 0
@@ -20,3 +20,7 @@ def test_eq():
     assert pos != Position("DEF", 123)
     assert pos != Position("ABC", 123.1)
     assert pos != ("ABC", 123)
+
+
+def test_slotted():
+    assert not hasattr(Position("ABC", 1), "__dict__")
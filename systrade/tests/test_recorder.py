@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from systrade.portfolio import PortfolioActivity
+from systrade.recorder import ActivityRecorder
+
+
+def _make_recorder() -> ActivityRecorder:
+    recorder = ActivityRecorder(capacity=1)
+    recorder.append(datetime(2025, 1, 1), 1000, 0, 1000)
+    recorder.append(datetime(2025, 1, 2), 500, 510, 1010, ["ABC"], [5], [102])
+    recorder.append(
+        datetime(2025, 1, 3), 300, 720, 1020, ["ABC", "DEF"], [5, 2], [104, 100]
+    )
+    return recorder
+
+
+def test_append_grows_columns():
+    recorder = _make_recorder()
+    assert len(recorder) == 3
+    assert recorder.value().tolist() == [1000, 1010, 1020]
+    assert recorder.symbols == ["ABC", "DEF"]
+    period, code, quantity, price = recorder.positions()
+    assert period.tolist() == [1, 2, 2]
+    assert code.tolist() == [0, 0, 1]
+    assert quantity.tolist() == [5, 5, 2]
+    assert price.tolist() == [102, 104, 100]
+
+
+def test_out_of_range_timestamp_is_nat():
+    """Test the BarData default as of time is recorded as missing"""
+    recorder = ActivityRecorder()
+    recorder.append(datetime.min, 1000, 0, 1000)
+    assert np.isnat(recorder.timestamps()[0])
+
+
+def test_tz_aware_timestamp_is_wall_clock():
+    recorder = ActivityRecorder()
+    recorder.append(pd.Timestamp("2025-01-02 09:30", tz="America/New_York"), 1, 0, 1)
+    recorder.append(datetime(2025, 1, 3, tzinfo=timezone.utc), 1, 0, 1)
+    assert recorder.timestamps().tolist() == [
+        pd.Timestamp("2025-01-02 09:30").value,
+        pd.Timestamp("2025-01-03").value,
+    ]
+
+
+def test_equity_curve_is_a_view():
+    recorder = _make_recorder()
+    curve = PortfolioActivity(recorder).equity_curve()
+    assert np.shares_memory(curve.to_numpy(), recorder.value())
+    assert curve.tolist() == [1000, 1010, 1020]
+
+
+def test_df_packs_or_explodes_positions():
+    activity = PortfolioActivity(_make_recorder())
+
+    condensed = activity.df()
+    assert condensed["symbols"].tolist() == [[], ["ABC"], ["ABC", "DEF"]]
+    assert condensed["asset_values"].tolist() == [[], [510], [520, 200]]
+
+    exploded = activity.df(condensed=False)
+    assert exploded.index.tolist() == [0, 1, 2, 2]
+    assert exploded["symbols"].iloc[1:].tolist() == ["ABC", "ABC", "DEF"]
+    assert pd.isna(exploded["symbols"].iloc[0])
+    assert exploded["asset_values"].iloc[1:].tolist() == [510, 520, 200]
+    assert exploded["cash"].tolist() == [1000, 500, 300, 300]
+
+
+def test_frozen_copy_ignores_later_appends():
+    recorder = _make_recorder()
+    frozen = recorder.frozen()
+    for day in range(4, 30):
+        recorder.append(datetime(2025, 1, day), 1, 1, 2, ["GHI"], [1], [1])
+    assert len(frozen) == 3
+    assert frozen.symbols == ["ABC", "DEF"]
+    assert frozen.value().tolist() == [1000, 1010, 1020]
+    assert frozen.positions()[1].tolist() == [0, 0, 1]
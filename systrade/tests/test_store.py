@@ -0,0 +1,143 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from systrade.store import BarStore, to_wall_clock
+
+
+def _make_frame() -> pd.DataFrame:
+    """Two symbols, unsorted, with DEF missing a bar on the second day"""
+    return pd.DataFrame(
+        {
+            "Date": [
+                "2005-02-02 00:00:00-05:00",
+                "2005-02-01 00:00:00-05:00",
+                "2005-02-01 00:00:00-05:00",
+                "2005-04-04 00:00:00-04:00",
+            ],
+            "Open": [2.0, 1.0, 10.0, 3.0],
+            "High": [2.5, 1.5, 10.5, 3.5],
+            "Low": [1.5, 0.5, 9.5, 2.5],
+            "Close": [2.2, 1.2, 10.2, 3.2],
+            "Volume": [200, 100, 1000, 300],
+            "Symbol": ["ABC", "ABC", "DEF", "ABC"],
+        }
+    )
+
+
+def test_to_wall_clock_drops_mixed_offsets():
+    """Test that timestamps keep their local date across offset changes"""
+    stamps = to_wall_clock(_make_frame()["Date"])
+    assert stamps[0] == np.datetime64("2005-02-02")
+    assert stamps[3] == np.datetime64("2005-04-04")
+
+
+def test_from_frame_indexes_by_time_period():
+    """Test rows are grouped by timestamp with offsets into the columns"""
+    store = BarStore.from_frame(_make_frame())
+    assert len(store) == 3
+    assert store.symbols == ["ABC", "DEF"]
+    assert store.offsets.tolist() == [0, 2, 3, 4]
+    assert store.columns["open"].tolist() == [1.0, 10.0, 2.0, 3.0]
+    assert store.datetime_at(1) == datetime(2005, 2, 2)
+
+
+def test_search_finds_first_period_on_or_after():
+    store = BarStore.from_frame(_make_frame())
+    assert store.search("2005-02-01") == 0
+    assert store.search("2005-02-03") == 2
+    assert store.search("2006-01-01") == len(store)
+
+
+def test_values_at_handles_missing_symbols():
+    """Test bars are looked up per symbol and missing bars are NaN"""
+    store = BarStore.from_frame(_make_frame())
+    ids = store.symbol_ids(["ABC", "DEF"])
+    values = store.values_at(0, ids)
+    assert values[0].tolist() == [1.0, 1.5, 0.5, 1.2, 100]
+    assert values[1].tolist() == [10.0, 10.5, 9.5, 10.2, 1000]
+    values = store.values_at(1, ids)
+    assert values[0, 0] == 2.0
+    assert np.isnan(values[1]).all()
+
+
+def test_matrix_handles_missing_symbols():
+    """Test dense and sparse windows are laid out as time period x symbol"""
+    store = BarStore.from_frame(_make_frame())
+    both = store.symbol_ids(["ABC", "DEF"])
+    matrix = store.matrix(both, 0, 3)
+    assert matrix["open"][:, 0].tolist() == [1.0, 2.0, 3.0]
+    assert matrix["close"][0].tolist() == [1.2, 10.2]
+    assert np.isnan(matrix["volume"][1:, 1]).all()
+    # Every period has a bar for every symbol
+    assert store.matrix(both, 0, 1)["high"].tolist() == [[1.5, 10.5]]
+    abc = store.matrix(store.symbol_ids(["ABC"]), 0, 3)
+    assert abc["low"].tolist() == [[0.5], [1.5], [2.5]]
+
+
+def test_save_and_open_round_trip(tmp_path):
+    """Test the memory mapped store matches the one it was written from"""
+    store = BarStore.from_frame(_make_frame())
+    path = tmp_path / "bars.bin"
+    store.save(path)
+    mapped = BarStore.open(path)
+
+    assert mapped.symbols == store.symbols
+    np.testing.assert_array_equal(mapped.timestamps, store.timestamps)
+    np.testing.assert_array_equal(mapped.offsets, store.offsets)
+    np.testing.assert_array_equal(mapped.codes, store.codes)
+    for field in BarStore.FIELDS:
+        np.testing.assert_array_equal(mapped.columns[field], store.columns[field])
+    assert not mapped.columns["close"].flags.writeable
+
+
+def test_symbol_index_lists_rows_in_time_order():
+    store = BarStore.from_frame(_make_frame())
+    rows, offsets = store.symbol_index()
+    abc = rows[offsets[0] : offsets[1]]
+    assert store.columns["open"][abc].tolist() == [1.0, 2.0, 3.0]
+    assert offsets.tolist() == [0, 3, 4]
+
+
+def test_open_rejects_other_files(tmp_path):
+    path = tmp_path / "bars.csv"
+    _make_frame().to_csv(path, index=False)
+    with pytest.raises(ValueError):
+        BarStore.open(path)
+
+
+def _make_actions_frame() -> pd.DataFrame:
+    """ABC splits 2-for-1 on the third day and pays a dividend on the fifth,
+    DEF has no actions"""
+    dates = [f"2005-02-0{day} 00:00:00-05:00" for day in range(1, 6)]
+    close = [100.0, 100.0, 50.0, 50.0, 50.0]
+    return pd.DataFrame(
+        {
+            "Date": dates * 2,
+            "Open": close * 2,
+            "High": close * 2,
+            "Low": close * 2,
+            "Close": close * 2,
+            "Volume": [10.0] * 10,
+            "Dividends": [0, 0, 0, 0, 1.0] + [0] * 5,
+            "Stock Splits": [0, 0, 2.0, 0, 0] + [0] * 5,
+            "Symbol": ["ABC"] * 5 + ["DEF"] * 5,
+        }
+    )
+
+
+def test_adjustment_factors(tmp_path):
+    store = BarStore.from_frame(_make_actions_frame())
+    rows, offsets = store.symbol_index()
+    abc = store.adjustments()[rows[offsets[0] : offsets[1]]]
+    np.testing.assert_allclose(abc[:, 0], [0.49, 0.49, 0.98, 0.98, 1])
+    np.testing.assert_allclose(abc[:, 1], [0.5, 0.5, 1, 1, 1])
+    np.testing.assert_array_equal(store.adjustments()[rows[offsets[1] :]], 1)
+
+    # Actions and factors are saved with the bars
+    store.save(tmp_path / "bars.bin")
+    opened = BarStore.open(tmp_path / "bars.bin")
+    np.testing.assert_array_equal(opened.actions, store.actions)
+    np.testing.assert_array_equal(opened.adjustments(), store.adjustments())
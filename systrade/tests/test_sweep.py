@@ -0,0 +1,54 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from systrade.store import convert_csv
+from systrade.sweep import parameter_grid, sweep
+
+from strategies import BuyOnDay
+
+BARS = Path(__file__).parent / "bars.csv"
+
+
+def test_parameter_grid():
+    grid = parameter_grid({"a": [1, 2], "b": ["x"]})
+    assert grid == [{"a": 1, "b": "x"}, {"a": 2, "b": "x"}]
+
+
+@pytest.mark.parametrize("processes", [1, 2])
+def test_sweep_summarizes_each_run(tmp_path, processes):
+    convert_csv(BARS, tmp_path / "bars.bin")
+    grid = {"day": [0, 2], "qty": [0, 100]}
+
+    results = sweep(tmp_path / "bars.bin", BuyOnDay, grid, 1000, processes=processes)
+
+    assert [r.params for r in results] == parameter_grid(grid)
+    for result in results:
+        assert len(result.equity_curve) == 11
+        assert result.final_value == result.equity_curve[-1]
+        assert result.total_return == pytest.approx(result.final_value / 1000 - 1)
+    # No shares bought means no change in value
+    assert results[0].total_return == 0
+    assert results[1].total_return != 0
+
+
+def test_sweep_converts_csv_once():
+    results = sweep(BARS, BuyOnDay, {"day": [1], "qty": [10]}, 1000, end="2005-02-04")
+    assert len(results) == 1
+    assert np.isfinite(results[0].final_value)
+    assert len(results[0].equity_curve) == 4
+
+
+def test_sweep_reports_total_loss(tmp_path):
+    """Test a run ending with nothing left is a -100% return"""
+    path = tmp_path / "bars.csv"
+    path.write_text(
+        "Date,Open,High,Low,Close,Volume,Dividends,Stock Splits,Symbol\n"
+        "2005-02-01 00:00:00-05:00,10,10,10,10,100,0,0,NVDA\n"
+        "2005-02-02 00:00:00-05:00,10,10,10,10,100,0,0,NVDA\n"
+        "2005-02-03 00:00:00-05:00,0,0,0,0,100,0,0,NVDA\n"
+    )
+    (result,) = sweep(path, BuyOnDay, {"day": [0], "qty": [100]}, 1000, processes=1)
+    assert result.final_value == 0
+    assert result.total_return == -1
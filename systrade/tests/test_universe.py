@@ -0,0 +1,92 @@
+from datetime import datetime
+from typing import override
+
+import numpy as np
+import pytest
+
+from systrade.data import ArrayBarData, BarData, ExecutionReport, SymbolIndex
+from systrade.universe import DollarVolume, Momentum, RankedStrategy, Ranker, Ranking
+
+INDEX = SymbolIndex(["AAA", "BBB", "CCC", "DDD"])
+
+
+def _bar(day: int, closes: list[float], volumes: list[float]) -> ArrayBarData:
+    values = np.column_stack([closes, closes, closes, closes, volumes])
+    return ArrayBarData(INDEX, values.astype(float), datetime(2025, 1, day))
+
+
+def test_momentum_over_lookback():
+    momentum = Momentum(2)
+    momentum.update(_bar(1, [10, 10, 10, 10], [1] * 4))
+    assert np.isnan(momentum.update(_bar(2, [11, 9, 10, 10], [1] * 4))).all()
+    scores = momentum.update(_bar(3, [12, 8, 15, np.nan], [1] * 4))
+    np.testing.assert_allclose(scores[:3], [0.2, -0.2, 0.5])
+    assert np.isnan(scores[3])
+
+
+def test_dollar_volume_average():
+    volume = DollarVolume(2)
+    volume.update(_bar(1, [1, 1, 1, 1], [10, 20, 30, np.nan]))
+    scores = volume.update(_bar(2, [2, 2, 2, 2], [10, 20, 30, 40]))
+    np.testing.assert_allclose(scores, [15, 30, 45, 40])
+
+
+def test_ranker_selects_top_k_liquid_symbols():
+    ranker = Ranker(
+        Momentum(1), k=2, min_price=5, min_dollar_volume=100, liquidity_window=2
+    )
+    ranker.rank(_bar(1, [10, 10, 10, 10], [100, 100, 1, 100]))
+    # CCC is illiquid, DDD too cheap
+    ranking = ranker.rank(_bar(2, [11, 13, 20, 4], [100, 100, 1, 100]))
+    assert ranking.symbols == ["BBB", "AAA"]
+    np.testing.assert_array_equal(ranking.columns, [1, 0])
+    np.testing.assert_allclose(ranking.scores, [0.3, 0.1])
+
+    ascending = Ranker(Momentum(1), k=1, ascending=True)
+    ascending.rank(_bar(1, [10, 10, 10, 10], [1] * 4))
+    assert ascending.rank(_bar(2, [11, 13, 20, 4], [1] * 4)).symbols == ["DDD"]
+
+
+def test_ranker_matches_full_sort():
+    rng = np.random.default_rng(0)
+    index = SymbolIndex([f"S{i}" for i in range(3000)])
+    ranker = Ranker(Momentum(1), k=50)
+    first = rng.uniform(10, 20, 3000)
+    second = first * rng.uniform(0.9, 1.1, 3000)
+    for day, closes in enumerate([first, second], start=1):
+        values = np.column_stack([closes] * 4 + [np.ones(3000)])
+        ranking = ranker.rank(ArrayBarData(index, values, datetime(2025, 1, day)))
+    expected = np.argsort(-(second / first - 1), kind="stable")[:50]
+    np.testing.assert_array_equal(ranking.columns, expected)
+
+
+class TopPick(RankedStrategy):
+    def __init__(self) -> None:
+        super().__init__(Ranker(Momentum(1), k=1))
+        self.picks = list[list[str]]()
+
+    @override
+    def on_start(self) -> None:
+        pass
+
+    @override
+    def on_ranked(self, data: BarData, ranking: Ranking) -> None:
+        self.picks.append(ranking.symbols)
+
+    @override
+    def on_execution(self, report: ExecutionReport) -> None:
+        pass
+
+
+def test_ranked_strategy_receives_rankings():
+    strategy = TopPick()
+    strategy.on_data(_bar(1, [10, 10, 10, 10], [1] * 4))
+    strategy.on_data(_bar(2, [10, 12, 11, 10], [1] * 4))
+    assert strategy.picks == [[], ["BBB"]]
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        Momentum(0)
+    with pytest.raises(ValueError):
+        Ranker(Momentum(1), k=0)
@@ -0,0 +1,149 @@
+from pathlib import Path
+from typing import Optional, override
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from systrade.broker import BacktestBroker
+from systrade.data import BarData, ExecutionReport
+from systrade.engine import Engine
+from systrade.feed import FileFeed
+from systrade.strategy import Strategy
+from systrade.vectorized import PriceMatrix, VectorizedEngine, VectorizedStrategy
+
+# Target quantities per bar for (ABC, DEF), NaN keeps the previous target
+TARGETS = np.array(
+    [
+        [0, 10],
+        [5, 10],
+        [5, np.nan],
+        [0, 0],
+        [3, 2],
+        [3, 2],
+    ],
+    dtype=float,
+)
+
+
+def _write_bars(path: Path, gaps: Optional[dict[str, list[int]]] = None) -> None:
+    """Two symbols over six days, written symbol by symbol like the history
+    files, leaving out the days listed in gaps"""
+    dates = pd.date_range("2025-01-01", periods=6).strftime("%Y-%m-%d 00:00:00-05:00")
+    frames = []
+    for sym, base in [("DEF", 20.0), ("ABC", 100.0)]:
+        prices = base + np.arange(6)
+        frame = pd.DataFrame(
+            {
+                "Date": dates,
+                "Open": prices - 0.5,
+                "High": prices + 1,
+                "Low": prices - 1,
+                "Close": prices,
+                "Volume": 1000,
+                "Dividends": 0.0,
+                "Stock Splits": 0.0,
+                "Symbol": sym,
+            }
+        )
+        frames.append(frame.drop(index=(gaps or {}).get(sym, [])))
+    pd.concat(frames).to_csv(path, index=False)
+
+
+class TargetStrategy(Strategy):
+    """Event loop strategy trading towards fixed targets"""
+
+    def __init__(self, targets: np.ndarray) -> None:
+        super().__init__()
+        self.targets = targets
+        self.bar = 0
+        self.current = np.zeros(targets.shape[1])
+
+    @override
+    def on_start(self) -> None:
+        self.subscribe("ABC")
+        self.subscribe("DEF")
+
+    @override
+    def on_data(self, data: BarData) -> None:
+        for col, sym in enumerate(["ABC", "DEF"]):
+            target = self.targets[self.bar, col]
+            if not np.isnan(target) and target != self.current[col]:
+                self.post_market_order(sym, target - self.current[col])
+                self.current[col] = target
+        self.bar += 1
+
+    @override
+    def on_execution(self, report: ExecutionReport) -> None:
+        pass
+
+
+class VectorTargetStrategy(VectorizedStrategy):
+    @override
+    def symbols(self) -> list[str]:
+        return ["DEF", "ABC"]
+
+    @override
+    def target_positions(self, prices: PriceMatrix) -> np.ndarray:
+        # Columns come back in store order regardless of the order requested
+        assert prices.symbols == ["ABC", "DEF"]
+        return TARGETS
+
+
+def test_vectorized_matches_event_loop(tmp_path):
+    path = tmp_path / "bars.csv"
+    _write_bars(path)
+
+    engine = Engine(FileFeed(path), BacktestBroker(), TargetStrategy(TARGETS), 1000)
+    engine.run()
+    vectorized = VectorizedEngine(FileFeed(path), VectorTargetStrategy(), 1000)
+    vectorized.run()
+
+    expected = engine.portfolio.activity()
+    actual = vectorized.activity()
+    pd.testing.assert_frame_equal(actual.df(), expected.df())
+    assert actual.total_return() == expected.total_return()
+
+
+def test_orders_rest_through_missing_bars(tmp_path):
+    """Test targets are traded at the next bar a symbol has, like resting
+    orders in the broker"""
+    path = tmp_path / "bars.csv"
+    # ABC misses the days its first and last targets fill, DEF the day it
+    # goes flat
+    _write_bars(path, gaps={"ABC": [2, 5], "DEF": [4]})
+
+    engine = Engine(FileFeed(path), BacktestBroker(), TargetStrategy(TARGETS), 1000)
+    engine.run()
+    vectorized = VectorizedEngine(FileFeed(path), VectorTargetStrategy(), 1000)
+    vectorized.run()
+
+    expected = engine.portfolio.activity()
+    actual = vectorized.activity()
+    assert np.isfinite(actual.df()["value"]).all()
+    pd.testing.assert_frame_equal(actual.df(), expected.df())
+    assert actual.total_return() == expected.total_return()
+
+
+def test_prices_cover_feed_window(tmp_path):
+    path = tmp_path / "bars.csv"
+    _write_bars(path)
+    feed = FileFeed(path, start="2025-01-02", end="2025-01-04")
+
+    prices = VectorizedEngine(feed, VectorTargetStrategy(), 1000).prices()
+    assert prices.close.shape == (3, 2)
+    assert prices.close[:, 0].tolist() == [101, 102, 103]
+    assert prices.timestamps[0] == np.datetime64("2025-01-02")
+
+
+def test_target_shape_is_validated(tmp_path):
+    path = tmp_path / "bars.csv"
+    _write_bars(path)
+
+    class BadStrategy(VectorTargetStrategy):
+        @override
+        def target_positions(self, prices: PriceMatrix) -> np.ndarray:
+            return TARGETS[:-1]
+
+    with pytest.raises(ValueError):
+        VectorizedEngine(FileFeed(path), BadStrategy(), 1000).run()